@@ -0,0 +1,181 @@
+"""Agente sin interfaz: recolecta métricas de este equipo y las envía a un agregador Atlayos
+
+Uso:
+    python agent.py --server http://agregador:5000 --token secreto [--interval 5]
+
+Para probar varios agentes en la misma máquina:
+    python agent.py --server http://127.0.0.1:5000 --token secreto --simulate 5
+"""
+import argparse
+import random
+import socket
+import threading
+import time
+import logging
+import urllib.error
+import urllib.request
+from collections import deque
+from typing import Deque, List, Optional
+
+from collector import MetricsCollector, SnapshotSlot
+from fleet import encode_payload
+
+logger = logging.getLogger('Agent')
+
+AGENT_VERSION = 1
+DEFAULT_INTERVAL = 5.0
+# Cada cuánto se envía lo acumulado y cuántos snapshots como máximo por envío
+DEFAULT_FLUSH_INTERVAL = 15.0
+DEFAULT_BATCH_SIZE = 60
+# Snapshots que se guardan mientras el agregador no responde (1 h a 5 s)
+DEFAULT_BUFFER_SIZE = 720
+MIN_BACKOFF = 1.0
+MAX_BACKOFF = 300.0
+INGEST_PATH = '/api/agent/ingest'
+
+
+class Agent:
+    """Cola local de snapshots y su envío por lotes al agregador
+
+    Los snapshots se acumulan en un buffer acotado; si el agregador no está
+    disponible se reintenta con espera exponencial y, si el buffer se llena,
+    se descartan los más antiguos (y se informa de cuántos). Un 429/503 con
+    Retry-After del agregador se respeta como contrapresión.
+    """
+
+    def __init__(self, server: str, hostname: Optional[str] = None, token: Optional[str] = None,
+                 interval: float = DEFAULT_INTERVAL, batch_size: int = DEFAULT_BATCH_SIZE,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE, timeout: float = 10.0):
+        self.url = server.rstrip('/') + INGEST_PATH
+        self.hostname = hostname or socket.gethostname()
+        self.token = token
+        self.interval = interval
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.buffer: Deque[dict] = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.sent = 0
+        self._lock = threading.Lock()
+        self._backoff = 0.0
+        self._next_attempt = 0.0
+
+    def enqueue(self, snapshot: dict) -> None:
+        with self._lock:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(snapshot)
+
+    def ready(self, now: float) -> bool:
+        """True si toca intentar un envío (no se está esperando por un error o contrapresión)"""
+        return bool(self.buffer) and now >= self._next_attempt
+
+    def flush(self, now: Optional[float] = None) -> bool:
+        """Envía el buffer por lotes; devuelve False si hubo que dejar de intentarlo"""
+        now = time.monotonic() if now is None else now
+        while self.ready(now):
+            with self._lock:
+                batch = list(self.buffer)[:self.batch_size]
+            delay = self._send(batch)
+            if delay is not None:
+                self._next_attempt = time.monotonic() + delay
+                return False
+            with self._lock:
+                # Solo se quitan los enviados: mientras tanto pudo descartarse alguno por buffer lleno
+                sent = {id(snapshot) for snapshot in batch}
+                while self.buffer and id(self.buffer[0]) in sent:
+                    self.buffer.popleft()
+        return True
+
+    def _send(self, batch: List[dict]) -> Optional[float]:
+        """Envía un lote; devuelve None si se aceptó o los segundos a esperar antes de reintentar"""
+        payload = {
+            'agent': {'hostname': self.hostname, 'version': AGENT_VERSION, 'interval': self.interval},
+            'dropped': self.dropped,
+            'snapshots': batch
+        }
+        request = urllib.request.Request(self.url, data=encode_payload(payload), method='POST', headers={
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'gzip',
+            **({'X-Agent-Token': self.token} if self.token else {})
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+            self._backoff = 0.0
+            self.sent += len(batch)
+            return None
+        except urllib.error.HTTPError as e:
+            if e.code == 413 and self.batch_size > 1:
+                # Lote demasiado grande para el agregador: se reintenta de inmediato con la mitad
+                self.batch_size = max(1, self.batch_size // 2)
+                logger.warning(f"Lote rechazado por tamaño; nuevo tamaño de lote {self.batch_size}")
+                return 0.0
+            retry_after = e.headers.get('Retry-After') if e.headers else None
+            if e.code in (429, 503) and retry_after:
+                try:
+                    return float(retry_after)
+                except ValueError:
+                    pass
+            logger.warning(f"El agregador respondió {e.code} a {self.hostname}")
+        except (urllib.error.URLError, OSError) as e:
+            logger.warning(f"Agregador no disponible ({self.url}): {str(e)}")
+        self._backoff = min(MAX_BACKOFF, max(MIN_BACKOFF, self._backoff * 2))
+        # Con jitter para que cientos de agentes no reintenten a la vez
+        return self._backoff * random.uniform(0.5, 1.0)
+
+
+def run(agents: List[Agent], interval: float, flush_interval: float,
+        stop: Optional[threading.Event] = None, top_n: int = 10) -> None:
+    """Recolecta cada interval segundos y envía lo acumulado cada flush_interval"""
+    stop = stop or threading.Event()
+    collector = MetricsCollector(SnapshotSlot(), top_n=top_n)
+    last_flush = time.monotonic()
+    while not stop.is_set():
+        started = time.monotonic()
+        try:
+            snapshot = collector.collect_once()
+            snapshot['collected_at'] = time.time()
+            for agent in agents:
+                if agent.hostname == snapshot.get('hostname'):
+                    agent.enqueue(snapshot)
+                else:
+                    agent.enqueue({**snapshot, 'hostname': agent.hostname})
+        except Exception as e:
+            logger.error(f"Error recolectando métricas: {str(e)}", exc_info=True)
+
+        now = time.monotonic()
+        if now - last_flush >= flush_interval or any(len(a.buffer) >= a.batch_size for a in agents):
+            last_flush = now
+            for agent in agents:
+                agent.flush(now)
+        stop.wait(max(0.0, interval - (time.monotonic() - started)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Agente de métricas para un agregador Atlayos")
+    parser.add_argument('--server', required=True, help='URL del agregador, p. ej. http://10.0.0.2:5000')
+    parser.add_argument('--token', required=True, help='Token compartido (flota.token en la config del agregador)')
+    parser.add_argument('--hostname', help='Nombre con el que se registra este equipo')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL)
+    parser.add_argument('--flush-interval', type=float, default=DEFAULT_FLUSH_INTERVAL)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--buffer-size', type=int, default=DEFAULT_BUFFER_SIZE)
+    parser.add_argument('--simulate', type=int, default=0,
+                        help='Simula N agentes (<hostname>-1..N) con las métricas de este equipo')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    hostname = args.hostname or socket.gethostname()
+    names = [f"{hostname}-{i}" for i in range(1, args.simulate + 1)] if args.simulate else [hostname]
+    agents = [Agent(args.server, name, args.token, args.interval, args.batch_size, args.buffer_size)
+              for name in names]
+    logger.info(f"Enviando métricas de {', '.join(names)} a {args.server}")
+    try:
+        run(agents, args.interval, args.flush_interval)
+    except KeyboardInterrupt:
+        for agent in agents:
+            agent.flush()
+
+
+if __name__ == '__main__':
+    main()
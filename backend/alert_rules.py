@@ -0,0 +1,277 @@
+import fnmatch
+import json
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Métricas por proceso: se evalúan sobre la tabla completa de procesos (o, sin ella, las listas top_*)
+PROCESS_PREFIX = 'proceso.'
+PROCESS_LISTS = ('top_cpu', 'top_mem', 'top_io', 'top_threads')
+
+# Tabla de procesos por columnas: 'pid', 'name' y una columna por cada campo numérico
+ProcessTable = Dict[str, Sequence]
+
+
+def _rule_key(rule: dict) -> str:
+    """Identidad de una regla: todos sus parámetros"""
+    return json.dumps(rule, sort_keys=True, default=str)
+
+
+def default_rules(config: dict) -> List[dict]:
+    """Reglas equivalentes a las comprobaciones fijas anteriores, con histéresis de 5 puntos"""
+    cpu_threshold = config.get('cpu_threshold', 80)
+    ram_threshold = config.get('ram_threshold', 75)
+    return [
+        {
+            'nombre': 'cpu', 'metrica': 'cpu.percent', 'umbral': cpu_threshold,
+            'umbral_limpieza': cpu_threshold - 5, 'tipo': 'danger', 'titulo': 'Alerta de CPU',
+            'mensaje': 'Uso de CPU al {valor}% (Umbral: {umbral}%)'
+        },
+        {
+            'nombre': 'ram', 'metrica': 'memory.percent', 'umbral': ram_threshold,
+            'umbral_limpieza': ram_threshold - 5, 'tipo': 'danger', 'titulo': 'Alerta de Memoria',
+            'mensaje': 'Uso de RAM al {valor}% (Umbral: {umbral}%)'
+        },
+        {
+            'nombre': 'disco', 'metrica': 'disk.percent', 'umbral': 95, 'umbral_limpieza': 90,
+            'tipo': 'warning', 'titulo': 'Alerta de Disco', 'mensaje': 'Espacio en disco al {valor}%'
+        },
+        {
+            'nombre': 'temperatura', 'metrica': 'cpu.temperature', 'umbral': 85, 'umbral_limpieza': 80,
+            'tipo': 'warning', 'titulo': 'Alerta de Temperatura', 'mensaje': 'Temperatura CPU: {valor} °C'
+        }
+    ]
+
+
+def rules_from_config(config: dict) -> List[dict]:
+    """Usa 'reglas_alertas' de config.json o, si no existe, las reglas por defecto"""
+    rules = config.get('reglas_alertas')
+    return rules if rules else default_rules(config)
+
+
+class AlertEngine:
+    """Motor de reglas de alerta compilado una sola vez
+
+    Cada regla admite:
+      - metrica: ruta con puntos dentro del snapshot (p. ej. 'cpu.percent') o
+        'proceso.<campo>' para evaluar cada proceso en ejecución
+      - umbral / operador ('>' o '<') y umbral_limpieza para la histéresis
+      - muestras: nº de muestras consecutivas necesarias para disparar
+      - duracion: segundos que debe mantenerse la condición
+      - tasa: si es true se compara la variación por segundo en lugar del valor
+      - proceso: patrón fnmatch del nombre del proceso (solo reglas por proceso)
+
+    Las reglas se agrupan por métrica y sus parámetros se guardan en arrays
+    paralelos: cada valor del snapshot se extrae una sola vez y se compara
+    contra todas las reglas de su grupo. En las reglas por proceso cada regla
+    filtra primero la columna completa y solo los procesos que superan el
+    umbral o ya tienen estado pasan por la comprobación con histéresis. El
+    estado de un proceso se descarta cuando termina o cruza el umbral de
+    limpieza, no cuando sale de las listas top_*.
+    """
+
+    def __init__(self, rules: List[dict]):
+        self._load(rules)
+        # Estado por (regla, clave); la clave es None para reglas del host y el pid para procesos
+        self._streak: Dict[Tuple[int, Optional[int]], int] = {}
+        self._since: Dict[Tuple[int, Optional[int]], float] = {}
+        self._active: Dict[Tuple[int, Optional[int]], dict] = {}
+        self._previous: Dict[Tuple[object, Optional[int]], Tuple[float, float]] = {}
+
+    def _load(self, rules: List[dict]) -> None:
+        self.rules = rules
+        count = len(rules)
+        self._sign = array('d', [1.0] * count)
+        self._threshold = array('d', [0.0] * count)
+        self._clear = array('d', [0.0] * count)
+        self._samples = array('i', [1] * count)
+        self._duration = array('d', [0.0] * count)
+        self._rate = bytearray(count)
+        self._host_groups: Dict[Tuple[str, ...], List[int]] = {}
+        self._process_groups: Dict[str, List[int]] = {}
+        self._name_patterns: Dict[int, str] = {}
+
+        for index, rule in enumerate(rules):
+            sign = -1.0 if rule.get('operador', '>') == '<' else 1.0
+            threshold = float(rule['umbral'])
+            self._sign[index] = sign
+            self._threshold[index] = threshold
+            self._clear[index] = float(rule.get('umbral_limpieza', threshold))
+            self._samples[index] = max(1, int(rule.get('muestras', 1)))
+            self._duration[index] = float(rule.get('duracion', 0))
+            self._rate[index] = 1 if rule.get('tasa') else 0
+            metric = rule['metrica']
+            if metric.startswith(PROCESS_PREFIX):
+                self._process_groups.setdefault(metric[len(PROCESS_PREFIX):], []).append(index)
+                if rule.get('proceso'):
+                    self._name_patterns[index] = rule['proceso']
+            else:
+                self._host_groups.setdefault(tuple(metric.split('.')), []).append(index)
+
+    def update_rules(self, rules: List[dict]) -> None:
+        """Cambia las reglas conservando el estado (rachas, alertas activas) de las que no cambiaron
+
+        Así guardar la configuración no vuelve a disparar las alertas que ya
+        estaban activas. Una regla modificada empieza de cero.
+        """
+        unchanged: Dict[str, List[int]] = {}
+        for index, rule in enumerate(self.rules):
+            unchanged.setdefault(_rule_key(rule), []).append(index)
+        moved: Dict[int, int] = {}
+        for index, rule in enumerate(rules):
+            old = unchanged.get(_rule_key(rule))
+            if old:
+                moved[old.pop(0)] = index
+        self._load(rules)
+        self._streak = {(moved[i], key): value for (i, key), value in self._streak.items() if i in moved}
+        self._since = {(moved[i], key): value for (i, key), value in self._since.items() if i in moved}
+        self._active = {(moved[i], key): value for (i, key), value in self._active.items() if i in moved}
+
+    @property
+    def uses_processes(self) -> bool:
+        """True si alguna regla se evalúa por proceso (necesita el recolector 'processes')"""
+        return bool(self._process_groups)
+
+    @staticmethod
+    def _lookup(snapshot: dict, path: Tuple[str, ...]) -> Optional[float]:
+        value = snapshot
+        for key in path:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+        return float(value) if isinstance(value, (int, float)) else None
+
+    def _derive(self, metric_key: Tuple[object, Optional[int]], value: float, now: float) -> Optional[float]:
+        previous = self._previous.get(metric_key)
+        self._previous[metric_key] = (value, now)
+        if previous is None or now <= previous[1]:
+            return None
+        return (value - previous[0]) / (now - previous[1])
+
+    def _check(self, index: int, key: Optional[int], value: float, now: float,
+               context: dict, fired: List[dict], active: List[dict]) -> None:
+        state_key = (index, key)
+        sign = self._sign[index]
+        if state_key in self._active:
+            # Histéresis: la alerta sigue activa hasta cruzar el umbral de limpieza
+            if sign * value < sign * self._clear[index]:
+                del self._active[state_key]
+                self._streak.pop(state_key, None)
+                self._since.pop(state_key, None)
+            else:
+                alert = self._active[state_key]
+                alert['message'] = self._message(index, value, context)
+                active.append(alert)
+            return
+
+        if sign * value > sign * self._threshold[index]:
+            streak = self._streak.get(state_key, 0) + 1
+            self._streak[state_key] = streak
+            since = self._since.setdefault(state_key, now)
+            if streak >= self._samples[index] and now - since >= self._duration[index]:
+                alert = {
+                    'type': self.rules[index].get('tipo', 'warning'),
+                    'title': self.rules[index].get('titulo', self.rules[index].get('nombre', 'Alerta')),
+                    'message': self._message(index, value, context),
+                    'timestamp': datetime.now().strftime("%H:%M:%S"),
+                    'rule': self.rules[index].get('nombre', self.rules[index]['metrica'])
+                }
+                if key is not None:
+                    alert['title'] = f"{alert['title']} ({context.get('name')} #{key})"
+                self._active[state_key] = alert
+                fired.append(alert)
+                active.append(alert)
+        else:
+            self._streak.pop(state_key, None)
+            self._since.pop(state_key, None)
+
+    def _message(self, index: int, value: float, context: dict) -> str:
+        template = self.rules[index].get('mensaje', '{metrica}: {valor} (Umbral: {umbral})')
+        return template.format(
+            valor=round(value, 1),
+            umbral=self.rules[index]['umbral'],
+            metrica=self.rules[index]['metrica'],
+            proceso=context.get('name', ''),
+            pid=context.get('pid', '')
+        )
+
+    def evaluate(self, snapshot: dict, now: Optional[float] = None,
+                 processes: Optional[ProcessTable] = None) -> Tuple[List[dict], List[dict]]:
+        """Evalúa todas las reglas y devuelve (alertas recién disparadas, alertas activas)
+
+        processes es la tabla de todos los procesos de la última lectura; sin
+        ella las reglas por proceso solo ven las listas top_* del snapshot.
+        """
+        now = time.time() if now is None else now
+        fired: List[dict] = []
+        active: List[dict] = []
+
+        for path, indexes in self._host_groups.items():
+            value = self._lookup(snapshot, path)
+            if value is None:
+                continue
+            rate = self._derive((path, None), value, now) if any(self._rate[i] for i in indexes) else None
+            for index in indexes:
+                current = rate if self._rate[index] else value
+                if current is not None:
+                    self._check(index, None, current, now, {}, fired, active)
+
+        if self._process_groups:
+            if processes is None:
+                processes = _table_from_snapshot(snapshot)
+            self._evaluate_processes(processes, now, fired, active)
+        return fired, active
+
+    def _evaluate_processes(self, processes: ProcessTable, now: float,
+                            fired: List[dict], active: List[dict]) -> None:
+        pids = processes['pid']
+        names = processes['name']
+        row_of = {pid: row for row, pid in enumerate(pids)}
+
+        for field, indexes in self._process_groups.items():
+            values = processes.get(field)
+            if values is None:
+                continue
+            rates = None
+            if any(self._rate[i] for i in indexes):
+                rates = [self._derive((field, pid), float(value), now) for pid, value in zip(pids, values)]
+            for index in indexes:
+                column = rates if self._rate[index] else values
+                sign = self._sign[index]
+                limit = sign * self._threshold[index]
+                # Procesos que superan el umbral y los que ya tienen estado (racha o alerta activa)
+                rows = {row for row, value in enumerate(column) if value is not None and sign * value > limit}
+                for state in (self._streak, self._active):
+                    rows.update(row_of[key] for i, key in state if i == index and key in row_of)
+                pattern = self._name_patterns.get(index)
+                for row in rows:
+                    name = names[row] or ''
+                    if pattern and not fnmatch.fnmatch(name, pattern):
+                        continue
+                    value = column[row]
+                    # NaN: el campo no se pudo leer (sin permisos) y no cambia el estado
+                    if value is not None and value == value:
+                        self._check(index, pids[row], float(value), now,
+                                    {'pid': pids[row], 'name': name}, fired, active)
+
+        # Solo los procesos que han terminado pierden su estado
+        for state in (self._streak, self._since, self._active):
+            for key in [key for key in state if key[1] is not None and key[1] not in row_of]:
+                del state[key]
+        for key in [key for key in self._previous if key[1] is not None and key[1] not in row_of]:
+            del self._previous[key]
+
+
+def _table_from_snapshot(snapshot: dict) -> ProcessTable:
+    """Tabla de procesos con solo los que aparecen en las listas top_* del snapshot"""
+    processes: Dict[int, dict] = {}
+    for list_name in PROCESS_LISTS:
+        for proc in snapshot.get('processes', {}).get(list_name, []):
+            processes.setdefault(proc['pid'], proc)
+    table: Dict[str, list] = {'pid': list(processes), 'name': [proc.get('name') for proc in processes.values()]}
+    for proc in processes.values():
+        for field, value in proc.items():
+            if isinstance(value, (int, float)) and field not in table:
+                table[field] = [other.get(field) for other in processes.values()]
+    return table
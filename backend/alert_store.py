@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+DEFAULT_CAPACITY = 1000
+
+
+class Incident:
+    """Alerta deduplicada: las repeticiones consecutivas incrementan el contador"""
+
+    __slots__ = ('id', 'key', 'type', 'title', 'message', 'count', 'first_seen', 'last_seen', 'open')
+
+    def __init__(self, incident_id: int, key: Tuple[str, str], alert: dict, now: float):
+        self.id = incident_id
+        self.key = key
+        self.type = alert.get('type', 'info')
+        self.title = alert.get('title', '')
+        self.message = alert.get('message', '')
+        self.count = 1
+        self.first_seen = now
+        self.last_seen = now
+        self.open = True
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'type': self.type,
+            'title': self.title,
+            'message': self.message,
+            'count': self.count,
+            'first_seen': datetime.fromtimestamp(self.first_seen).strftime("%Y-%m-%d %H:%M:%S"),
+            'last_seen': datetime.fromtimestamp(self.last_seen).strftime("%Y-%m-%d %H:%M:%S"),
+            'open': self.open
+        }
+
+
+class AlertStore:
+    """Almacén circular de incidentes con memoria acotada e índices por tipo y tiempo
+
+    Los incidentes se numeran de forma creciente y ocupan la posición
+    id % capacity, así que los más antiguos se sobrescriben solos. Como los
+    ids crecen con first_seen, la búsqueda por tiempo es una búsqueda binaria.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = max(1, int(capacity))
+        self._lock = threading.Lock()
+        self._ring: List[Optional[Incident]] = [None] * self.capacity
+        self._next_id = 0
+        self._open: Dict[Tuple[str, str], int] = {}
+        self._by_type: Dict[str, Deque[int]] = {}
+
+    @property
+    def _oldest_id(self) -> int:
+        return max(0, self._next_id - self.capacity)
+
+    def __len__(self) -> int:
+        return self._next_id - self._oldest_id
+
+    def _get(self, incident_id: int) -> Optional[Incident]:
+        if self._oldest_id <= incident_id < self._next_id:
+            return self._ring[incident_id % self.capacity]
+        return None
+
+    def _append(self, key: Tuple[str, str], alert: dict, now: float) -> Incident:
+        incident = Incident(self._next_id, key, alert, now)
+        evicted = self._ring[incident.id % self.capacity]
+        if evicted is not None and self._open.get(evicted.key) == evicted.id:
+            del self._open[evicted.key]
+        self._ring[incident.id % self.capacity] = incident
+        self._next_id += 1
+
+        ids = self._by_type.setdefault(incident.type, deque())
+        ids.append(incident.id)
+        while ids and ids[0] < self._oldest_id:
+            ids.popleft()
+        return incident
+
+    def record(self, alerts: List[dict], now: Optional[float] = None) -> List[Incident]:
+        """Registra las alertas de un tick; las que no se repiten cierran su incidente
+
+        Devuelve los incidentes abiertos en este tick (no las repeticiones).
+        """
+        now = time.time() if now is None else now
+        opened = []
+        with self._lock:
+            seen = set()
+            for alert in alerts:
+                key = (alert.get('type', 'info'), alert.get('title', ''))
+                seen.add(key)
+                incident = self._get(self._open.get(key, -1))
+                if incident is not None and incident.open:
+                    incident.count += 1
+                    incident.last_seen = now
+                    incident.message = alert.get('message', incident.message)
+                else:
+                    incident = self._append(key, alert, now)
+                    self._open[key] = incident.id
+                    opened.append(incident)
+
+            for key in [key for key in self._open if key not in seen]:
+                incident = self._get(self._open.pop(key))
+                if incident is not None:
+                    incident.open = False
+        return opened
+
+    def _first_id_after(self, timestamp: float) -> int:
+        """Primer id cuyo first_seen es >= timestamp (búsqueda binaria sobre el anillo)"""
+        low, high = self._oldest_id, self._next_id
+        while low < high:
+            middle = (low + high) // 2
+            if self._ring[middle % self.capacity].first_seen < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def query(self, alert_type: Optional[str] = None, start: Optional[float] = None,
+              end: Optional[float] = None, page: int = 1, per_page: int = 50) -> dict:
+        """Devuelve una página de incidentes, del más reciente al más antiguo"""
+        page = max(1, page)
+        per_page = max(1, min(per_page, 500))
+        with self._lock:
+            if alert_type is not None:
+                ids = list(self._by_type.get(alert_type, ()))
+                ids = [i for i in ids if i >= self._oldest_id]
+            else:
+                ids = range(self._oldest_id, self._next_id)
+
+            # Incidentes que solapan [start, end]: empezaron antes de end y terminaron después de start
+            if end is not None:
+                limit = self._first_id_after(end + 1e-6)
+                ids = [i for i in ids if i < limit]
+            matches = [self._ring[i % self.capacity] for i in ids]
+            if start is not None:
+                matches = [incident for incident in matches if incident.last_seen >= start]
+
+            total = len(matches)
+            first = total - (page - 1) * per_page
+            selected = matches[max(0, first - per_page):max(0, first)]
+            return {
+                'total': total,
+                'page': page,
+                'per_page': per_page,
+                'alerts': [incident.to_dict() for incident in reversed(selected)]
+            }
@@ -1,19 +1,35 @@
 import eventlet
 eventlet.monkey_patch()
 
-from flask import Flask, render_template, jsonify, send_from_directory, request, redirect, url_for, flash
-from flask_socketio import SocketIO, emit
-from system_info import get_system_info, kill_process, get_system_model, get_os_info
+from flask import Flask, render_template, jsonify, send_from_directory, request, redirect, url_for, flash, Response, stream_with_context
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from system_info import kill_processes, process_table
+from collector import MetricsCollector, SnapshotSlot
+from stream_protocol import DeltaStream
+from metrics_store import MetricsStore
+from alert_store import AlertStore
+from alert_rules import AlertEngine, rules_from_config
+from config_store import ConfigCache
+from subscriptions import GROUP_KEYS, ON_DEMAND_COLLECTORS, SubscriptionRegistry, room_name, slice_snapshot
+from binary_frames import BINARY_GROUPS, FrameEncoder
 from apps_manager import AppsManager
+from jobs import JobCancelled, JobManager
+from folder_sizer import SizingCancelled
+from offload import Offloader
+from host_facts import HostFacts
+from log_pipeline import LogPipeline
+import logging
+from fleet import FleetRegistry, PayloadError, decode_payload, MAX_BODY_BYTES
+import metrics
 import time
-from threading import Thread
 import platform
-from datetime import datetime
 import os
 import socket
 import json
+import hmac
 import sys
 import atexit
+import threading
 import eventlet
 
 # --- Eventlet Patch (debe ir primero) ---
@@ -29,6 +45,11 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TEMPLATE_DIR = resource_path(os.path.join("backend", "templates"))
 STATIC_DIR = resource_path(os.path.join("backend", "static"))
 CONFIG_PATH = resource_path(os.path.join("backend", "config.json"))
+HISTORY_DIR = os.path.join(BASE_DIR, "history")
+FLEET_DIR = os.path.join(HISTORY_DIR, "fleet")
+APPS_CACHE_PATH = os.path.join(BASE_DIR, "apps_cache.json")
+HOST_FACTS_PATH = os.path.join(BASE_DIR, "host_facts.json")
+LOG_PATH = os.path.join(BASE_DIR, "system_monitor.log")
 
 # --- Flask App ---
 app = Flask(__name__, template_folder=TEMPLATE_DIR, static_folder=STATIC_DIR)
@@ -37,100 +58,206 @@ socketio = SocketIO(app, cors_allowed_origins="*", async_mode="eventlet")
 
 # --- Variables globales ---
 monitoring_active = False
-alert_history = []
-apps_manager = AppsManager()
+offloader = Offloader()
+apps_manager = AppsManager(cache_path=APPS_CACHE_PATH, offloader=offloader)
+host_facts = HostFacts(HOST_FACTS_PATH)
+snapshot_slot = SnapshotSlot()
+subscriptions = SubscriptionRegistry()
+group_streams = {group: DeltaStream() for group in GROUP_KEYS}
+frame_encoder = FrameEncoder()
+job_manager = JobManager()
+job_updates_task = None
+# Segundos entre envíos de los cambios de los trabajos a los clientes
+JOB_UPDATES_INTERVAL = 0.2
 
 # --- Carga y guarda configuración ---
+DEFAULT_CONFIG = {
+    "intervalo": 5,
+    "cpu_threshold": 80,
+    "ram_threshold": 75,
+    "notificaciones": "on",
+    "tema": "light",
+    "twofa": "off",
+    "top_procesos": 10,
+    "periodos": {},
+    "historial": {},
+    "capacidad_alertas": 1000,
+    "flota": {},
+    "registro": {}
+}
+config_cache = ConfigCache(CONFIG_PATH, DEFAULT_CONFIG)
+
 def cargar_config():
-    if os.path.exists(CONFIG_PATH):
-        try:
-            with open(CONFIG_PATH, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            print("⚠️ Configuración inválida. Usando valores por defecto.")
-    return {
-        "intervalo": 5,
-        "cpu_threshold": 80,
-        "ram_threshold": 75,
-        "notificaciones": "on",
-        "tema": "light",
-        "twofa": "off"
-    }
+    return config_cache.get()
 
 def guardar_config(data):
-    with open(CONFIG_PATH, 'w') as f:
-        json.dump(data, f, indent=4)
+    config_cache.save(data)
+
+# --- Logging: ruta absoluta, escritura por lotes en un hilo nativo ---
+log_pipeline = LogPipeline(LOG_PATH)
+log_pipeline.start(cargar_config().get('registro', {}))
+atexit.register(log_pipeline.stop)
+logger = logging.getLogger('App')
+
+# --- Historial y colector ---
+history_store = MetricsStore(HISTORY_DIR, retention=cargar_config().get('historial', {}).get('retencion'))
+collector = MetricsCollector(snapshot_slot, store=history_store, offloader=offloader)
+atexit.register(history_store.flush)
+fleet_registry = FleetRegistry(FLEET_DIR, stale_after=cargar_config().get('flota', {}).get('desconectado_tras', 60),
+                               max_hosts=cargar_config().get('flota', {}).get('hosts_maximos', 256))
+atexit.register(fleet_registry.flush)
+# Contrapresión: envíos de agentes procesados a la vez; el resto recibe 503 con Retry-After
+ingest_slots = threading.BoundedSemaphore(cargar_config().get('flota', {}).get('envios_simultaneos', 8))
+alert_store = AlertStore(cargar_config().get('capacidad_alertas', 1000))
+alert_engine = AlertEngine(rules_from_config(cargar_config()))
+
+def aplicar_config(config):
+    """Aplica en caliente la configuración nueva al colector y al motor de alertas"""
+    collector.configure(top_n=config.get('top_procesos', 10), periods=config.get('periodos', {}))
+    alert_engine.update_rules(rules_from_config(config))
+    update_paused_collectors()
+    log_pipeline.configure(config.get('registro', {}))
+    logger.info("Configuración actualizada")
+
+config_cache.subscribe(aplicar_config)
+
+def update_paused_collectors():
+    """Pausa los recolectores bajo demanda que no necesitan ni los clientes ni las reglas de alerta"""
+    required = ['processes'] if alert_engine.uses_processes else []
+    collector.set_paused(subscriptions.paused_collectors(required))
+
+def request_on_demand_collectors():
+    """Para REST y /metrics: reanuda un rato los recolectores en pausa y espera a tener sus datos"""
+    collector.request(name for names in ON_DEMAND_COLLECTORS.values() for name in names)
 
 # --- Funciones del sistema ---
-def get_architecture():
-    return platform.machine()
-
-def get_system_version():
-    return platform.version()
-
 def get_detected_os():
     return platform.system()
 
-def monitor_system():
+host_facts_task = None
+
+def get_host_facts():
+    """Datos fijos del equipo; la detección se lanza una sola vez y el resto de peticiones la esperan"""
+    global host_facts_task
+    if host_facts.ready:
+        return host_facts.get()
+    if host_facts_task is None:
+        host_facts_task = eventlet.spawn(offloader.run, host_facts.get, timeout=None)
+    task = host_facts_task
+    try:
+        return task.wait()
+    except Exception:
+        # Si la detección falló, la siguiente petición vuelve a intentarlo
+        if host_facts_task is task:
+            host_facts_task = None
+        raise
+
+def warm_up():
+    """Prepara tras el arranque lo que necesita la primera página, sin retrasar la escucha del puerto"""
+    try:
+        get_host_facts()
+        apps_manager.get_installed_apps()
+        logger.info("Datos del equipo e inventario de apps listos")
+    except Exception as e:
+        logger.error(f"warm_up: {e}", exc_info=True)
+
+def start_monitoring():
+    """Arranca el colector y el difusor una sola vez, sin importar cuántos clientes haya"""
     global monitoring_active
+    if monitoring_active:
+        return
+    monitoring_active = True
     config = cargar_config()
+    collector.configure(top_n=config.get('top_procesos', 10), periods=config.get('periodos', {}))
+    update_paused_collectors()
+    collector.start()
+    config_cache.start_watching()
+    socketio.start_background_task(monitor_system)
+
+def emit_rates(config):
+    """Segundos entre envíos de cada grupo: 'frecuencias_emision' o, si no, 'intervalo'"""
+    default = max(1, config.get('intervalo', 5))
+    overrides = config.get('frecuencias_emision', {})
+    return {group: max(0.5, float(overrides.get(group, default))) for group in GROUP_KEYS}
+
+# Medir el tamaño de un parche JSON obliga a serializarlo otra vez: solo se mide 1 de cada N
+PAYLOAD_SAMPLE_EVERY = 20
+patch_counts = {}
+
+def emit_group_patch(group, system_data):
+    """Envía a la sala del grupo el parche de su parte del snapshot"""
+    start = time.perf_counter()
+    patch = group_streams[group].update(slice_snapshot(system_data, group))
+    if patch is not None:
+        message = {'group': group, **patch}
+        socketio.emit('group_patch', message, to=room_name(group))
+        metrics.EMIT_DURATION.observe(time.perf_counter() - start, group=group, encoding='json')
+        metrics.EMITTED.inc(group=group, encoding='json')
+        patch_counts[group] = patch_counts.get(group, 0) + 1
+        if patch_counts[group] % PAYLOAD_SAMPLE_EVERY == 1:
+            metrics.EMIT_PAYLOAD.observe(len(json.dumps(message)), group=group, encoding='json')
+
+def emit_group_frame(group, system_data):
+    """Envía a los clientes binarios del grupo su trama (y el esquema si cambió)"""
+    start = time.perf_counter()
+    schema, frame = frame_encoder.encode(group, slice_snapshot(system_data, group))
+    if schema is not None:
+        socketio.emit('frame_schema', schema, to=room_name(group, binary=True))
+    socketio.emit('group_frame', frame, to=room_name(group, binary=True))
+    metrics.EMIT_DURATION.observe(time.perf_counter() - start, group=group, encoding='binary')
+    metrics.EMITTED.inc(group=group, encoding='binary')
+    metrics.EMIT_PAYLOAD.observe(len(frame), group=group, encoding='binary')
+
+def emit_group(group, system_data):
+    """Envía el grupo en cada codificación que tenga suscriptores"""
+    if subscriptions.count(group, binary=False):
+        emit_group_patch(group, system_data)
+    if group in BINARY_GROUPS and subscriptions.count(group, binary=True):
+        emit_group_frame(group, system_data)
 
-    print("[INFO] Iniciando monitoreo del sistema...")
+def monitor_system():
+    """Difunde a cada sala los cambios de su grupo a su propio ritmo y evalúa las alertas"""
+    last_version = 0
+    last_emit = {}
+    last_alert_check = 0.0
+
+    logger.info("Iniciando monitoreo del sistema...")
 
     while monitoring_active:
         try:
-            system_data = get_system_info()
-            system_data['hostname'] = socket.gethostname()
-            system_data['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            system_data['detected_os'] = get_detected_os()
-
-            socketio.emit('system_update', system_data)
-            check_for_alerts(system_data, config)
-
-            intervalo = config.get('intervalo', 5)
-            time.sleep(max(1, intervalo))
+            # La configuración se lee de memoria en cada vuelta, así los cambios se aplican sin reiniciar
+            config = cargar_config()
+            version, system_data = snapshot_slot.read()
+            if system_data is not None and version != last_version:
+                if last_version and version > last_version + 1:
+                    # El colector publicó snapshots que el difusor no llegó a ver (va con retraso)
+                    metrics.DROPPED_SNAPSHOTS.inc(version - last_version - 1)
+                last_version = version
+                now = time.monotonic()
+                rates = emit_rates(config)
+                for group in subscriptions.active_groups():
+                    if GROUP_KEYS[group] and now - last_emit.get(group, 0.0) >= rates[group]:
+                        last_emit[group] = now
+                        emit_group(group, system_data)
+                if now - last_alert_check >= max(1, config.get('intervalo', 5)):
+                    last_alert_check = now
+                    check_for_alerts(system_data, config)
+            socketio.sleep(0.5)
         except Exception as e:
-            print(f"[ERROR] monitor_system: {e}")
-            time.sleep(5)
+            metrics.MONITOR_ERRORS.inc()
+            logger.error(f"monitor_system: {e}", exc_info=True)
+            socketio.sleep(5)
 
 def check_for_alerts(system_data, config):
-    alerts = []
-
-    if system_data['cpu']['percent'] > config['cpu_threshold']:
-        alerts.append({
-            'type': 'danger',
-            'title': 'Alerta de CPU',
-            'message': f"Uso de CPU al {system_data['cpu']['percent']}% (Umbral: {config['cpu_threshold']}%)",
-            'timestamp': datetime.now().strftime("%H:%M:%S")
-        })
-
-    if system_data['memory']['percent'] > config['ram_threshold']:
-        alerts.append({
-            'type': 'danger',
-            'title': 'Alerta de Memoria',
-            'message': f"Uso de RAM al {system_data['memory']['percent']}% (Umbral: {config['ram_threshold']}%)",
-            'timestamp': datetime.now().strftime("%H:%M:%S")
-        })
+    """Evalúa las reglas de alerta; solo se notifican las alertas que acaban de dispararse"""
+    with metrics.ALERT_EVALUATION.time():
+        fired, active = alert_engine.evaluate(system_data, processes=process_table())
 
-    if system_data['disk']['percent'] > 95:
-        alerts.append({
-            'type': 'warning',
-            'title': 'Alerta de Disco',
-            'message': f"Espacio en disco al {system_data['disk']['percent']}%",
-            'timestamp': datetime.now().strftime("%H:%M:%S")
-        })
-
-    if 'temperature' in system_data['cpu'] and system_data['cpu']['temperature'] > 85:
-        alerts.append({
-            'type': 'warning',
-            'title': 'Alerta de Temperatura',
-            'message': f"Temperatura CPU: {system_data['cpu']['temperature']} °C",
-            'timestamp': datetime.now().strftime("%H:%M:%S")
-        })
+    # Las alertas activas se agrupan en su incidente abierto; al limpiarse lo cierran
+    alert_store.record(active)
 
-    if alerts and config.get('notificaciones', 'on') == 'on':
-        alert_history.extend(alerts)
-        socketio.emit('new_alerts', alerts[-3:])
+    if fired and config.get('notificaciones', 'on') == 'on':
+        socketio.emit('new_alerts', fired[-3:], to='alerts')
 
 # --- Rutas ---
 @app.route('/')
@@ -139,11 +266,12 @@ def menu():
 
 @app.route('/index.html')
 def index():
+    facts = get_host_facts()
     return render_template('index.html',
-                           system_model=get_system_model(),
-                           os_info=get_os_info(),
-                           architecture=get_architecture(),
-                           version=get_system_version(),
+                           system_model=facts['model'],
+                           os_info=facts['os_info'],
+                           architecture=facts['architecture'],
+                           version=facts['kernel_version'],
                            detected_os=get_detected_os())
 
 @app.route('/apps_page')
@@ -152,21 +280,129 @@ def apps_page():
         apps = apps_manager.get_installed_apps()
         return render_template('apps.html', apps=apps)
     except Exception as e:
-        print(f"[ERROR] apps_page: {e}")
+        logger.error(f"apps_page: {e}", exc_info=True)
         return render_template('apps.html', apps=[])
+
+@app.route('/apps')
+def apps_list():
+    try:
+        apps = apps_manager.get_installed_apps(refresh=request.args.get('refresh') == '1')
+        total = len(apps)
+        if request.args.get('page'):
+            page = max(1, int(request.args.get('page', 1)))
+            per_page = max(1, int(request.args.get('per_page', 100)))
+            apps = apps[(page - 1) * per_page:page * per_page]
+        return jsonify({"success": True, "apps": apps, "total": total, "refreshing": apps_manager.refreshing})
+    except Exception as e:
+        logger.error(f"apps_list: {e}", exc_info=True)
+        return jsonify({"success": False, "message": str(e)}), 500
+
+def job_room(job_id):
+    """Sala de Socket.IO de un trabajo: solo la siguen los clientes que lo pidieron ('follow_job')"""
+    return f"job:{job_id}"
+
+def relay_job_updates():
+    """Emite los cambios de los trabajos: se ejecutan en hilos nativos, que no pueden usar Socket.IO"""
+    while True:
+        for data in job_manager.pending_updates():
+            socketio.emit('job_update', data, to=job_room(data['id']))
+        socketio.sleep(JOB_UPDATES_INTERVAL)
+
+def submit_job(kind, target, fn, lock_key=None):
+    global job_updates_task
+    if job_updates_task is None:
+        job_updates_task = socketio.start_background_task(relay_job_updates)
+    return job_manager.submit(kind, target, fn, lock_key=lock_key)
+
+def job_accepted(job, message):
+    return jsonify({"success": True, "job_id": job.id, "message": message}), 202
+
+@app.route('/uninstall_app/<path:app_name>', methods=['POST'])
+def uninstall_app(app_name):
+    job = submit_job(
+        'uninstall', app_name,
+        lambda job: apps_manager.uninstall_app(app_name, on_output=job.log),
+        lock_key=apps_manager.package_manager
+    )
+    return job_accepted(job, f"Desinstalación de {app_name} en curso")
+
+@app.route('/api/clean_cache/<path:app_name>', methods=['POST'])
+def clean_cache(app_name):
+    job = submit_job('clean_cache', app_name, lambda job: apps_manager.clean_app_cache(app_name),
+                     lock_key='temp')
+    return job_accepted(job, f"Limpieza de caché de {app_name} en curso")
+
+@app.route('/api/clean_cache', methods=['POST'])
+def clean_cache_batch():
+    data = request.get_json(silent=True) or {}
+    app_names = data.get('apps') or []
+    if not isinstance(app_names, list) or not app_names:
+        return jsonify({"success": False, "message": "Se esperaba una lista 'apps'"}), 400
+    app_names = [str(name) for name in app_names]
+    job = submit_job('clean_cache', ', '.join(app_names), lambda job: apps_manager.clean_apps_cache(app_names),
+                     lock_key='temp')
+    return job_accepted(job, f"Limpieza de caché de {len(app_names)} apps en curso")
+
+@app.route('/api/folder_size', methods=['POST'])
+def folder_size():
+    data = request.get_json(silent=True) or {}
+    path = data.get('path')
+    if not path or not os.path.isdir(path):
+        return jsonify({"success": False, "message": "Ruta de carpeta inválida"}), 400
+
+    def run(job):
+        def progress(dirs_done, total, current):
+            # Job agrupa las notificaciones: no se envía un job_update por carpeta
+            job.set_progress(dirs_done)
+        try:
+            size = apps_manager.folder_size(path, progress=progress, cancel=job.cancel_event)
+        except SizingCancelled as e:
+            raise JobCancelled(str(e)) from e
+        return {"success": True, "message": f"{size // 1024} KB", "bytes": size}
+
+    job = submit_job('folder_size', path, run)
+    return job_accepted(job, f"Calculando tamaño de {path}")
+
+@app.route('/api/jobs')
+def jobs_list():
+    return jsonify({"success": True, "jobs": [job.to_dict(include_output=False) for job in job_manager.list()]})
+
+@app.route('/api/jobs/<job_id>', methods=['GET', 'DELETE'])
+def job_detail(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "Trabajo no encontrado"}), 404
+    if request.method == 'DELETE':
+        cancelled = job_manager.cancel(job_id)
+        message = "Cancelación solicitada" if cancelled else "El trabajo ya terminó"
+        return jsonify({"success": cancelled, "message": message})
+    return jsonify({"success": True, "job": job.to_dict()})
+
+@app.route('/apps/stream')
+def apps_stream():
+    """Inventario en NDJSON: una app por línea, enviada en cuanto se obtiene"""
+    def generate():
+        try:
+            for installed_app in apps_manager.iter_installed_apps():
+                yield json.dumps(installed_app) + "\n"
+        except Exception as e:
+            logger.error(f"apps_stream: {e}", exc_info=True)
+            yield json.dumps({"error": str(e)}) + "\n"
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
     
 
 @app.route('/configuracion', methods=['GET', 'POST'])
 def configuracion():
     if request.method == 'POST':
-        nueva_config = {
+        nueva_config = cargar_config()
+        nueva_config.update({
             "intervalo": int(request.form.get('intervalo', 5)),
             "cpu_threshold": int(request.form.get('cpu_threshold', 80)),
             "ram_threshold": int(request.form.get('ram_threshold', 75)),
             "notificaciones": request.form.get('notificaciones', 'off'),
             "tema": request.form.get('tema', 'light'),
             "twofa": request.form.get('twofa', 'off')
-        }
+        })
         guardar_config(nueva_config)
         flash("Configuración guardada con éxito.", "success")
         return redirect(url_for('configuracion'))
@@ -176,25 +412,262 @@ def configuracion():
 
 @app.route('/api/system-info')
 def system_info():
-    return jsonify({
-        'model': get_system_model(),
+    start_monitoring()
+    request_on_demand_collectors()
+    version, system_data = snapshot_slot.read()
+    facts = get_host_facts()
+    response = {
+        'model': facts['model'],
         'hostname': socket.gethostname(),
-        'os': get_os_info(),
-        'architecture': platform.machine(),
-        'version': get_system_version(),
-        'detected_os': get_detected_os()
-    })
+        'os': facts['os_info'],
+        'architecture': facts['architecture'],
+        'version': facts['kernel_version'],
+        'detected_os': get_detected_os(),
+        'cpu_info': facts['cpu']
+    }
+    if system_data is not None:
+        response.update(system_data)
+    response['snapshot_version'] = version
+    return jsonify(response)
+
+def query_history(store):
+    """Consulta el historial de un MetricsStore con los parámetros metric/from/to/step de la petición"""
+    metric = request.args.get('metric', 'cpu.percent')
+    try:
+        end = float(request.args.get('to', time.time()))
+        start = float(request.args.get('from', end - 3600))
+        step = int(request.args['step']) if request.args.get('step') else None
+    except ValueError:
+        return jsonify({"success": False, "message": "Parámetros from/to/step inválidos"}), 400
+    if step is not None and step <= 0:
+        return jsonify({"success": False, "message": "El parámetro step debe ser positivo"}), 400
+    try:
+        result = store.query(metric, start, end, step)
+    except KeyError:
+        return jsonify({"success": False, "message": f"Métrica desconocida: {metric}"}), 404
+    return jsonify({"success": True, **result})
+
+@app.route('/api/history')
+def history():
+    return query_history(history_store)
+
+# --- Modo agregador: métricas enviadas por agentes remotos (agent.py) ---
+@app.route('/api/agent/ingest', methods=['POST'])
+def agent_ingest():
+    token = cargar_config().get('flota', {}).get('token')
+    if not token:
+        # Sin token cualquiera podría dar de alta hosts sin límite: la ingesta queda desactivada
+        return jsonify({"success": False, "message": "Ingesta desactivada: define flota.token en la configuración"}), 403
+    if not hmac.compare_digest(request.headers.get('X-Agent-Token', ''), str(token)):
+        return jsonify({"success": False, "message": "Token de agente inválido"}), 401
+    if request.content_length is None or request.content_length > MAX_BODY_BYTES:
+        return jsonify({"success": False, "message": "Envío demasiado grande"}), 413
+    if not ingest_slots.acquire(blocking=False):
+        response = jsonify({"success": False, "message": "Agregador ocupado"})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    try:
+        payload = decode_payload(request.get_data(), request.headers.get('Content-Encoding'))
+        accepted = fleet_registry.ingest(payload)
+    except PayloadError as e:
+        return jsonify({"success": False, "message": str(e)}), e.status
+    except OSError as e:
+        # Disco lleno o sin descriptores libres: el agente conserva el lote y lo reintenta
+        logger.error(f"agent_ingest: {e}")
+        response = jsonify({"success": False, "message": "No se pudo guardar el historial del host"})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    finally:
+        ingest_slots.release()
+    return jsonify({"success": True, "accepted": accepted})
+
+@app.route('/fleet')
+def fleet_page():
+    return render_template('fleet.html')
+
+@app.route('/api/fleet')
+def fleet_list():
+    return jsonify({"success": True, "hosts": fleet_registry.hosts()})
+
+@app.route('/api/fleet/<hostname>')
+def fleet_host(hostname):
+    host = fleet_registry.get(hostname)
+    if host is None:
+        return jsonify({"success": False, "message": "Host desconocido"}), 404
+    return jsonify({"success": True, "host": host.summary(time.time(), fleet_registry.stale_after),
+                    "snapshot": host.latest})
+
+@app.route('/api/fleet/<hostname>/history')
+def fleet_history(hostname):
+    host = fleet_registry.get(hostname)
+    if host is None:
+        return jsonify({"success": False, "message": "Host desconocido"}), 404
+    return query_history(host.store)
+
+# --- Métricas del propio monitor y del host en formato Prometheus ---
+metrics.REGISTRY.add_collector(lambda: metrics.snapshot_metrics(snapshot_slot.read()[1]))
+metrics.REGISTRY.add_collector(lambda: [metrics.Gauge(
+    'atlayos_group_subscribers', 'Clientes suscritos a cada grupo', ('group', 'encoding'),
+    callback=lambda: {(group, encoding): subscriptions.count(group, binary=encoding == 'binary')
+                      for group in GROUP_KEYS for encoding in ('json', 'binary')})])
+
+@app.route('/metrics')
+def prometheus_metrics():
+    start_monitoring()
+    request_on_demand_collectors()
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/api/alerts')
+def alerts():
+    try:
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', 50))
+        start = float(request.args['from']) if request.args.get('from') else None
+        end = float(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({"success": False, "message": "Parámetros de paginación inválidos"}), 400
+    result = alert_store.query(request.args.get('type'), start, end, page, per_page)
+    return jsonify({"success": True, **result})
+
+def kill_from_request(data):
+    """Traduce {pid} o {pids, patterns, tree, timeout, force, confirm} a una llamada a kill_processes
+
+    Se ejecuta en un hilo nativo: con force espera a que los procesos terminen.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Solicitud inválida")
+    pids = [int(pid) for pid in data.get('pids') or []]
+    if data.get('pid') is not None:
+        pids.append(int(data['pid']))
+    patterns = [str(pattern) for pattern in data.get('patterns') or []]
+    tree_root = int(data['tree']) if data.get('tree') is not None else None
+    if not pids and not patterns and tree_root is None:
+        raise ValueError("Indica 'pid', 'pids', 'patterns' o 'tree'")
+    # El timeout de kill_processes va por posición: el keyword timeout es el del Offloader
+    return offloader.run(kill_processes, pids, patterns, tree_root, float(data.get('timeout', 3.0)),
+                         force=bool(data.get('force', False)), confirm=bool(data.get('confirm', False)),
+                         timeout=None)
+
+@app.route('/api/processes/kill', methods=['POST'])
+def kill_processes_route():
+    try:
+        return jsonify(kill_from_request(request.get_json(silent=True)))
+    except (TypeError, ValueError) as e:
+        return jsonify({"success": False, "message": str(e), "results": []}), 400
+
+# --- Eventos Socket.IO ---
+@socketio.on('start_monitoring')
+def handle_start_monitoring():
+    start_monitoring()
+
+def send_group_snapshot(group):
+    """Estado completo de un grupo para un cliente nuevo o desincronizado"""
+    _, system_data = snapshot_slot.read()
+    if subscriptions.uses_binary(request.sid, group):
+        if system_data is None:
+            return
+        schema, frame = frame_encoder.encode(group, slice_snapshot(system_data, group), advance=False)
+        if schema is not None:
+            socketio.emit('frame_schema', schema, to=room_name(group, binary=True))
+        else:
+            emit('frame_schema', frame_encoder.schema(group))
+        emit('group_frame', frame)
+        return
+    if system_data is not None:
+        # Se actualiza primero el flujo para que el snapshot y los parches siguientes encajen
+        emit_group_patch(group, system_data)
+    emit('group_snapshot', {'group': group, **group_streams[group].full()})
+
+def groups_from(data):
+    groups = data.get('groups') if isinstance(data, dict) else None
+    return [group for group in groups or [] if group in GROUP_KEYS]
+
+def switch_encoding(binary, requested):
+    """Cambia el cliente de sala en los grupos ya suscritos cuya codificación cambia"""
+    sid = request.sid
+    before = {group: subscriptions.uses_binary(sid, group) for group in subscriptions.groups_of(sid)}
+    subscriptions.set_binary(sid, binary)
+    for group, was_binary in before.items():
+        if subscriptions.uses_binary(sid, group) == was_binary:
+            continue
+        leave_room(room_name(group, was_binary))
+        join_room(room_name(group, not was_binary))
+        if GROUP_KEYS[group] and group not in requested:
+            # El cliente empieza de cero con la otra codificación
+            send_group_snapshot(group)
+
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    start_monitoring()
+    groups = groups_from(data)
+    if isinstance(data, dict) and 'binary' in data:
+        # Opcional: los grupos numéricos se reciben como tramas binarias con esquema fijo
+        switch_encoding(bool(data['binary']), groups)
+    subscriptions.subscribe(request.sid, groups)
+    update_paused_collectors()
+    for group in groups:
+        join_room(room_name(group, subscriptions.uses_binary(request.sid, group)))
+        if GROUP_KEYS[group]:
+            send_group_snapshot(group)
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(data):
+    for group in subscriptions.unsubscribe(request.sid, groups_from(data)):
+        leave_room(room_name(group, subscriptions.uses_binary(request.sid, group)))
+    update_paused_collectors()
+
+@socketio.on('connect')
+def handle_connect(*args):
+    metrics.CONNECTED_CLIENTS.inc()
+
+@socketio.on('disconnect')
+def handle_disconnect(*args):
+    metrics.CONNECTED_CLIENTS.dec()
+    subscriptions.drop(request.sid)
+    update_paused_collectors()
+
+@socketio.on('request_resync')
+def handle_request_resync(data=None):
+    # El cliente detectó un hueco en la secuencia (o una trama con un esquema que no conoce)
+    metrics.RESYNC_REQUESTS.inc()
+    groups = groups_from({'groups': [data.get('group')]} if isinstance(data, dict) else None)
+    for group in groups or subscriptions.groups_of(request.sid):
+        if GROUP_KEYS[group]:
+            send_group_snapshot(group)
+
+@socketio.on('follow_job')
+def handle_follow_job(data):
+    job = job_manager.get(data.get('id')) if isinstance(data, dict) else None
+    if job is None:
+        emit('job_update', {'id': data.get('id') if isinstance(data, dict) else None, 'status': 'unknown'})
+        return
+    join_room(job_room(job.id))
+    # Estado completo para no perder lo ocurrido antes de unirse a la sala
+    emit('job_update', job.to_dict())
+
+@socketio.on('kill_process')
+def handle_kill_process(data):
+    try:
+        result = kill_from_request(data)
+    except (TypeError, ValueError) as e:
+        result = {"success": False, "message": str(e), "results": []}
+    emit('process_killed', result)
 
 # Resto de rutas no se modifican...
 
 # --- Ejecutar la app ---
 if __name__ == '__main__':
     if not os.path.exists(TEMPLATE_DIR):
-        print(f"[ERROR] No se encontró la carpeta de plantillas en {TEMPLATE_DIR}")
+        logger.error(f"No se encontró la carpeta de plantillas en {TEMPLATE_DIR}")
         sys.exit(1)
     if not os.path.exists(STATIC_DIR):
-        print(f"[WARNING] No se encontró la carpeta static en {STATIC_DIR}")
+        logger.warning(f"No se encontró la carpeta static en {STATIC_DIR}")
 
     debug_mode = not hasattr(sys, 'frozen')  # False si está empaquetado
 
-    socketio.run(app, host='0.0.0.0', port=5000, allow_unsafe_werkzeug=True)
+    # Se ejecuta en cuanto el servidor arranca; las peticiones que lleguen antes esperan a que termine
+    socketio.start_background_task(warm_up)
+
+    # Las peticiones se registran en el logger 'access' (muestreado según registro.muestreo_peticiones)
+    socketio.run(app, host='0.0.0.0', port=5000, allow_unsafe_werkzeug=True,
+                 log_output=True, log=logging.getLogger('access'))
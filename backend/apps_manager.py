@@ -2,84 +2,335 @@ import os
 import platform
 import subprocess
 from datetime import datetime
-import psutil
 import json
 import shutil
-from typing import List, Dict, Union, Optional
+import tempfile
+import threading
+import logging
+from typing import Callable, Iterator, List, Dict, Tuple, Union, Optional
+from folder_sizer import FolderSizer, SizingCancelled
+from offload import Offloader
+from temp_index import TempFileIndex, delete_files
 
 if platform.system() == "Windows":
     import winreg
 else:
     winreg = None
 
-class AppsManager:
+logger = logging.getLogger('AppsManager')
+
+# Segundos máximos por tramo del inventario o por limpieza de caché
+SCAN_TIMEOUT = 120.0
+DPKG_STATUS_PATH = "/var/lib/dpkg/status"
+DPKG_INFO_PATH = "/var/lib/dpkg/info"
+DPKG_ENTRY_PREFIX = "dpkg:"
+# Paquetes por llamada a dpkg-query al re-consultar solo los modificados
+DPKG_QUERY_BATCH = 200
+MACOS_APPS_PATH = "/Applications"
+WINDOWS_UNINSTALL_PATHS = [
+    r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall",
+    r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall"
+]
+
+class InventoryScan:
+    """Escaneo del inventario en curso; varios consumidores pueden seguirlo a la vez
+
+    Lo ejecuta un único hilo (add/finish) y cada consumidor recibe con
+    follow() las apps ya encontradas y después las nuevas según llegan.
+    """
+
     def __init__(self):
+        self.apps: List[Dict[str, Union[str, int]]] = []
+        self.finished = False
+        self.error: Optional[Exception] = None
+        self._changed = threading.Condition()
+
+    def add(self, app: Dict[str, Union[str, int]]) -> None:
+        with self._changed:
+            self.apps.append(app)
+            self._changed.notify_all()
+
+    def finish(self, error: Optional[Exception] = None) -> None:
+        with self._changed:
+            self.finished = True
+            self.error = error
+            self._changed.notify_all()
+
+    def follow(self) -> Iterator[Dict[str, Union[str, int]]]:
+        index = 0
+        while True:
+            with self._changed:
+                while index >= len(self.apps) and not self.finished:
+                    self._changed.wait()
+                batch = self.apps[index:]
+                done = self.finished and index + len(batch) >= len(self.apps)
+            index += len(batch)
+            yield from batch
+            if done:
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class AppsManager:
+    def __init__(self, cache_path: Optional[str] = None, offloader: Optional[Offloader] = None):
         self.system = platform.system()
+        self.cache_path = cache_path
+        # Registro, dpkg y escaneos de disco bloquean: se ejecutan en hilos nativos
+        self._offloader = offloader or Offloader()
+        self._lock = threading.Lock()
+        self._apps: Optional[List[Dict[str, Union[str, int]]]] = None
+        self._signature = None
+        # Entradas ya analizadas: clave -> (marca de cambio, app); permite re-escanear solo lo modificado
+        self._entries: Dict[str, Tuple[Union[int, float], Dict[str, Union[str, int]]]] = {}
+        self._scan: Optional[InventoryScan] = None
+        self._sizer = FolderSizer()
+        self._temp_files: Optional[TempFileIndex] = None
+        # La caché en disco puede ocupar megas: se lee en el primer uso, no al importar la app
+        self._cache_loaded = False
+
+    @property
+    def refreshing(self) -> bool:
+        return self._scan is not None and not self._scan.finished
+
+    def get_installed_apps(self, refresh: bool = False) -> List[Dict[str, Union[str, int]]]:
+        """Devuelve el inventario en caché; si cambió en disco se actualiza en segundo plano"""
+        self._ensure_cache()
+        if self._apps is None:
+            # Sin caché previa: el primer inventario se hace en primer plano
+            self.refresh_inventory()
+        elif refresh or self._inventory_signature() != self._signature:
+            self.refresh_in_background()
+        return self._apps or []
 
-    def get_installed_apps(self) -> List[Dict[str, Union[str, int]]]:
-        apps = []
+    def refresh_in_background(self) -> None:
+        self._start_scan()
+
+    def refresh_inventory(self) -> List[Dict[str, Union[str, int]]]:
+        """Vuelve a escanear el inventario reutilizando las entradas que no cambiaron"""
+        for _ in self._start_scan().follow():
+            pass
+        return self._apps or []
+
+    def iter_installed_apps(self) -> Iterator[Dict[str, Union[str, int]]]:
+        """Produce las apps una a una: desde la caché si está al día o a medida que avanza el escaneo"""
+        self._ensure_cache()
+        if self._apps is not None and self._inventory_signature() == self._signature:
+            yield from list(self._apps)
+            return
+        yield from self._start_scan().follow()
+
+    def _start_scan(self) -> InventoryScan:
+        """Escaneo en curso o uno nuevo: nunca hay dos a la vez modificando las entradas y la caché"""
+        with self._lock:
+            if self._scan is None or self._scan.finished:
+                self._scan = InventoryScan()
+                # Lo ejecuta un hilo propio: si el cliente que lo pidió se desconecta, el resto sigue recibiendo apps
+                threading.Thread(target=self._run_scan, args=(self._scan,), name='apps-inventory', daemon=True).start()
+            return self._scan
+
+    def _run_scan(self, scan: InventoryScan) -> None:
+        signature = self._inventory_signature()
+        try:
+            for app in self._offloader.iterate(self._iter_scan(), timeout=SCAN_TIMEOUT):
+                app['size_mb'] = app.get('size', 0) // (1024 * 1024)
+                scan.add(app)
+            self._apps = scan.apps
+            self._signature = signature
+            self._offloader.run(self._save_cache)
+        except Exception as e:
+            logger.error(f"Error al escanear el inventario de apps: {str(e)}", exc_info=True)
+            scan.finish(e)
+            return
+        scan.finish()
+
+    def _iter_scan(self) -> Iterator[Dict[str, Union[str, int]]]:
         if self.system == "Windows" and winreg:
-            apps = self._get_windows_apps()
-            apps += self._get_uwp_apps()
+            yield from self._iter_windows_apps()
+            yield from self._iter_uwp_apps()
         elif self.system == "Linux":
-            apps = self._get_linux_apps()
+            yield from self._iter_linux_apps()
         elif self.system == "Darwin":
-            apps = self._get_macos_apps()
-        for app in apps:
-            app['size_mb'] = app.get('size', 0) // (1024 * 1024)
-        return apps
+            yield from self._iter_macos_apps()
+
+    def _inventory_signature(self) -> Optional[Union[int, list]]:
+        """Marca que cambia cuando cambia el inventario del sistema"""
+        try:
+            if self.system == "Linux":
+                return os.stat(DPKG_STATUS_PATH).st_mtime_ns
+            if self.system == "Darwin":
+                return os.stat(MACOS_APPS_PATH).st_mtime_ns
+            if self.system == "Windows" and winreg:
+                stamps = []
+                for reg_path in WINDOWS_UNINSTALL_PATHS:
+                    try:
+                        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, reg_path) as key:
+                            stamps.append(winreg.QueryInfoKey(key)[2])
+                    except OSError:
+                        stamps.append(None)
+                return stamps
+        except OSError:
+            pass
+        return None
+
+    def _ensure_cache(self) -> None:
+        if not self._cache_loaded:
+            self._offloader.run(self._load_cache)
+            self._cache_loaded = True
+
+    def _load_cache(self) -> None:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r') as f:
+                data = json.load(f)
+            if data.get('system') != self.system:
+                return
+            self._apps = data.get('apps')
+            self._signature = data.get('signature')
+            self._entries = {key: (stamp, app) for key, (stamp, app) in data.get('entries', {}).items()}
+        except (OSError, ValueError, TypeError):
+            self._apps = None
+
+    def _save_cache(self) -> None:
+        if not self.cache_path:
+            return
+        tmp_path = None
+        try:
+            # Nombre único: dos procesos (o una escritura anterior colgada) nunca comparten el temporal
+            fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(self.cache_path)}.", suffix='.tmp',
+                                            dir=os.path.dirname(self.cache_path) or '.')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({
+                    'system': self.system,
+                    'signature': self._signature,
+                    'apps': self._apps,
+                    'entries': self._entries
+                }, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _cached_entry(self, key: str, stamp: Union[int, float]) -> Optional[Dict[str, Union[str, int]]]:
+        cached = self._entries.get(key)
+        if cached is not None and cached[0] == stamp:
+            return dict(cached[1])
+        return None
+
+    @property
+    def package_manager(self) -> str:
+        """Gestor de paquetes del sistema; las operaciones sobre el mismo gestor no deben solaparse"""
+        return {"Windows": "msi", "Linux": "apt", "Darwin": "applications"}.get(self.system, self.system)
 
-    def uninstall_app(self, app_name: str) -> dict:
+    def uninstall_app(self, app_name: str, on_output: Optional[Callable[[str], None]] = None) -> dict:
         if self.system == "Windows":
-            return self._uninstall_windows_app(app_name)
+            return self._uninstall_windows_app(app_name, on_output)
         elif self.system == "Linux":
-            return self._uninstall_linux_app(app_name)
+            return self._uninstall_linux_app(app_name, on_output)
         elif self.system == "Darwin":
             return self._uninstall_macos_app(app_name)
         return {"success": False, "message": "Sistema operativo no soportado para desinstalación."}
 
-    def clean_app_cache(self, app_name: str) -> dict:
-        try:
+    @staticmethod
+    def _run_streaming(cmd: List[str], on_output: Optional[Callable[[str], None]] = None) -> Tuple[int, List[str]]:
+        """Ejecuta un comando pasando cada línea de salida a on_output; devuelve (código, últimas líneas)"""
+        tail: List[str] = []
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              text=True, encoding="utf-8", errors="replace") as process:
+            for line in process.stdout:
+                line = line.rstrip("\r\n")
+                tail = (tail + [line])[-20:]
+                if on_output is not None:
+                    on_output(line)
+        return process.returncode, tail
+
+    def _temp_index(self) -> Optional[TempFileIndex]:
+        if self._temp_files is None:
             if self.system == "Windows":
                 temp_path = os.getenv('TEMP', '')
             elif self.system == "Linux" or self.system == "Darwin":
                 temp_path = "/tmp"
             else:
+                return None
+            self._temp_files = TempFileIndex([temp_path])
+        return self._temp_files
+
+    def clean_app_cache(self, app_name: str) -> dict:
+        result = self.clean_apps_cache([app_name])
+        if not result["success"]:
+            return result
+        app_result = result["results"].get(app_name, {"deleted": 0, "bytes_freed": 0})
+        return {
+            "success": True,
+            "message": f"{app_result['deleted']} archivos eliminados del caché de {app_name}",
+            "deleted": app_result["deleted"],
+            "bytes_freed": app_result["bytes_freed"]
+        }
+
+    def clean_apps_cache(self, app_names: List[str]) -> dict:
+        """Limpia la caché temporal de varias apps con una sola búsqueda en el índice"""
+        try:
+            return self._offloader.run(self._clean_apps_cache, app_names, timeout=SCAN_TIMEOUT, key='temp-clean')
+        except Exception as e:
+            return {"success": False, "message": str(e)}
+
+    def _clean_apps_cache(self, app_names: List[str]) -> dict:
+        try:
+            index = self._temp_index()
+            if index is None:
                 return {"success": False, "message": "Sistema no soportado"}
 
-            deleted_files = 0
-            for root, dirs, files in os.walk(temp_path):
-                for file in files:
-                    if app_name.lower() in file.lower():
-                        try:
-                            os.remove(os.path.join(root, file))
-                            deleted_files += 1
-                        except:
-                            continue
-            return {"success": True, "message": f"{deleted_files} archivos eliminados del caché de {app_name}"}
+            matches = index.search_many(app_names)
+            results = {}
+            claimed = set()
+            for app_name in app_names:
+                # Un fichero que coincide con varias apps solo se borra una vez
+                paths = [path for path in matches.get(app_name, []) if path not in claimed]
+                claimed.update(paths)
+                deleted, freed = delete_files(paths)
+                results[app_name] = {"deleted": deleted, "bytes_freed": freed}
+
+            total_deleted = sum(r["deleted"] for r in results.values())
+            total_freed = sum(r["bytes_freed"] for r in results.values())
+            if total_deleted:
+                index.refresh()
+            return {
+                "success": True,
+                "message": f"{total_deleted} archivos eliminados ({total_freed // 1024} KB liberados)",
+                "results": results,
+                "bytes_freed": total_freed
+            }
         except Exception as e:
             return {"success": False, "message": str(e)}
 
-    def _get_windows_apps(self) -> List[Dict[str, Union[str, int]]]:
+    def _iter_windows_apps(self) -> Iterator[Dict[str, Union[str, int]]]:
         if not winreg:
-            return []
-        apps = []
-        reg_paths = [
-            r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall",
-            r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall"
-        ]
-        for reg_path in reg_paths:
+            return
+        seen = set()
+        emitted = set()
+        for reg_path in WINDOWS_UNINSTALL_PATHS:
             try:
                 with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, reg_path) as key:
                     for i in range(winreg.QueryInfoKey(key)[0]):
                         subkey_name = winreg.EnumKey(key, i)
                         with winreg.OpenKey(key, subkey_name) as subkey:
-                            app = self._parse_windows_app(subkey)
-                            if app and app not in apps:
-                                apps.append(app)
+                            entry_key = f"{reg_path}\\{subkey_name}"
+                            # Solo se vuelve a leer la subclave si cambió su marca de tiempo
+                            stamp = winreg.QueryInfoKey(subkey)[2]
+                            app = self._cached_entry(entry_key, stamp)
+                            if app is None:
+                                app = self._parse_windows_app(subkey)
+                                if app:
+                                    self._entries[entry_key] = (stamp, dict(app))
+                            seen.add(entry_key)
+                        if app and (app['name'], app['version']) not in emitted:
+                            emitted.add((app['name'], app['version']))
+                            yield app
             except Exception:
                 continue
-        return apps
+        for entry_key in [k for k in self._entries if k.startswith("SOFTWARE\\") and k not in seen]:
+            del self._entries[entry_key]
 
     def _parse_windows_app(self, subkey) -> Optional[Dict[str, Union[str, int]]]:
         def safe_query(key, value, default=""):
@@ -103,93 +354,150 @@ class AppsManager:
             "system": "Windows"
         }
 
-    def _get_uwp_apps(self) -> List[Dict[str, Union[str, int]]]:
+    def _iter_uwp_apps(self) -> Iterator[Dict[str, Union[str, int]]]:
         if self.system != "Windows":
-            return []
-        apps = []
+            return
+        # Un objeto JSON comprimido por línea para poder procesarlos según llegan
+        cmd = [
+            "powershell",
+            "-Command",
+            "Get-AppxPackage | ForEach-Object { $_ | Select-Object Name, PackageFullName | ConvertTo-Json -Compress }"
+        ]
+        for line in self._iter_command_lines(cmd):
+            try:
+                app = json.loads(line)
+            except ValueError:
+                continue
+            yield {
+                "name": app.get("Name", "N/A"),
+                "version": app.get("PackageFullName", "N/A"),
+                "size": 0,
+                "install_date": "N/A",
+                "system": "Windows (UWP)"
+            }
+
+    @staticmethod
+    def _iter_command_lines(cmd: List[str]) -> Iterator[str]:
+        """Lee la salida de un comando línea a línea sin cargarla entera en memoria"""
         try:
-            cmd = [
-                "powershell",
-                "-Command",
-                "Get-AppxPackage | Select Name, PackageFullName | ConvertTo-Json"
-            ]
-            output = subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
-            uwp_list = json.loads(output)
-            if isinstance(uwp_list, dict):
-                uwp_list = [uwp_list]
-            for app in uwp_list:
-                apps.append({
-                    "name": app.get("Name", "N/A"),
-                    "version": app.get("PackageFullName", "N/A"),
-                    "size": 0,
-                    "install_date": "N/A",
-                    "system": "Windows (UWP)"
-                })
-        except Exception:
-            pass
-        return apps
+            with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                  text=True, encoding="utf-8", errors="replace") as process:
+                for line in process.stdout:
+                    line = line.rstrip("\r\n")
+                    if line:
+                        yield line
+        except OSError:
+            return
 
-    def _uninstall_windows_app(self, app_name: str) -> Dict[str, Union[bool, str]]:
+    def _uninstall_windows_app(self, app_name: str,
+                               on_output: Optional[Callable[[str], None]] = None) -> Dict[str, Union[bool, str]]:
         try:
             cmd = [
                 "powershell",
                 "-Command",
                 f"Get-WmiObject -Class Win32_Product | Where-Object {{$_.Name -eq \"{app_name}\"}} | ForEach-Object {{$_.Uninstall()}}"
             ]
-            subprocess.run(cmd, check=True)
+            returncode, tail = self._run_streaming(cmd, on_output)
+            if returncode != 0:
+                return {"success": False, "message": "\n".join(tail) or f"Código de salida {returncode}"}
             return {"success": True, "message": f"{app_name} desinstalado correctamente."}
         except Exception as e:
             return {"success": False, "message": str(e)}
 
-    def _get_linux_apps(self) -> List[Dict[str, Union[str, int]]]:
-        apps = []
+    def _iter_linux_apps(self) -> Iterator[Dict[str, Union[str, int]]]:
+        """Paquetes dpkg; solo se consultan los que cambiaron según el mtime de su lista de ficheros"""
+        stamps = self._dpkg_list_stamps()
+        if stamps is None:
+            # Sin acceso a /var/lib/dpkg/info no hay marcas: consulta completa sin caché
+            for _, entry in self._query_dpkg([]):
+                yield entry
+            return
+        pending = []
+        for package, stamp in stamps.items():
+            cached = self._cached_entry(DPKG_ENTRY_PREFIX + package, stamp)
+            if cached is not None:
+                yield cached
+            else:
+                pending.append(package)
+        if pending:
+            # Primer escaneo: una sola consulta completa en lugar de miles de argumentos
+            full = len(pending) == len(stamps)
+            batches = [[]] if full else [pending[i:i + DPKG_QUERY_BATCH] for i in range(0, len(pending), DPKG_QUERY_BATCH)]
+            for batch in batches:
+                for package, entry in self._query_dpkg(batch):
+                    # Un nombre que no casa con ningún .list se muestra igual, pero no se guarda en caché
+                    if package in stamps:
+                        self._entries[DPKG_ENTRY_PREFIX + package] = (stamps[package], dict(entry))
+                    yield entry
+        for key in [k for k in self._entries if k.startswith(DPKG_ENTRY_PREFIX) and k[len(DPKG_ENTRY_PREFIX):] not in stamps]:
+            del self._entries[key]
+
+    @staticmethod
+    def _dpkg_list_stamps() -> Optional[Dict[str, int]]:
+        """Paquete (con :arch si dpkg lo usa) -> mtime de su .list, que dpkg reescribe al instalar o actualizar"""
         try:
-            output = subprocess.check_output(
-                ["dpkg-query", "-W", "-f=${Package}\t${Version}\t${Installed-Size}\t${Status}\n"],
-                stderr=subprocess.DEVNULL
-            ).decode("utf-8")
-            for line in output.splitlines():
-                parts = line.split("\t")
-                if len(parts) >= 4 and "installed" in parts[3]:
-                    apps.append({
-                        "name": parts[0],
-                        "version": parts[1],
-                        "size": int(parts[2]) * 1024,
-                        "install_date": "N/A",
-                        "system": "Linux"
-                    })
-        except:
-            pass
-        return apps
+            with os.scandir(DPKG_INFO_PATH) as it:
+                return {entry.name[:-5]: entry.stat().st_mtime_ns for entry in it if entry.name.endswith(".list")}
+        except OSError:
+            return None
+
+    def _query_dpkg(self, packages: List[str]) -> Iterator[Tuple[str, Dict[str, Union[str, int]]]]:
+        cmd = ["dpkg-query", "-W", "-f=${binary:Package}\t${Package}\t${Version}\t${Installed-Size}\t${Status}\n"]
+        for line in self._iter_command_lines(cmd + packages):
+            parts = line.split("\t")
+            if len(parts) >= 5 and "installed" in parts[4]:
+                try:
+                    size = int(parts[3]) * 1024
+                except ValueError:
+                    size = 0
+                yield parts[0], {
+                    "name": parts[1],
+                    "version": parts[2],
+                    "size": size,
+                    "install_date": "N/A",
+                    "system": "Linux"
+                }
 
-    def _uninstall_linux_app(self, app_name: str) -> Dict[str, Union[bool, str]]:
+    def _uninstall_linux_app(self, app_name: str,
+                             on_output: Optional[Callable[[str], None]] = None) -> Dict[str, Union[bool, str]]:
         try:
-            process = subprocess.run([
-                "sudo", "apt-get", "remove", "-y", app_name
-            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            if process.returncode == 0:
+            returncode, tail = self._run_streaming(["sudo", "apt-get", "remove", "-y", app_name], on_output)
+            if returncode == 0:
                 return {"success": True, "message": f"{app_name} desinstalado correctamente."}
-            return {"success": False, "message": process.stderr}
+            return {"success": False, "message": "\n".join(tail)}
         except Exception as e:
             return {"success": False, "message": str(e)}
 
-    def _get_macos_apps(self) -> List[Dict[str, Union[str, int]]]:
-        apps = []
+    def _iter_macos_apps(self) -> Iterator[Dict[str, Union[str, int]]]:
+        seen = set()
         try:
-            for app in os.listdir("/Applications"):
-                if app.endswith(".app"):
-                    path = os.path.join("/Applications", app)
-                    size = self._get_folder_size(path)
-                    apps.append({
-                        "name": app.replace(".app", ""),
-                        "version": "N/A",
-                        "size": size,
-                        "install_date": "N/A",
-                        "system": "macOS"
-                    })
-        except:
-            pass
-        return apps
+            bundles = [app for app in os.listdir(MACOS_APPS_PATH) if app.endswith(".app")]
+        except OSError:
+            return
+        for app in bundles:
+            path = os.path.join(MACOS_APPS_PATH, app)
+            seen.add(path)
+            # El tamaño del bundle solo se recalcula si cambió su mtime
+            try:
+                stamp = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            cached = self._cached_entry(path, stamp)
+            if cached is not None:
+                yield cached
+                continue
+            size = self._get_folder_size(path)
+            entry = {
+                "name": app.replace(".app", ""),
+                "version": "N/A",
+                "size": size,
+                "install_date": "N/A",
+                "system": "macOS"
+            }
+            self._entries[path] = (stamp, dict(entry))
+            yield entry
+        for path in [p for p in self._entries if p.startswith(MACOS_APPS_PATH) and p not in seen]:
+            del self._entries[path]
 
     def _uninstall_macos_app(self, app_name: str) -> Dict[str, Union[bool, str]]:
         try:
@@ -202,16 +510,17 @@ class AppsManager:
         except Exception as e:
             return {"success": False, "message": str(e)}
 
+    def folder_size(self, path: str, progress=None, cancel=None) -> int:
+        """Tamaño de una carpeta con progreso y cancelación (lanza SizingCancelled)
+
+        El recorrido se hace en hilos nativos. Llamado desde el hub, progress se
+        ejecuta en el hilo verde que espera, como mucho cada PROGRESS_INTERVAL
+        segundos; desde un hilo nativo (un trabajo de JobManager), en cada directorio.
+        """
+        return self._offloader.run_with_progress(self._sizer.size, progress, path, cancel=cancel, timeout=None)
+
     def _get_folder_size(self, path: str) -> int:
-        total = 0
-        if not os.path.exists(path):
+        try:
+            return self._sizer.size(path)
+        except SizingCancelled:
             return 0
-        for entry in os.scandir(path):
-            try:
-                if entry.is_file():
-                    total += entry.stat().st_size
-                elif entry.is_dir():
-                    total += self._get_folder_size(entry.path)
-            except:
-                continue
-        return total
@@ -0,0 +1,222 @@
+"""Mide el coste por tick de cada recolector de system_info con el psutil real y con uno sintético
+
+Uso (desde backend/):
+    python benchmarks/bench_collectors.py                       # host real y backend sintético
+    python benchmarks/bench_collectors.py --backend fake --processes 10000 --cores 64 --disks 50 --nics 200
+    python benchmarks/bench_collectors.py --save benchmarks/baseline.json
+    python benchmarks/bench_collectors.py --compare benchmarks/baseline.json --threshold 0.25
+
+Cada backend se ejecuta en un subproceso para que el pico de RSS de uno no
+contamine al otro. Con --compare el código de salida es 1 si algún recolector
+empeora más que el umbral (útil en CI).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+# Métricas que se comparan con la línea base (más es peor en todas)
+COMPARED = ('p50_ms', 'p99_ms', 'alloc_peak_kb')
+
+
+def _peak_rss_kb() -> float:
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss está en KB en Linux y en bytes en macOS
+        return peak / 1024 if sys.platform == 'darwin' else float(peak)
+    except ImportError:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _install_backend(args) -> Callable[[], None]:
+    """Prepara system_info con el backend pedido y devuelve la función que avanza un tick"""
+    import system_info
+
+    if args.backend == 'fake':
+        from fake_psutil import FakePsutil
+        fake = FakePsutil(args.processes, args.cores, args.disks, args.nics, seed=args.seed, churn=args.churn)
+        system_info.psutil = fake
+        advance = fake.advance
+    else:
+        advance = lambda: time.sleep(args.tick)
+
+    # Estado nuevo para que las lecturas previas del otro backend no influyan
+    system_info._cpu_sampler = system_info.CpuSampler()
+    system_info._process_registry = system_info.ProcessRegistry()
+    system_info._disk_rates = system_info.CounterRates(system_info._disk_rates.fields)
+    system_info._disk_total_rates = system_info.CounterRates(system_info._disk_total_rates.fields)
+    system_info._net_rates = system_info.CounterRates(system_info._net_rates.fields)
+    return advance
+
+
+def run_backend(args) -> Dict[str, object]:
+    """Ejecuta el benchmark en este proceso y devuelve sus resultados"""
+    import system_info
+
+    advance = _install_backend(args)
+    collectors = dict(system_info.get_collectors(args.top_n))
+    collectors['get_system_info'] = lambda: system_info.get_system_info(args.top_n)
+
+    # Calentamiento: registra los procesos y fija las lecturas de referencia
+    for _ in range(args.warmup):
+        advance()
+        for collect in collectors.values():
+            collect()
+
+    timings: Dict[str, List[float]] = {name: [] for name in collectors}
+    for _ in range(args.iterations):
+        advance()
+        for name, collect in collectors.items():
+            start = time.perf_counter()
+            collect()
+            timings[name].append((time.perf_counter() - start) * 1000)
+
+    # Asignaciones en una pasada aparte: tracemalloc ralentiza mucho las llamadas
+    allocations: Dict[str, List[float]] = {name: [] for name in collectors}
+    retained: Dict[str, List[float]] = {name: [] for name in collectors}
+    tracemalloc.start()
+    for _ in range(args.alloc_iterations):
+        advance()
+        for name, collect in collectors.items():
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            collect()
+            current, peak = tracemalloc.get_traced_memory()
+            allocations[name].append((peak - before) / 1024)
+            retained[name].append((current - before) / 1024)
+    tracemalloc.stop()
+
+    results = {}
+    for name, values in timings.items():
+        results[name] = {
+            'p50_ms': round(_percentile(values, 0.50), 4),
+            'p90_ms': round(_percentile(values, 0.90), 4),
+            'p99_ms': round(_percentile(values, 0.99), 4),
+            'max_ms': round(max(values), 4),
+            'mean_ms': round(statistics.fmean(values), 4),
+            'alloc_peak_kb': round(statistics.fmean(allocations[name]), 2) if allocations[name] else None,
+            'retained_kb': round(statistics.fmean(retained[name]), 2) if retained[name] else None
+        }
+    return {'collectors': results, 'peak_rss_kb': round(_peak_rss_kb(), 1)}
+
+
+def run_isolated(args, backend: str) -> Dict[str, object]:
+    """Ejecuta un backend en un subproceso y recoge su JSON"""
+    cmd = [sys.executable, os.path.abspath(__file__), '--backend', backend, '--emit-json',
+           '--iterations', str(args.iterations), '--warmup', str(args.warmup),
+           '--alloc-iterations', str(args.alloc_iterations), '--top-n', str(args.top_n),
+           '--processes', str(args.processes), '--cores', str(args.cores), '--disks', str(args.disks),
+           '--nics', str(args.nics), '--seed', str(args.seed), '--churn', str(args.churn), '--tick', str(args.tick)]
+    output = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def print_results(backend: str, result: Dict[str, object]) -> None:
+    print(f"\n== {backend} (pico RSS {result['peak_rss_kb'] / 1024:.1f} MB) ==")
+    print(f"{'recolector':<16} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'asig. KB':>10} {'ret. KB':>9}")
+    for name, stats in result['collectors'].items():
+        print(f"{name:<16} {stats['p50_ms']:>9.3f} {stats['p90_ms']:>9.3f} {stats['p99_ms']:>9.3f} "
+              f"{stats['max_ms']:>9.3f} {stats['alloc_peak_kb'] or 0:>10.1f} {stats['retained_kb'] or 0:>9.1f}")
+
+
+def compare(baseline: Dict[str, object], current: Dict[str, object], threshold: float) -> List[str]:
+    """Devuelve las regresiones (métrica que empeora más que threshold) respecto a la línea base"""
+    regressions = []
+    for backend, result in current['results'].items():
+        base = baseline.get('results', {}).get(backend)
+        if base is None:
+            continue
+        print(f"\n== {backend}: cambio respecto a la línea base ==")
+        for name, stats in result['collectors'].items():
+            base_stats = base['collectors'].get(name)
+            if base_stats is None:
+                continue
+            changes = []
+            for metric in COMPARED:
+                old, new = base_stats.get(metric), stats.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                changes.append(f"{metric} {change:+.0%}")
+                if change > threshold:
+                    regressions.append(f"{backend}/{name}: {metric} {old} -> {new} ({change:+.0%})")
+            print(f"{name:<16} " + ", ".join(changes))
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de los recolectores de system_info")
+    parser.add_argument('--backend', choices=('real', 'fake', 'both'), default='both')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--alloc-iterations', type=int, default=5)
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--tick', type=float, default=0.05, help='espera entre ticks con el host real')
+    parser.add_argument('--processes', type=int, default=10000)
+    parser.add_argument('--cores', type=int, default=64)
+    parser.add_argument('--disks', type=int, default=50)
+    parser.add_argument('--nics', type=int, default=200)
+    parser.add_argument('--churn', type=float, default=0.01, help='fracción de procesos renovados por tick')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save', help='guarda los resultados como línea base JSON')
+    parser.add_argument('--compare', help='compara con una línea base JSON guardada')
+    parser.add_argument('--threshold', type=float, default=0.25, help='empeoramiento tolerado (0.25 = 25%%)')
+    parser.add_argument('--emit-json', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.emit_json:
+        print(json.dumps(run_backend(args)))
+        return
+
+    backends = ('real', 'fake') if args.backend == 'both' else (args.backend,)
+    report = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': {key: value for key, value in vars(args).items() if key not in ('save', 'compare', 'emit_json')}
+        },
+        'results': {}
+    }
+    for backend in backends:
+        report['results'][backend] = run_isolated(args, backend)
+        print_results(backend, report['results'][backend])
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nLínea base guardada en {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print("\nRegresiones:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nSin regresiones por encima del umbral.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Compara el coste de serializar los grupos numéricos como JSON completo, parches JSON o tramas binarias
+
+Uso (desde backend/):  python benchmarks/bench_encoding.py [--ticks 500]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from binary_frames import BINARY_GROUPS, FrameEncoder, decode_frame
+from stream_protocol import DeltaStream
+from subscriptions import slice_snapshot
+from system_info import get_system_info
+
+
+def perturb(data, rng, ratio):
+    """Cambia al azar una fracción de los valores numéricos, como entre dos ticks reales"""
+    if isinstance(data, dict):
+        return {key: perturb(value, rng, ratio) for key, value in data.items()}
+    if isinstance(data, list):
+        return [perturb(value, rng, ratio) for value in data]
+    if isinstance(data, (int, float)) and not isinstance(data, bool) and rng.random() < ratio:
+        return round(data * rng.uniform(0.9, 1.1) + rng.random(), 1)
+    return data
+
+
+def run(ticks, ratio, seed):
+    rng = random.Random(seed)
+    base = {group: slice_snapshot(get_system_info(), group) for group in BINARY_GROUPS}
+    samples = [base]
+    for _ in range(ticks - 1):
+        samples.append(perturb(samples[-1], rng, ratio))
+
+    results = {}
+
+    # JSON completo: lo que enviaba el antiguo 'system_update' en cada tick
+    start = time.perf_counter()
+    size = sum(len(json.dumps(sample[group])) for sample in samples for group in BINARY_GROUPS)
+    results['json_full'] = (time.perf_counter() - start, size)
+
+    # Parches JSON numerados por grupo
+    streams = {group: DeltaStream() for group in BINARY_GROUPS}
+    start = time.perf_counter()
+    size = 0
+    for sample in samples:
+        for group in BINARY_GROUPS:
+            patch = streams[group].update(sample[group])
+            if patch is not None:
+                size += len(json.dumps(patch))
+    results['json_patch'] = (time.perf_counter() - start, size)
+
+    # Tramas binarias con esquema fijo (el esquema se cuenta cada vez que se envía)
+    encoder = FrameEncoder()
+    start = time.perf_counter()
+    size = 0
+    for sample in samples:
+        for group in BINARY_GROUPS:
+            schema, frame = encoder.encode(group, sample[group])
+            if schema is not None:
+                size += len(json.dumps(schema))
+            size += len(frame)
+    results['binary'] = (time.perf_counter() - start, size)
+
+    # Comprobación de ida y vuelta con el último tick
+    for group in BINARY_GROUPS:
+        _, frame = encoder.encode(group, samples[-1][group])
+        _, decoded = decode_frame(encoder.schema(group), frame)
+        assert json.loads(json.dumps(decoded)) == json.loads(json.dumps(samples[-1][group])), group
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ticks', type=int, default=500)
+    parser.add_argument('--ratio', type=float, default=0.5, help='fracción de valores que cambian por tick')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    results = run(args.ticks, args.ratio, args.seed)
+    print(f"{'codificación':<12} {'µs/tick':>10} {'bytes/tick':>12}")
+    for name, (elapsed, size) in results.items():
+        print(f"{name:<12} {elapsed / args.ticks * 1e6:>10.1f} {size / args.ticks:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""Backend sintético y determinista con la parte de la API de psutil que usa system_info
+
+Con la misma semilla y el mismo número de llamadas a advance() produce
+exactamente los mismos datos, así que una ejecución del benchmark se puede
+repetir y comparar con otra. Simula máquinas mucho más grandes que la real
+(miles de procesos, decenas de núcleos y discos, cientos de interfaces).
+"""
+import contextlib
+import random
+from collections import namedtuple
+from typing import Dict, List
+
+import psutil
+
+scputimes = namedtuple('scputimes', 'user nice system idle iowait irq softirq steal guest guest_nice')
+scpufreq = namedtuple('scpufreq', 'current min max')
+svmem = namedtuple('svmem', 'total available percent used free')
+sswap = namedtuple('sswap', 'total used free percent sin sout')
+sdiskusage = namedtuple('sdiskusage', 'total used free percent')
+sdiskio = namedtuple('sdiskio', 'read_count write_count read_bytes write_bytes read_time write_time')
+snetio = namedtuple('snetio', 'bytes_sent bytes_recv packets_sent packets_recv errin errout dropin dropout')
+shwtemp = namedtuple('shwtemp', 'label current high critical')
+pio = namedtuple('pio', 'read_count write_count read_bytes write_bytes')
+
+GiB = 1024 ** 3
+STATUSES = ('running', 'sleeping', 'sleeping', 'sleeping', 'idle', 'disk-sleep')
+NAMES = ('python', 'postgres', 'nginx', 'java', 'node', 'chrome', 'bash', 'sshd', 'systemd', 'kworker')
+
+
+class FakeProcess:
+    """Proceso sintético; sus contadores dependen solo de la semilla y del tick actual"""
+
+    def __init__(self, backend: 'FakePsutil', pid: int):
+        self._backend = backend
+        self.pid = pid
+        self._spec = backend._processes.get(pid)
+        if self._spec is None:
+            raise backend.NoSuchProcess(pid)
+
+    def _check(self) -> tuple:
+        spec = self._backend._processes.get(self.pid)
+        if spec is None or spec is not self._spec:
+            raise self._backend.NoSuchProcess(self.pid)
+        return spec
+
+    def oneshot(self):
+        return contextlib.nullcontext()
+
+    def is_running(self) -> bool:
+        return self._backend._processes.get(self.pid) is self._spec
+
+    def create_time(self) -> float:
+        return self._check()[0]
+
+    def name(self) -> str:
+        return self._check()[1]
+
+    def username(self) -> str:
+        spec = self._check()
+        if spec[2] is None:
+            raise self._backend.AccessDenied(self.pid)
+        return spec[2]
+
+    def cpu_percent(self, interval=None) -> float:
+        spec = self._check()
+        return round((spec[3] * (self._backend.tick % 7 + 1)) % 100, 1)
+
+    def memory_percent(self) -> float:
+        return self._check()[4]
+
+    def status(self) -> str:
+        spec = self._check()
+        return STATUSES[(spec[5] + self._backend.tick) % len(STATUSES)]
+
+    def num_threads(self) -> int:
+        return self._check()[6]
+
+    def io_counters(self) -> pio:
+        spec = self._check()
+        ticks = self._backend.tick
+        return pio(ticks * 3, ticks * 2, spec[7] * ticks, spec[7] * ticks // 2)
+
+
+class FakePsutil:
+    """Sustituto de psutil para los recolectores de system_info"""
+
+    STATUS_RUNNING = psutil.STATUS_RUNNING
+    STATUS_ZOMBIE = psutil.STATUS_ZOMBIE
+    NoSuchProcess = psutil.NoSuchProcess
+    AccessDenied = psutil.AccessDenied
+    ZombieProcess = psutil.ZombieProcess
+
+    def __init__(self, processes: int = 10000, cores: int = 64, disks: int = 50, nics: int = 200,
+                 seed: int = 1, churn: float = 0.01, tick_seconds: float = 1.0):
+        self.cores = cores
+        self.disks = [f"nvme{i}n1" for i in range(disks)]
+        self.nics = [f"eth{i}" for i in range(nics)]
+        self.churn = churn
+        self.tick_seconds = tick_seconds
+        self.tick = 0
+        self._rng = random.Random(seed)
+        self._next_pid = 1
+        # pid -> (create_time, nombre, usuario, peso de cpu, % memoria, estado, hilos, bytes de E/S por tick)
+        self._processes: Dict[int, tuple] = {}
+        for _ in range(processes):
+            self._spawn()
+        self._core_weights = [self._rng.uniform(0.05, 0.95) for _ in range(cores)]
+        self._disk_weights = [self._rng.randint(1, 500) for _ in range(disks)]
+        self._nic_weights = [self._rng.randint(1, 2000) for _ in range(nics)]
+
+    def _spawn(self) -> None:
+        pid = self._next_pid
+        self._next_pid += 1
+        rng = self._rng
+        self._processes[pid] = (
+            1_700_000_000.0 + pid,
+            f"{rng.choice(NAMES)}-{pid % 97}",
+            None if rng.random() < 0.05 else rng.choice(('root', 'www-data', 'postgres', 'user')),
+            rng.uniform(0.0, 30.0),
+            round(rng.uniform(0.0, 2.0), 3),
+            rng.randrange(len(STATUSES)),
+            rng.randint(1, 200),
+            rng.randint(0, 4096)
+        )
+
+    def advance(self) -> None:
+        """Avanza un tick: los contadores crecen y una fracción de los procesos se renueva"""
+        self.tick += 1
+        replaced = int(len(self._processes) * self.churn)
+        for pid in self._rng.sample(list(self._processes), replaced) if replaced else []:
+            del self._processes[pid]
+            self._spawn()
+
+    # --- CPU ---
+    def cpu_times(self, percpu: bool = False):
+        elapsed = self.tick * self.tick_seconds + 1000.0
+        per_core = []
+        for weight in self._core_weights:
+            busy = elapsed * weight
+            per_core.append(scputimes(busy * 0.7, 0.0, busy * 0.2, elapsed - busy, busy * 0.05,
+                                      0.0, busy * 0.05, 0.0, 0.0, 0.0))
+        if percpu:
+            return per_core
+        return scputimes(*(sum(values) for values in zip(*per_core)))
+
+    def cpu_freq(self) -> scpufreq:
+        return scpufreq(2400.0 + self.tick % 400, 800.0, 3500.0)
+
+    def cpu_count(self, logical: bool = True) -> int:
+        return self.cores if logical else self.cores // 2
+
+    def sensors_temperatures(self) -> Dict[str, List[shwtemp]]:
+        return {'coretemp': [shwtemp(f"Core {i}", 50.0 + i % 20, 90.0, 100.0) for i in range(self.cores // 2)]}
+
+    def boot_time(self) -> float:
+        return 1_700_000_000.0
+
+    # --- Memoria y disco ---
+    def virtual_memory(self) -> svmem:
+        total = 512 * GiB
+        used = int(total * (0.4 + 0.1 * ((self.tick % 10) / 10)))
+        return svmem(total, total - used, round(used / total * 100, 1), used, total - used)
+
+    def swap_memory(self) -> sswap:
+        return sswap(64 * GiB, 2 * GiB, 62 * GiB, 3.1, 0, 0)
+
+    def disk_usage(self, path: str) -> sdiskusage:
+        return sdiskusage(4096 * GiB, 1024 * GiB, 3072 * GiB, 25.0)
+
+    def disk_io_counters(self, perdisk: bool = False):
+        counters = {
+            disk: sdiskio(weight * self.tick, weight * self.tick // 2, weight * self.tick * 4096,
+                          weight * self.tick * 2048, self.tick, self.tick)
+            for disk, weight in zip(self.disks, self._disk_weights)
+        }
+        if perdisk:
+            return counters
+        return sdiskio(*(sum(values) for values in zip(*counters.values()))) if counters else None
+
+    # --- Red ---
+    def net_io_counters(self, pernic: bool = False):
+        counters = {
+            nic: snetio(weight * self.tick * 1500, weight * self.tick * 3000, weight * self.tick,
+                        weight * self.tick * 2, 0, 0, 0, 0)
+            for nic, weight in zip(self.nics, self._nic_weights)
+        }
+        if pernic:
+            return counters
+        return snetio(*(sum(values) for values in zip(*counters.values())))
+
+    # --- Procesos ---
+    def pids(self) -> List[int]:
+        return list(self._processes)
+
+    def Process(self, pid: int) -> FakeProcess:
+        return FakeProcess(self, pid)
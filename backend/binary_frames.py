@@ -0,0 +1,139 @@
+import itertools
+import math
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Grupos con estructura numérica fija que pueden enviarse como tramas binarias;
+# el resto (procesos, datos del host) sigue usando parches JSON
+BINARY_GROUPS = ('cpu', 'memory', 'disk', 'net')
+
+# Cabecera de cada trama: id del esquema y nº de secuencia (uint32, little-endian)
+FRAME_HEADER = struct.Struct('<II')
+
+Path = Tuple[Any, ...]
+
+
+def flatten_numeric(data: Any, prefix: Path = ()) -> Iterator[Tuple[Path, float]]:
+    """Recorre las hojas numéricas de un snapshot; las listas aportan el índice a la ruta"""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from flatten_numeric(value, prefix + (key,))
+    elif isinstance(data, (list, tuple)):
+        for index, value in enumerate(data):
+            yield from flatten_numeric(value, prefix + (index,))
+    elif isinstance(data, bool):
+        yield prefix, float(data)
+    elif isinstance(data, (int, float)):
+        yield prefix, float(data)
+    elif data is None:
+        yield prefix, math.nan
+
+
+class FrameEncoder:
+    """Codifica la parte numérica de cada grupo como un array de float64 de diseño fijo
+
+    El esquema (lista de rutas) se envía una vez; cada trama lleva solo su id
+    y los valores en el mismo orden. Si cambia la estructura (p. ej. se
+    conecta un disco) se genera un esquema nuevo con otro id.
+    """
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        # grupo -> (id del esquema, rutas, forma del grupo)
+        self._schemas: Dict[str, Tuple[int, Tuple[Path, ...], tuple]] = {}
+        self._seq: Dict[str, int] = {}
+
+    def schema(self, group: str) -> Optional[Dict[str, Any]]:
+        """Esquema vigente de un grupo en el formato que recibe el cliente"""
+        current = self._schemas.get(group)
+        if current is None:
+            return None
+        schema_id, paths, _ = current
+        return {'group': group, 'schema_id': schema_id, 'paths': [list(path) for path in paths]}
+
+    def encode(self, group: str, data: dict, advance: bool = True) -> Tuple[Optional[Dict[str, Any]], bytes]:
+        """Devuelve (esquema nuevo o None si no cambió, trama binaria)
+
+        Con advance=False (la trama completa para un solo cliente) se reutiliza
+        el número de secuencia actual del grupo: si avanzara, el resto de
+        clientes de la sala vería un hueco y pediría una resincronización.
+        """
+        shape: list = []
+        values = array('d')
+        _walk(data, shape, values.append)
+        shape_key = tuple(shape)
+        current = self._schemas.get(group)
+        new_schema = None
+        # Solo se vuelven a construir las rutas si cambió la forma del grupo
+        if current is None or current[2] != shape_key:
+            paths = tuple(path for path, _ in flatten_numeric(data))
+            current = (next(self._ids), paths, shape_key)
+            self._schemas[group] = current
+            new_schema = self.schema(group)
+
+        seq = self._seq.get(group, 0)
+        if advance:
+            seq = (seq + 1) & 0xFFFFFFFF
+            self._seq[group] = seq
+        if sys.byteorder == 'big':
+            # Las tramas son siempre little-endian
+            values.byteswap()
+        return new_schema, FRAME_HEADER.pack(current[0], seq) + values.tobytes()
+
+
+_NAN = math.nan
+
+
+def _walk(data: Any, shape: list, emit) -> None:
+    """Versión rápida de flatten_numeric: anota la forma (claves y longitudes) y emite los valores"""
+    kind = type(data)
+    if kind is dict:
+        shape.append(len(data))
+        for key, value in data.items():
+            shape.append(key)
+            _walk(value, shape, emit)
+    elif kind is list or kind is tuple:
+        shape.append(-len(data) - 1)
+        for value in data:
+            _walk(value, shape, emit)
+    elif kind is float or kind is int or kind is bool:
+        emit(data)
+    elif data is None:
+        emit(_NAN)
+    elif isinstance(data, (int, float)):
+        emit(float(data))
+    else:
+        # Cadenas y otros tipos no forman parte de la trama, pero sí de la forma
+        shape.append(None)
+
+
+def decode_frame(schema: Dict[str, Any], frame: bytes) -> Tuple[int, dict]:
+    """Reconstruye el diccionario de un grupo a partir de su esquema (uso en pruebas y benchmarks)"""
+    schema_id, seq = FRAME_HEADER.unpack_from(frame)
+    if schema_id != schema['schema_id']:
+        raise ValueError(f"Trama con esquema {schema_id}, se esperaba {schema['schema_id']}")
+    values = array('d')
+    values.frombytes(frame[FRAME_HEADER.size:])
+    if sys.byteorder == 'big':
+        values.byteswap()
+
+    result: dict = {}
+    for path, value in zip(schema['paths'], values):
+        node: Any = result
+        for key, next_key in zip(path, path[1:]):
+            if isinstance(node, list):
+                while len(node) <= key:
+                    node.append(None)
+                if node[key] is None:
+                    node[key] = [] if isinstance(next_key, int) else {}
+                node = node[key]
+            else:
+                node = node.setdefault(key, [] if isinstance(next_key, int) else {})
+        last = path[-1]
+        if isinstance(node, list):
+            while len(node) <= last:
+                node.append(None)
+        node[last] = None if math.isnan(value) else value
+    return seq, result
@@ -0,0 +1,259 @@
+import platform
+import socket
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from metrics import COLLECTOR_DURATION, COLLECTOR_ERRORS, COLLECT_DURATION
+from metrics_store import MetricsStore
+from offload import Offloader, OffloadBusy, OffloadTimeout
+from system_info import get_collectors, merge_snapshot, empty_system_info, DEFAULT_TOP_N
+
+logger = logging.getLogger('Collector')
+
+# Periodo en segundos de cada grupo de recolectores (None = una sola vez)
+DEFAULT_PERIODS: Dict[str, Optional[float]] = {
+    'cpu': 1,
+    'memory': 1,
+    'network': 1,
+    'disk_io': 1,
+    'process_count': 5,
+    'processes': 5,
+    'disk_usage': 30,
+    'temperature': 30,
+    'host': None
+}
+# Sección del snapshot que pertenece por completo a un recolector; se omite mientras está en pausa
+OWNED_SECTIONS: Dict[str, str] = {
+    'processes': 'processes'
+}
+# Margen para no saltarse un periodo por pequeños retrasos del temporizador
+SCHEDULE_SLACK = 0.05
+# Segundos que un recolector en pausa sigue activo tras pedirlo una petición REST (/api/system-info, /metrics)
+DEMAND_HOLD = 60.0
+# Segundos máximos que esa petición espera al primer snapshot con sus datos
+DEMAND_WAIT = 5.0
+
+
+class SnapshotSlot:
+    """Último snapshot publicado por el colector, versionado y sin bloqueos
+
+    Hay un único escritor (el colector) que sustituye la referencia a una
+    tupla inmutable (versión, datos); los lectores nunca esperan y siempre
+    obtienen una pareja coherente.
+    """
+
+    def __init__(self):
+        self._current: Tuple[int, Optional[dict]] = (0, None)
+
+    def publish(self, data: dict) -> int:
+        version = self._current[0] + 1
+        self._current = (version, data)
+        return version
+
+    def read(self) -> Tuple[int, Optional[dict]]:
+        return self._current
+
+    @property
+    def version(self) -> int:
+        return self._current[0]
+
+
+class TieredScheduler:
+    """Ejecuta cada recolector con su propio periodo y fusiona los resultados en un snapshot"""
+
+    def __init__(self, collectors: Dict[str, Callable[[], dict]],
+                 periods: Optional[Dict[str, Optional[float]]] = None,
+                 offloader: Optional[Offloader] = None):
+        self.collectors = collectors
+        self.periods = {**DEFAULT_PERIODS, **(periods or {})}
+        # Los recolectores llaman a psutil y a comandos externos: se ejecutan fuera del hub
+        self.offloader = offloader or Offloader()
+        self.paused: FrozenSet[str] = frozenset()
+        # Recolectores incluidos en el último snapshot
+        self.included: FrozenSet[str] = frozenset()
+        self._leases: Dict[str, float] = {}
+        self._inactive: FrozenSet[str] = frozenset()
+        self._last_run: Dict[str, float] = {}
+        self._results: Dict[str, dict] = {}
+
+    def set_paused(self, names: Iterable[str]) -> None:
+        """Deja de ejecutar los recolectores indicados; al reanudarse se ejecutan de inmediato"""
+        self.paused = frozenset(names)
+
+    def demand(self, names: Iterable[str], hold: float = DEMAND_HOLD, now: Optional[float] = None) -> bool:
+        """Mantiene activos hold segundos unos recolectores aunque estén en pausa
+
+        Devuelve True si alguno estaba parado, es decir, si aún no hay datos suyos.
+        """
+        now = time.monotonic() if now is None else now
+        names = [name for name in names if name in self.collectors]
+        for name in names:
+            self._leases[name] = max(self._leases.get(name, 0.0), now + hold)
+        return any(name in self._inactive for name in names)
+
+    def _inactive_now(self, now: float) -> FrozenSet[str]:
+        """Recolectores en pausa que ninguna petición reciente mantiene activos"""
+        inactive = frozenset(name for name in self.paused if self._leases.get(name, 0.0) <= now)
+        for name in inactive - self._inactive:
+            self._results.pop(name, None)
+            self._last_run.pop(name, None)
+        self._inactive = inactive
+        return inactive
+
+    def due(self, now: float) -> List[str]:
+        """Nombres de los recolectores que toca ejecutar en este instante"""
+        inactive = self._inactive_now(now)
+        due = []
+        for name in self.collectors:
+            if name in inactive:
+                continue
+            last = self._last_run.get(name)
+            period = self.periods.get(name)
+            if last is None or (period is not None and now - last >= period - SCHEDULE_SLACK):
+                due.append(name)
+        return due
+
+    def next_due_in(self, now: float) -> float:
+        """Segundos que faltan hasta que venza el siguiente recolector"""
+        inactive = self._inactive_now(now)
+        waits = []
+        for name in self.collectors:
+            if name in inactive:
+                continue
+            last = self._last_run.get(name)
+            period = self.periods.get(name)
+            if last is None:
+                return 0.0
+            if period is not None:
+                waits.append(last + period - now)
+        return max(0.0, min(waits)) if waits else 1.0
+
+    def tick(self, now: Optional[float] = None) -> Dict:
+        """Ejecuta los recolectores vencidos y devuelve el snapshot combinado"""
+        now = time.monotonic() if now is None else now
+        for name in self.due(now):
+            start = time.perf_counter()
+            try:
+                self._results[name] = self.offloader.run(self.collectors[name], key=f"collector:{name}")
+            except OffloadBusy:
+                # La ejecución anterior (que superó el timeout) aún no terminó; se conserva su último resultado
+                logger.debug("Recolector %s todavía en curso, se omite esta vuelta", name)
+            except OffloadTimeout as e:
+                COLLECTOR_ERRORS.inc(collector=name)
+                logger.error(f"El recolector {name} no respondió a tiempo: {str(e)}")
+            except Exception as e:
+                # Se conserva el último resultado válido del grupo
+                COLLECTOR_ERRORS.inc(collector=name)
+                logger.error(f"Error en el recolector {name}: {str(e)}", exc_info=True)
+            COLLECTOR_DURATION.observe(time.perf_counter() - start, collector=name)
+            self._last_run[name] = now
+
+        inactive = self._inactive
+        self.included = frozenset(name for name in self.collectors if name in self._results and name not in inactive)
+        parts = [self._results[name] for name in self.collectors if name in self.included]
+        snapshot = merge_snapshot(empty_system_info(), *parts)
+        for name in inactive:
+            if name in OWNED_SECTIONS:
+                # Sin datos frescos es mejor no publicar ceros: solo quedan los campos que aportan
+                # otros recolectores activos (p. ej. el total de procesos para el historial)
+                section = OWNED_SECTIONS[name]
+                kept = merge_snapshot(*[part for part in parts if section in part]).get(section)
+                if kept:
+                    snapshot[section] = kept
+                else:
+                    snapshot.pop(section, None)
+        snapshot['timestamp'] = time.time()
+        return snapshot
+
+
+class MetricsCollector:
+    """Recolecta métricas en segundo plano y las publica en un SnapshotSlot"""
+
+    def __init__(self, slot: SnapshotSlot, top_n: int = DEFAULT_TOP_N,
+                 periods: Optional[Dict[str, Optional[float]]] = None,
+                 store: Optional[MetricsStore] = None, offloader: Optional[Offloader] = None):
+        self.slot = slot
+        self.store = store
+        self._top_n = top_n
+        self.scheduler = TieredScheduler(get_collectors(top_n), periods, offloader)
+        self._stop = threading.Event()
+        # Despierta al colector antes de tiempo (un recolector pedido bajo demanda)
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Recolectores incluidos en el último snapshot publicado
+        self.published: FrozenSet[str] = frozenset()
+
+    def configure(self, top_n: Optional[int] = None,
+                  periods: Optional[Dict[str, Optional[float]]] = None) -> None:
+        """Actualiza el tamaño de los top-N y los periodos sin perder los últimos resultados"""
+        if top_n is not None and top_n != self._top_n:
+            self._top_n = top_n
+            self.scheduler.collectors = get_collectors(top_n)
+        if periods is not None:
+            self.scheduler.periods = {**DEFAULT_PERIODS, **periods}
+
+    def set_paused(self, names: Iterable[str]) -> None:
+        """Pausa los recolectores que ahora mismo no necesita ningún cliente"""
+        self.scheduler.set_paused(names)
+
+    def request(self, names: Iterable[str], hold: float = DEMAND_HOLD, timeout: float = DEMAND_WAIT) -> None:
+        """Reanuda hold segundos los recolectores en pausa que necesita una petición REST
+
+        Si estaban parados, espera (como mucho timeout segundos) a que se publique
+        un snapshot que los incluya.
+        """
+        names = [name for name in names if name in self.scheduler.collectors]
+        if not self.scheduler.demand(names, hold) or not self.running:
+            return
+        self._wake.set()
+        deadline = time.monotonic() + timeout
+        while not set(names) <= self.published and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='metrics-collector', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _sleep(self, seconds: float) -> None:
+        self._wake.wait(seconds)
+        self._wake.clear()
+
+    def collect_once(self) -> Dict:
+        """Ejecuta los grupos vencidos, completa el snapshot con datos del host y lo publica"""
+        with COLLECT_DURATION.time():
+            system_data = self.scheduler.tick()
+        system_data['hostname'] = socket.gethostname()
+        system_data['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        system_data['detected_os'] = platform.system()
+        self.slot.publish(system_data)
+        self.published = self.scheduler.included
+        if self.store is not None:
+            try:
+                self.store.record(system_data)
+            except Exception as e:
+                logger.error(f"No se pudo guardar el historial: {str(e)}", exc_info=True)
+        return system_data
+
+    def _run(self) -> None:
+        logger.info("Iniciando colector de métricas...")
+        while not self._stop.is_set():
+            try:
+                self.collect_once()
+                self._sleep(max(0.1, self.scheduler.next_due_in(time.monotonic())))
+            except Exception as e:
+                logger.error(f"Error en el colector: {str(e)}", exc_info=True)
+                self._sleep(5)
@@ -0,0 +1,124 @@
+import json
+import os
+import stat
+import tempfile
+import threading
+import logging
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger('ConfigStore')
+
+# Cada cuántos segundos se comprueba el mtime del fichero
+WATCH_INTERVAL = 2.0
+# Permisos de config.json cuando aún no existe
+DEFAULT_MODE = 0o644
+
+
+class ConfigCache:
+    """Configuración en memoria con invalidación por mtime y escritura atómica
+
+    Los lectores siempre obtienen la copia en memoria; solo el vigilante en
+    segundo plano (o una escritura) consulta el disco. Los suscriptores
+    reciben la configuración nueva cada vez que cambia.
+    """
+
+    def __init__(self, path: str, defaults: Dict):
+        self.path = path
+        self.defaults = defaults
+        self._lock = threading.Lock()
+        self._config: Dict = dict(defaults)
+        self._mtime: Optional[float] = None
+        self._subscribers: List[Callable[[Dict], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reload_if_changed()
+
+    def get(self) -> Dict:
+        """Copia de la configuración actual (sin tocar el disco)"""
+        return dict(self._config)
+
+    def subscribe(self, callback: Callable[[Dict], None]) -> None:
+        self._subscribers.append(callback)
+
+    def _read_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def reload_if_changed(self) -> bool:
+        """Vuelve a leer el fichero si su mtime cambió; devuelve True si la configuración cambió"""
+        mtime = self._read_mtime()
+        if mtime == self._mtime:
+            return False
+
+        config = dict(self.defaults)
+        if mtime is not None:
+            try:
+                with open(self.path, 'r') as f:
+                    config.update(json.load(f))
+            except json.JSONDecodeError as e:
+                logger.warning("Configuración inválida, se usan los valores por defecto: %s", e)
+            except OSError as e:
+                logger.error("No se pudo leer la configuración: %s", e)
+                return False
+
+        with self._lock:
+            self._mtime = mtime
+            changed = config != self._config
+            self._config = config
+        if changed:
+            self._notify(config)
+        return changed
+
+    def save(self, data: Dict) -> None:
+        """Escribe la configuración de forma atómica (fichero temporal + rename) y la publica"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            mode = stat.S_IMODE(os.stat(self.path).st_mode)
+        except OSError:
+            mode = DEFAULT_MODE
+        fd, tmp_path = tempfile.mkstemp(prefix='.config-', suffix='.json', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp crea el fichero con 0600: se mantienen los permisos que tenía config.json
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        config = {**self.defaults, **data}
+        with self._lock:
+            self._mtime = self._read_mtime()
+            self._config = config
+        self._notify(config)
+
+    def _notify(self, config: Dict) -> None:
+        for callback in self._subscribers:
+            try:
+                callback(dict(config))
+            except Exception as e:
+                logger.error("Error aplicando la configuración: %s", e, exc_info=True)
+
+    def start_watching(self, interval: float = WATCH_INTERVAL) -> None:
+        """Vigila el fichero en segundo plano para aplicar cambios hechos fuera de la app"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, args=(interval,), name='config-watcher', daemon=True)
+        self._thread.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                logger.error("Error vigilando la configuración: %s", e, exc_info=True)
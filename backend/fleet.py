@@ -0,0 +1,194 @@
+import gzip
+import json
+import os
+import re
+import threading
+import time
+import zlib
+import logging
+from typing import Dict, List, Optional
+
+from metrics_store import ColumnCache, MetricsStore
+
+logger = logging.getLogger('Fleet')
+
+# Resolución -> retención del historial de cada host remoto (más corto que el local: son muchos hosts)
+FLEET_RETENTION: Dict[int, int] = {
+    60: 24 * 3600,
+    3600: 30 * 24 * 3600
+}
+# Un host se considera desconectado si no envía nada en este tiempo
+DEFAULT_STALE_AFTER = 60.0
+# Hosts distintos que admite el agregador y columnas de historial mapeadas a la vez entre todos
+DEFAULT_MAX_HOSTS = 256
+DEFAULT_OPEN_COLUMNS = 256
+# Límites de cada envío, comprimido y descomprimido
+MAX_BODY_BYTES = 2 * 1024 * 1024
+MAX_PAYLOAD_BYTES = 32 * 1024 * 1024
+
+HOSTNAME_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]{0,252}$')
+
+
+class PayloadError(ValueError):
+    """Envío de un agente mal formado o demasiado grande"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def decode_payload(body: bytes, content_encoding: Optional[str] = None,
+                   max_size: int = MAX_PAYLOAD_BYTES) -> dict:
+    """Descomprime (gzip) y decodifica el JSON de un agente sin superar max_size bytes"""
+    if content_encoding == 'gzip':
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(body, max_size)
+        except zlib.error as e:
+            raise PayloadError(f"gzip inválido: {str(e)}")
+        if decompressor.unconsumed_tail:
+            raise PayloadError("Envío demasiado grande", status=413)
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise PayloadError(f"JSON inválido: {str(e)}")
+    if not isinstance(payload, dict) or not isinstance(payload.get('snapshots'), list):
+        raise PayloadError("Se esperaba un objeto con una lista 'snapshots'")
+    return payload
+
+
+def encode_payload(payload: dict) -> bytes:
+    return gzip.compress(json.dumps(payload).encode('utf-8'))
+
+
+class FleetHost:
+    """Último estado e historial de un host remoto"""
+
+    def __init__(self, hostname: str, store: MetricsStore):
+        self.hostname = hostname
+        self.store = store
+        self.latest: Optional[dict] = None
+        self.latest_at = 0.0
+        self.last_seen = 0.0
+        self.agent: dict = {}
+        self.received = 0
+        self.dropped = 0
+
+    def summary(self, now: float, stale_after: float) -> dict:
+        latest = self.latest or {}
+        return {
+            'hostname': self.hostname,
+            'online': now - self.last_seen <= stale_after,
+            'last_seen': self.last_seen,
+            'collected_at': self.latest_at,
+            'agent': self.agent,
+            'received': self.received,
+            'dropped': self.dropped,
+            'os': latest.get('os_info', {}).get('os_name') if isinstance(latest.get('os_info'), dict) else None,
+            'cpu': latest.get('cpu', {}).get('percent'),
+            'memory': latest.get('memory', {}).get('percent'),
+            'disk': latest.get('disk', {}).get('percent'),
+            'network_sent_per_sec': latest.get('network', {}).get('sent_per_sec'),
+            'network_recv_per_sec': latest.get('network', {}).get('recv_per_sec')
+        }
+
+
+class FleetRegistry:
+    """Registro de los hosts que envían métricas al agregador
+
+    Cada host tiene su último snapshot en memoria y un MetricsStore propio
+    en directory/<hostname>. Los stores comparten una ColumnCache, así que
+    el número de ficheros abiertos no crece con el de hosts. Al arrancar se
+    recuperan los hosts que ya tenían historial en disco.
+    """
+
+    def __init__(self, directory: str, retention: Optional[Dict[int, int]] = None,
+                 stale_after: float = DEFAULT_STALE_AFTER, max_hosts: int = DEFAULT_MAX_HOSTS,
+                 max_open_columns: int = DEFAULT_OPEN_COLUMNS):
+        self.directory = directory
+        self.retention = retention or FLEET_RETENTION
+        self.stale_after = stale_after
+        self.max_hosts = max_hosts
+        self._columns = ColumnCache(max_open_columns)
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, FleetHost] = {}
+        self._load_hosts()
+
+    def _new_host(self, hostname: str) -> FleetHost:
+        store = MetricsStore(os.path.join(self.directory, hostname), retention=self.retention,
+                             columns=self._columns)
+        return FleetHost(hostname, store)
+
+    def _load_hosts(self) -> None:
+        try:
+            names = sorted(os.listdir(self.directory))
+        except OSError:
+            return
+        for hostname in names:
+            path = os.path.join(self.directory, hostname)
+            if not HOSTNAME_RE.match(hostname) or not os.path.isdir(path):
+                continue
+            if len(self._hosts) >= self.max_hosts:
+                logger.warning(f"Límite de {self.max_hosts} hosts alcanzado; no se cargan más de {self.directory}")
+                break
+            host = self._new_host(hostname)
+            # Sin envíos desde el arranque: la última escritura del historial hace de última conexión
+            try:
+                host.last_seen = max(os.stat(os.path.join(path, name)).st_mtime for name in os.listdir(path))
+            except (OSError, ValueError):
+                pass
+            self._hosts[hostname] = host
+        if self._hosts:
+            logger.info(f"{len(self._hosts)} hosts de la flota recuperados de {self.directory}")
+
+    def _host(self, hostname: str) -> FleetHost:
+        with self._lock:
+            host = self._hosts.get(hostname)
+            if host is None:
+                if len(self._hosts) >= self.max_hosts:
+                    raise PayloadError(f"Límite de {self.max_hosts} hosts de la flota alcanzado", status=403)
+                host = self._new_host(hostname)
+                self._hosts[hostname] = host
+                logger.info(f"Nuevo host en la flota: {hostname}")
+            return host
+
+    def ingest(self, payload: dict, now: Optional[float] = None) -> int:
+        """Guarda los snapshots de un envío y devuelve cuántos se aceptaron"""
+        now = time.time() if now is None else now
+        agent = payload.get('agent') if isinstance(payload.get('agent'), dict) else {}
+        hostname = str(agent.get('hostname') or '')
+        if not HOSTNAME_RE.match(hostname):
+            raise PayloadError("Nombre de host inválido")
+
+        host = self._host(hostname)
+        snapshots = [s for s in payload['snapshots'] if isinstance(s, dict)]
+        snapshots.sort(key=lambda s: s.get('collected_at') or 0)
+        for snapshot in snapshots:
+            collected_at = snapshot.get('collected_at')
+            if not isinstance(collected_at, (int, float)):
+                collected_at = now
+            host.store.record(snapshot, timestamp=collected_at)
+            if collected_at >= host.latest_at:
+                host.latest = snapshot
+                host.latest_at = collected_at
+
+        host.agent = agent
+        host.last_seen = now
+        host.received += len(snapshots)
+        host.dropped = int(payload.get('dropped') or 0)
+        return len(snapshots)
+
+    def hosts(self, now: Optional[float] = None) -> List[dict]:
+        now = time.time() if now is None else now
+        with self._lock:
+            hosts = list(self._hosts.values())
+        return [host.summary(now, self.stale_after) for host in sorted(hosts, key=lambda h: h.hostname)]
+
+    def get(self, hostname: str) -> Optional[FleetHost]:
+        return self._hosts.get(hostname)
+
+    def flush(self) -> None:
+        with self._lock:
+            hosts = list(self._hosts.values())
+        for host in hosts:
+            host.store.flush()
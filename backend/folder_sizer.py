@@ -0,0 +1,257 @@
+import os
+import stat
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from offload import native_module
+
+DEFAULT_WORKERS = 4
+# Directorios recordados como máximo (los usados hace más tiempo se olvidan primero)
+MAX_CACHED_DIRS = 100_000
+# Cada cuántos segundos se comprueba la cancelación mientras se espera a los hilos
+CANCEL_POLL = 0.5
+
+# Resultado del escaneo de un directorio: bytes de ficheros con un solo enlace,
+# subdirectorios (del mismo dispositivo) y ficheros con varios enlaces (dev, inode, tamaño)
+DirScan = Tuple[int, List[str], List[Tuple[int, int, int]]]
+# Identidad de un directorio en un instante: (inode, mtime en ns)
+DirStamp = Tuple[int, int]
+# Total de un subárbol: bytes de ficheros con un solo enlace y ficheros con varios
+Subtree = Tuple[int, FrozenSet[Tuple[int, int, int]]]
+ProgressCallback = Callable[[int, int, str], None]
+
+
+class SizingCancelled(Exception):
+    """El cálculo de tamaño se canceló antes de terminar"""
+    pass
+
+
+class _Pending:
+    """Directorio del recorrido en curso cuyo subárbol aún no se ha completado"""
+    __slots__ = ('parent', 'stamp', 'remaining', 'files_bytes', 'links', 'from_cache')
+
+    def __init__(self, parent: Optional[str]):
+        self.parent = parent
+        self.stamp: Optional[DirStamp] = None
+        self.remaining = 0
+        self.files_bytes = 0
+        self.links: Set[Tuple[int, int, int]] = set()
+        self.from_cache = False
+
+
+class FolderSizer:
+    """Calcula el tamaño de directorios en paralelo con caché por directorio
+
+    Cada directorio se escanea en uno de varios hilos del sistema (hilos
+    nativos aunque eventlet haya parcheado threading: os.scandir y stat no
+    ceden el control). El escaneo de cada uno se guarda con clave (inode,
+    mtime): si no cambió, no se vuelve a hacer stat de sus ficheros. Al
+    terminar un subárbol se guarda también su total, y la siguiente vez
+    basta con comprobar el mtime de sus directorios para reutilizarlo sin
+    repartir trabajo entre hilos. Los ficheros con varios enlaces duros se
+    cuentan una sola vez y nunca se cruzan puntos de montaje. Un fichero
+    reescrito en el sitio no cambia el mtime de su directorio, así que su
+    nuevo tamaño no se refleja hasta que el directorio cambie.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, max_cached_dirs: int = MAX_CACHED_DIRS):
+        self.max_workers = max_workers
+        self.max_cached_dirs = max_cached_dirs
+        self._lock = native_module('threading').Lock()
+        # ruta -> (identidad, escaneo, total del subárbol si se completó con esa identidad)
+        self._cache: 'OrderedDict[str, Tuple[DirStamp, DirScan, Optional[Subtree]]]' = OrderedDict()
+
+    def _cached(self, path: str) -> Optional[Tuple[DirStamp, DirScan, Optional[Subtree]]]:
+        with self._lock:
+            entry = self._cache.get(path)
+            if entry is not None:
+                self._cache.move_to_end(path)
+            return entry
+
+    def _forget_totals_above(self, path: str) -> None:
+        """Descarta el total guardado de los directorios que contienen path (con el lock tomado)"""
+        parent = os.path.dirname(path)
+        while parent and parent != path:
+            entry = self._cache.get(parent)
+            if entry is not None and entry[2] is not None:
+                self._cache[parent] = (entry[0], entry[1], None)
+            path, parent = parent, os.path.dirname(parent)
+
+    def _remember(self, path: str, stamp: DirStamp, scan: DirScan) -> None:
+        with self._lock:
+            self._cache[path] = (stamp, scan, None)
+            self._cache.move_to_end(path)
+            self._forget_totals_above(path)
+            while len(self._cache) > self.max_cached_dirs:
+                self._cache.popitem(last=False)
+
+    def _remember_subtree(self, path: str, stamp: DirStamp, subtree: Subtree) -> None:
+        with self._lock:
+            entry = self._cache.get(path)
+            if entry is not None and entry[0] == stamp:
+                self._cache[path] = (stamp, entry[1], subtree)
+
+    def _cached_subtree(self, path: str, stamp: DirStamp) -> Optional[Subtree]:
+        """Total guardado de path si ni él ni ningún directorio por debajo cambió desde entonces"""
+        entry = self._cached(path)
+        if entry is None or entry[0] != stamp or entry[2] is None:
+            return None
+        pending = list(entry[1][1])
+        while pending:
+            subdir = pending.pop()
+            try:
+                sub_stat = os.stat(subdir, follow_symlinks=False)
+                sub_entry = self._cached(subdir)
+            except OSError:
+                sub_entry = None
+            if sub_entry is None or sub_entry[0] != (sub_stat.st_ino, sub_stat.st_mtime_ns):
+                # Así los directorios intermedios no repiten esta comprobación al visitarse
+                with self._lock:
+                    self._forget_totals_above(subdir)
+                return None
+            pending.extend(sub_entry[1][1])
+        return entry[2]
+
+    def _scan_dir(self, path: str, stamp: DirStamp, root_dev: int) -> DirScan:
+        cached = self._cached(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        files_bytes = 0
+        subdirs: List[str] = []
+        hardlinks: List[Tuple[int, int, int]] = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        entry_stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if stat.S_ISDIR(entry_stat.st_mode):
+                        if entry_stat.st_dev == root_dev:
+                            subdirs.append(entry.path)
+                    elif stat.S_ISREG(entry_stat.st_mode):
+                        if entry_stat.st_nlink > 1:
+                            hardlinks.append((entry_stat.st_dev, entry_stat.st_ino, entry_stat.st_size))
+                        else:
+                            files_bytes += entry_stat.st_size
+        except OSError:
+            pass
+
+        result = (files_bytes, subdirs, hardlinks)
+        self._remember(path, stamp, result)
+        return result
+
+    def _visit(self, path: str, root_dev: int) -> Tuple[Optional[DirStamp], int, FrozenSet, List[str], bool]:
+        """(identidad, bytes, enlaces, subdirectorios por visitar, si es un subárbol completo de la caché)"""
+        try:
+            dir_stat = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return None, 0, frozenset(), [], False
+        stamp = (dir_stat.st_ino, dir_stat.st_mtime_ns)
+        subtree = self._cached_subtree(path, stamp)
+        if subtree is not None:
+            return stamp, subtree[0], subtree[1], [], True
+        files_bytes, subdirs, hardlinks = self._scan_dir(path, stamp, root_dev)
+        return stamp, files_bytes, frozenset(hardlinks), subdirs, False
+
+    def _complete(self, path: str, nodes: Dict[str, _Pending]) -> None:
+        """Cierra path (y los superiores que queden completos) y guarda el total de cada subárbol"""
+        while True:
+            node = nodes.pop(path)
+            if node.stamp is not None and not node.from_cache:
+                self._remember_subtree(path, node.stamp, (node.files_bytes, frozenset(node.links)))
+            if node.parent is None:
+                return
+            parent = nodes[node.parent]
+            parent.files_bytes += node.files_bytes
+            parent.links |= node.links
+            parent.remaining -= 1
+            if parent.remaining:
+                return
+            path = node.parent
+
+    def size(self, path: str, progress: Optional[ProgressCallback] = None,
+             cancel: Optional[threading.Event] = None) -> int:
+        """Tamaño total en bytes de path
+
+        progress recibe (directorios procesados, bytes acumulados, último directorio)
+        y cancel, si se activa, interrumpe el cálculo con SizingCancelled.
+        Bloquea: con eventlet se llama a través del Offloader.
+        """
+        try:
+            root_stat = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return 0
+        if not stat.S_ISDIR(root_stat.st_mode):
+            return root_stat.st_size if stat.S_ISREG(root_stat.st_mode) else 0
+
+        native_threading = native_module('threading')
+        native_queue = native_module('queue')
+        tasks = native_queue.SimpleQueue()
+        results = native_queue.SimpleQueue()
+        stop = native_threading.Event()
+
+        def work() -> None:
+            while True:
+                current = tasks.get()
+                if current is None or stop.is_set():
+                    return
+                try:
+                    results.put((current, self._visit(current, root_stat.st_dev), None))
+                except Exception as e:
+                    results.put((current, None, e))
+
+        workers = [native_threading.Thread(target=work, name='folder-sizer', daemon=True)
+                   for _ in range(self.max_workers)]
+        for worker in workers:
+            worker.start()
+
+        total = 0
+        dirs_done = 0
+        seen_links: Set[Tuple[int, int]] = set()
+        nodes: Dict[str, _Pending] = {path: _Pending(None)}
+        tasks.put(path)
+        in_flight = 1
+        try:
+            while in_flight:
+                if cancel is not None and cancel.is_set():
+                    raise SizingCancelled(path)
+                try:
+                    current, visit, error = results.get(timeout=CANCEL_POLL)
+                except native_queue.Empty:
+                    continue
+                in_flight -= 1
+                if error is not None:
+                    raise error
+                stamp, files_bytes, links, subdirs, from_cache = visit
+                node = nodes[current]
+                node.stamp = stamp
+                node.files_bytes = files_bytes
+                node.links = set(links)
+                node.from_cache = from_cache
+                total += files_bytes
+                for dev, ino, link_size in links:
+                    if (dev, ino) not in seen_links:
+                        seen_links.add((dev, ino))
+                        total += link_size
+                for subdir in subdirs:
+                    nodes[subdir] = _Pending(current)
+                    tasks.put(subdir)
+                node.remaining = len(subdirs)
+                in_flight += len(subdirs)
+                dirs_done += 1
+                if progress is not None:
+                    progress(dirs_done, total, current)
+                if not subdirs:
+                    self._complete(current, nodes)
+        finally:
+            stop.set()
+            for _ in workers:
+                tasks.put(None)
+        return total
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
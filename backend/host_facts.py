@@ -0,0 +1,124 @@
+import json
+import os
+import platform
+import socket
+import time
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger('HostFacts')
+
+# Cambiar al añadir o modificar campos: invalida las cachés escritas por versiones anteriores
+FACTS_VERSION = 1
+BOOT_ID_PATH = '/proc/sys/kernel/random/boot_id'
+CPUINFO_PATH = '/proc/cpuinfo'
+
+
+def boot_id() -> str:
+    """Identificador del arranque actual: cambia con cada reinicio del equipo"""
+    try:
+        with open(BOOT_ID_PATH) as f:
+            return f.read().strip()
+    except OSError:
+        import psutil
+        return f"boot-{int(psutil.boot_time())}"
+
+
+def _cpu_model() -> str:
+    if platform.system() == "Linux":
+        try:
+            with open(CPUINFO_PATH) as f:
+                for line in f:
+                    if line.startswith('model name'):
+                        return line.split(':', 1)[1].strip()
+        except OSError:
+            pass
+    return platform.processor() or platform.machine()
+
+
+def collect_facts() -> Dict[str, object]:
+    """Detecta los datos fijos del equipo (puede tardar segundos: dmidecode, lshw, lsb_release...)"""
+    # Importaciones diferidas: solo se pagan cuando de verdad hay que detectar
+    import psutil
+    from system_info import get_system_model, get_os_info
+
+    freq = psutil.cpu_freq() if hasattr(psutil, 'cpu_freq') else None
+    return {
+        'version': FACTS_VERSION,
+        'boot_id': boot_id(),
+        'hostname': socket.gethostname(),
+        'collected_at': time.time(),
+        'model': get_system_model(),
+        'os_info': get_os_info(),
+        'architecture': platform.machine(),
+        'kernel_version': platform.version(),
+        'cpu': {
+            'model': _cpu_model(),
+            'logical': psutil.cpu_count(logical=True),
+            'physical': psutil.cpu_count(logical=False),
+            'max_frequency': freq.max if freq else 0
+        },
+        'memory_total': psutil.virtual_memory().total
+    }
+
+
+class HostFacts:
+    """Datos fijos del equipo con caché en disco válida mientras no se reinicie
+
+    Al arrancar se leen del fichero si el boot id y el hostname coinciden;
+    si no, se detectan una vez y se guardan. La primera llamada a get() puede
+    tardar segundos y no se protege con un lock (con eventlet se ejecuta en un
+    hilo nativo): quien la use desde varios hilos debe lanzarla una sola vez y
+    esperar su resultado, como hace app.py.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._facts: Optional[Dict[str, object]] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._facts is not None
+
+    def get(self) -> Dict[str, object]:
+        if self._facts is None:
+            facts = self._load()
+            if facts is None:
+                facts = collect_facts()
+                self._save(facts)
+            self._remember(facts)
+            self._facts = facts
+        return self._facts
+
+    @staticmethod
+    def _remember(facts: Dict[str, object]) -> None:
+        # Así los recolectores de system_info tampoco vuelven a ejecutar los comandos
+        from system_info import remember_host_identity
+        remember_host_identity(facts['model'], facts['os_info'])
+
+    def _load(self) -> Optional[Dict[str, object]]:
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r') as f:
+                facts = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Caché de datos del equipo ilegible: {str(e)}")
+            return None
+        if not isinstance(facts, dict) or facts.get('version') != FACTS_VERSION:
+            return None
+        if facts.get('boot_id') != boot_id() or facts.get('hostname') != socket.gethostname():
+            # El equipo se reinició (o cambió de nombre): pudo cambiar el SO, el hardware...
+            return None
+        return facts
+
+    def _save(self, facts: Dict[str, object]) -> None:
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(facts, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la caché de datos del equipo: {str(e)}")
@@ -0,0 +1,233 @@
+import time
+import uuid
+import logging
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from offload import native_module
+
+logger = logging.getLogger('Jobs')
+
+DEFAULT_WORKERS = 2
+MAX_OUTPUT_LINES = 200
+MAX_FINISHED_JOBS = 100
+# Segundos mínimos entre notificaciones de progreso o salida de un mismo trabajo
+NOTIFY_INTERVAL = 0.5
+
+
+class JobCancelled(Exception):
+    """La función del trabajo se interrumpió porque se pidió su cancelación"""
+    pass
+
+
+class Job:
+    """Operación larga ejecutada en segundo plano (desinstalación, limpieza, cálculo de tamaño)"""
+
+    def __init__(self, kind: str, target: str, manager: 'JobManager'):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.target = target
+        self.status = 'queued'
+        self.progress: Optional[float] = None
+        self.output: Deque[str] = deque(maxlen=MAX_OUTPUT_LINES)
+        self.result: Any = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        # Se consulta desde el hilo nativo del trabajo: no puede ser un Event verde
+        self.cancel_event = native_module('threading').Event()
+        self._manager = manager
+        # Líneas aún no notificadas y momento de la última notificación (para agruparlas)
+        self._pending_lines: List[str] = []
+        self._notified_at = 0.0
+        # Líneas escritas desde el principio (output solo guarda las últimas)
+        self.line_count = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('done', 'failed', 'cancelled')
+
+    def log(self, line: str) -> None:
+        """Añade una línea de salida; se notifica a los clientes junto a las demás pendientes"""
+        self.output.append(line)
+        self._pending_lines.append(line)
+        self.line_count += 1
+        self._manager._notify(self, throttle=True)
+
+    def set_progress(self, progress: float) -> None:
+        self.progress = progress
+        self._manager._notify(self, throttle=True)
+
+    def to_dict(self, include_output: bool = True) -> Dict[str, Any]:
+        data = {
+            'id': self.id,
+            'kind': self.kind,
+            'target': self.target,
+            'status': self.status,
+            'progress': self.progress,
+            'result': self.result,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+        if include_output:
+            data['output'] = list(self.output)
+            data['line_count'] = self.line_count
+        return data
+
+
+class JobManager:
+    """Cola de trabajos con pool acotado y bloqueo por gestor de paquetes
+
+    submit() devuelve el trabajo al instante; la función se ejecuta en el
+    pool y recibe el propio Job para informar de su salida y progreso. Si
+    admite cancelación, comprueba job.cancel_event y lanza JobCancelled. Los
+    trabajos con la misma lock_key (p. ej. 'apt') se ejecutan de uno en uno:
+    mientras esperan su turno no ocupan ningún hilo del pool.
+
+    El pool usa hilos del sistema aunque eventlet haya parcheado threading,
+    así una desinstalación o una limpieza bloqueadas no paran el hub. Desde
+    esos hilos no se puede emitir por Socket.IO: los cambios se acumulan y
+    quien corre en el hub los recoge con pending_updates().
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS):
+        native_threading = native_module('threading')
+        native_queue = native_module('queue')
+        self.max_workers = max_workers
+        self._lock = native_threading.Lock()
+        self._tasks = native_queue.SimpleQueue()
+        self._updates = native_queue.SimpleQueue()
+        self._workers: List[Any] = []
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        # lock_key -> trabajos que esperan a que termine el que tiene la clave
+        self._waiting: Dict[str, Deque[Tuple[Job, Callable[[Job], Any]]]] = {}
+
+    def submit(self, kind: str, target: str, fn: Callable[[Job], Any],
+               lock_key: Optional[str] = None) -> Job:
+        job = Job(kind, target, self)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+            # Si otro trabajo tiene la clave, este espera en su cola sin ocupar un hilo del pool
+            queued = lock_key is not None and lock_key in self._waiting
+            if queued:
+                self._waiting[lock_key].append((job, fn))
+            elif lock_key is not None:
+                self._waiting[lock_key] = deque()
+        if not queued:
+            self._dispatch(job, fn, lock_key)
+        self._notify(job)
+        return job
+
+    def _dispatch(self, job: Job, fn: Callable[[Job], Any], lock_key: Optional[str]) -> None:
+        with self._lock:
+            if not self._workers:
+                native_threading = native_module('threading')
+                self._workers = [native_threading.Thread(target=self._work, name='job', daemon=True)
+                                 for _ in range(self.max_workers)]
+                for worker in self._workers:
+                    worker.start()
+        self._tasks.put((job, fn, lock_key))
+
+    def _work(self) -> None:
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            self._run(*task)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> bool:
+        """Pide la cancelación; los trabajos en cola no llegan a ejecutarse"""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancel_event.set()
+        with self._lock:
+            # Un trabajo que espera su clave se retira de la cola en vez de esperar su turno
+            removed = False
+            for waiting in self._waiting.values():
+                for entry in waiting:
+                    if entry[0] is job:
+                        waiting.remove(entry)
+                        removed = True
+                        break
+        if removed:
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+            self._notify(job)
+        return True
+
+    def _run(self, job: Job, fn: Callable[[Job], Any], lock_key: Optional[str]) -> None:
+        try:
+            if job.cancel_event.is_set():
+                job.status = 'cancelled'
+                return
+            job.status = 'running'
+            self._notify(job)
+            job.result = fn(job)
+            # Una cancelación pedida cuando ya no se podía interrumpir (p. ej. una
+            # desinstalación) no cambia el resultado: el trabajo terminó de verdad
+            if isinstance(job.result, dict) and job.result.get('success') is False:
+                job.status = 'failed'
+            else:
+                job.status = 'done'
+        except JobCancelled:
+            job.status = 'cancelled'
+        except Exception as e:
+            # Aunque se pidiera cancelar, otro error es un fallo real y se conserva su mensaje
+            logger.error(f"Error en el trabajo {job.kind} {job.target}: {str(e)}", exc_info=True)
+            job.result = {'success': False, 'message': str(e)}
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            self._notify(job)
+            if lock_key is not None:
+                self._next(lock_key)
+
+    def _next(self, lock_key: str) -> None:
+        """Pasa la clave al siguiente trabajo que la espera (o la libera)"""
+        with self._lock:
+            waiting = self._waiting.get(lock_key)
+            if not waiting:
+                self._waiting.pop(lock_key, None)
+                return
+            job, fn = waiting.popleft()
+        self._dispatch(job, fn, lock_key)
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def pending_updates(self) -> List[Dict[str, Any]]:
+        """Cambios de los trabajos desde la última llamada, en orden"""
+        updates = []
+        empty = native_module('queue').Empty
+        while True:
+            try:
+                updates.append(self._updates.get_nowait())
+            except empty:
+                return updates
+
+    def _notify(self, job: Job, throttle: bool = False) -> None:
+        now = time.monotonic()
+        if throttle and now - job._notified_at < NOTIFY_INTERVAL:
+            # Progreso y salida se agrupan; los cambios de estado siempre se notifican
+            return
+        job._notified_at = now
+        data = job.to_dict(include_output=False)
+        if job._pending_lines:
+            data['lines'], job._pending_lines = job._pending_lines, []
+            # Posición de la primera línea: quien ya la recibió con output la descarta
+            data['first_line'] = job.line_count - len(data['lines'])
+        self._updates.put(data)
+
+    def shutdown(self) -> None:
+        for _ in self._workers:
+            self._tasks.put(None)
@@ -0,0 +1,252 @@
+import gzip
+import logging
+import os
+import re
+import shutil
+import time
+from logging.handlers import QueueHandler
+from typing import Dict, List, Optional
+
+from offload import native_module
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DEFAULT_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'system_monitor.log')
+# Registros de peticiones HTTP: werkzeug (modo threading) y el servidor de eventlet
+ACCESS_LOGGERS = ('werkzeug', 'access')
+
+# Valores por defecto de la sección "registro" de config.json
+DEFAULT_OPTIONS: Dict[str, object] = {
+    'nivel': 'INFO',
+    'niveles': {},
+    'tamano_max_mb': 10,
+    'rotar_cada_horas': 24,
+    'copias': 5,
+    'comprimir': True,
+    'consola': True,
+    'muestreo_peticiones': 0.1,
+    'lote': 256,
+    'intervalo_escritura': 1.0
+}
+
+_STATUS_RE = re.compile(r'" (\d{3}) ')
+
+
+class SamplingFilter(logging.Filter):
+    """Deja pasar 1 de cada N líneas de peticiones; avisos, errores y respuestas >= 400 siempre"""
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+        self._seen = 0
+
+    @staticmethod
+    def _status(record: logging.LogRecord) -> Optional[int]:
+        # werkzeug pasa el código como argumento; eventlet manda la línea ya formateada
+        if isinstance(record.args, tuple) and len(record.args) >= 2:
+            try:
+                return int(str(getattr(record.args[1], 'value', record.args[1])))
+            except ValueError:
+                pass
+        match = _STATUS_RE.search(str(record.msg))
+        return int(match.group(1)) if match else None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        status = self._status(record)
+        if status is not None and status >= 400:
+            return True
+        if self.rate <= 0:
+            return False
+        self._seen += 1
+        return self._seen % max(1, round(1 / self.rate)) == 0
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Encola el registro con solo el mensaje resuelto: fecha, formato y trazas los aplica el hilo escritor"""
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # Sin el lock del Handler: SimpleQueue.put es seguro entre hilos nativos y verdes
+        result = self.filter(record)
+        if isinstance(result, logging.LogRecord):
+            record = result
+        if result:
+            self.emit(record)
+        return bool(result)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Se fija el mensaje ahora porque los argumentos podrían cambiar antes de escribirse.
+        # La traza no: el traceback ya no cambia y formatearla lee ficheros fuente (linecache).
+        # Sin copiar el registro: el resultado es equivalente para cualquier otro handler
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class BatchingRotatingFileHandler(logging.Handler):
+    """Fichero de log escrito por lotes que rota por tamaño y por tiempo, con copias en gzip"""
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, rotate_every: float = 24 * 3600,
+                 backup_count: int = 5, compress: bool = True):
+        super().__init__()
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_every = rotate_every
+        self.backup_count = backup_count
+        self.compress = compress
+        self._stream = None
+        self._size = 0
+        self._rollover_at = 0.0
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._stream = open(self.path, 'a', encoding='utf-8')
+        self._size = self._stream.tell()
+        self._rollover_at = time.time() + self.rotate_every if self.rotate_every else float('inf')
+
+    def _backup_name(self, index: int) -> str:
+        return f"{self.path}.{index}.gz" if self.compress else f"{self.path}.{index}"
+
+    def _rollover(self) -> None:
+        self._stream.close()
+        self._stream = None
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = self._backup_name(index)
+                if os.path.exists(source):
+                    os.replace(source, self._backup_name(index + 1))
+            if self.compress:
+                with open(self.path, 'rb') as source, gzip.open(self._backup_name(1), 'wb') as target:
+                    shutil.copyfileobj(source, target)
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self._backup_name(1))
+        else:
+            os.remove(self.path)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.emit_batch([record])
+
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        try:
+            text = ''.join(self.format(record) + '\n' for record in records)
+            if self._stream is None:
+                self._open()
+            size = len(text.encode('utf-8'))
+            if self._size and (self._size + size > self.max_bytes or time.time() >= self._rollover_at):
+                self._rollover()
+                self._open()
+            self._stream.write(text)
+            self._stream.flush()
+            self._size += size
+        except Exception:
+            self.handleError(records[-1])
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        super().close()
+
+
+class LogPipeline:
+    """Logging asíncrono: los hilos solo encolan y un hilo nativo escribe por lotes
+
+    Un QueueHandler en el logger raíz encola los registros sin formatearlos;
+    el escritor los recoge en lotes de hasta 'lote' registros (o lo que haya
+    tras 'intervalo_escritura' segundos) y los escribe de una vez en el fichero
+    rotado y, si se pide, en la consola. Ni el colector ni las peticiones
+    esperan nunca al disco.
+    """
+
+    def __init__(self, path: str = DEFAULT_LOG_PATH):
+        self.path = path
+        self.options: Dict[str, object] = dict(DEFAULT_OPTIONS)
+        self._queue = None
+        self._thread = None
+        self._file_handler: Optional[BatchingRotatingFileHandler] = None
+        self._console_handler: Optional[logging.Handler] = None
+        self._queue_handler: Optional[DeferredQueueHandler] = None
+        self._sampler = SamplingFilter()
+        self._configured_levels: Dict[str, int] = {}
+
+    def start(self, options: Optional[Dict[str, object]] = None) -> None:
+        if self._thread is not None:
+            return
+        self.options = {**DEFAULT_OPTIONS, **(options or {})}
+        formatter = logging.Formatter(LOG_FORMAT)
+        self._file_handler = BatchingRotatingFileHandler(self.path)
+        self._file_handler.setFormatter(formatter)
+        self._console_handler = logging.StreamHandler()
+        self._console_handler.setFormatter(formatter)
+
+        self._queue = native_module('queue').SimpleQueue()
+        self._queue_handler = DeferredQueueHandler(self._queue)
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self._queue_handler)
+        for name in ACCESS_LOGGERS:
+            logging.getLogger(name).addFilter(self._sampler)
+        self.configure(self.options)
+
+        self._thread = native_module('threading').Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+
+    def configure(self, options: Dict[str, object]) -> None:
+        """Aplica en caliente niveles, muestreo y rotación (sección 'registro' de config.json)"""
+        self.options = {**DEFAULT_OPTIONS, **(options or {})}
+        logging.getLogger().setLevel(str(self.options['nivel']).upper())
+        # Los niveles que ya no están en la configuración vuelven a heredar del raíz
+        levels = {name: logging.getLevelName(str(level).upper())
+                  for name, level in dict(self.options['niveles']).items()}
+        for name in self._configured_levels:
+            if name not in levels:
+                logging.getLogger(name).setLevel(logging.NOTSET)
+        for name, level in levels.items():
+            logging.getLogger(name).setLevel(level)
+        self._configured_levels = levels
+        self._sampler.rate = float(self.options['muestreo_peticiones'])
+        if self._file_handler is not None:
+            self._file_handler.max_bytes = int(float(self.options['tamano_max_mb']) * 1024 * 1024)
+            self._file_handler.rotate_every = float(self.options['rotar_cada_horas']) * 3600
+            self._file_handler.backup_count = int(self.options['copias'])
+            self._file_handler.compress = bool(self.options['comprimir'])
+
+    def _run(self) -> None:
+        queue = self._queue
+        empty = native_module('queue').Empty
+        while True:
+            try:
+                batch = [queue.get(timeout=float(self.options['intervalo_escritura']))]
+            except empty:
+                continue
+            while len(batch) < int(self.options['lote']) and batch[-1] is not None:
+                try:
+                    batch.append(queue.get_nowait())
+                except empty:
+                    break
+            # None es la marca de parada que encola stop()
+            stop = batch[-1] is None
+            if stop:
+                batch.pop()
+            if batch:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch: List[logging.LogRecord]) -> None:
+        self._file_handler.emit_batch(batch)
+        if self.options['consola']:
+            for record in batch:
+                # Solo este hilo escribe en la consola: no hace falta el lock del handler
+                self._console_handler.emit(record)
+
+    def stop(self) -> None:
+        """Escribe lo pendiente y detiene el escritor"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._thread = None
+        self._file_handler.close()
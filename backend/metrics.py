@@ -0,0 +1,284 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import psutil
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Límites (en segundos) de los histogramas de duración: de 0,1 ms a 5 s
+DURATION_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+LabelKey = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_sample(name: str, labels: Dict[str, str], value: float) -> str:
+    if labels:
+        rendered = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+        name = f"{name}{{{rendered}}}"
+    if value == float('inf'):
+        return f"{name} +Inf"
+    return f"{name} {repr(float(value)) if isinstance(value, float) else value}"
+
+
+class Metric:
+    """Familia de métricas con etiquetas, en formato de exposición de Prometheus"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}, recibió {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(_format_sample(name, labels, value) for name, labels, value in self.samples())
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Gauge(Metric):
+    """Valor que sube y baja; con callback se calcula en el momento de exportar"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 callback: Optional[Callable[[], object]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Iterable[Sample]:
+        if self._callback is not None:
+            value = self._callback()
+            # El callback devuelve un número o un dict {valores de etiquetas: número}
+            items = value.items() if isinstance(value, dict) else [((), value)]
+            for key, val in items:
+                if val is not None:
+                    key = key if isinstance(key, tuple) else (key,)
+                    yield self.name, dict(zip(self.labelnames, key)), val
+            return
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class _CallbackCounter(Gauge):
+    """Contador cuyo valor lo lleva otro (p. ej. el sistema operativo) y se lee al exportar"""
+
+    kind = 'counter'
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por etiquetas: [recuentos por cubeta (no acumulados, la última es +Inf), suma, total]
+        self._values: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        for key, counts, total, count in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                yield f"{self.name}_bucket", {**labels, 'le': le}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class Registry:
+    """Conjunto de métricas y de funciones que generan métricas al exportar"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Metric]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for metric in collector():
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# --- Instrumentación del propio monitor ---
+COLLECTOR_DURATION = REGISTRY.register(Histogram(
+    'atlayos_collector_duration_seconds', 'Duración de cada recolector de system_info', ('collector',)))
+COLLECTOR_ERRORS = REGISTRY.register(Counter(
+    'atlayos_collector_errors_total', 'Errores lanzados por cada recolector', ('collector',)))
+COLLECT_DURATION = REGISTRY.register(Histogram(
+    'atlayos_collect_duration_seconds', 'Duración de una pasada completa del colector'))
+EMIT_DURATION = REGISTRY.register(Histogram(
+    'atlayos_emit_duration_seconds', 'Tiempo en codificar y enviar un grupo a su sala', ('group', 'encoding')))
+EMIT_PAYLOAD = REGISTRY.register(Histogram(
+    'atlayos_emit_payload_bytes', 'Tamaño de los parches (muestreado) y tramas enviados', ('group', 'encoding'),
+    buckets=SIZE_BUCKETS))
+EMITTED = REGISTRY.register(Counter(
+    'atlayos_emitted_messages_total', 'Parches y tramas enviados por grupo', ('group', 'encoding')))
+DROPPED_SNAPSHOTS = REGISTRY.register(Counter(
+    'atlayos_dropped_snapshots_total', 'Snapshots publicados por el colector que el difusor no llegó a procesar'))
+RESYNC_REQUESTS = REGISTRY.register(Counter(
+    'atlayos_resync_requests_total', 'Resincronizaciones pedidas por clientes que perdieron parches'))
+CONNECTED_CLIENTS = REGISTRY.register(Gauge(
+    'atlayos_connected_clients', 'Clientes Socket.IO conectados'))
+ALERT_EVALUATION = REGISTRY.register(Histogram(
+    'atlayos_alert_evaluation_seconds', 'Duración de la evaluación de las reglas de alerta'))
+MONITOR_ERRORS = REGISTRY.register(Counter(
+    'atlayos_monitor_errors_total', 'Errores en el bucle de difusión'))
+
+_process = psutil.Process(os.getpid())
+
+
+def _process_metrics() -> Iterable[Metric]:
+    """Consumo del propio proceso (nombres estándar de los clientes de Prometheus)"""
+    with _process.oneshot():
+        cpu = _process.cpu_times()
+        memory = _process.memory_info()
+        threads = _process.num_threads()
+        create_time = _process.create_time()
+    yield _CallbackCounter('process_cpu_seconds_total', 'Tiempo de CPU del proceso (usuario + sistema)',
+                callback=lambda: cpu.user + cpu.system)
+    yield Gauge('process_resident_memory_bytes', 'Memoria residente del proceso', callback=lambda: memory.rss)
+    yield Gauge('process_virtual_memory_bytes', 'Memoria virtual del proceso', callback=lambda: memory.vms)
+    yield Gauge('process_threads', 'Hilos del proceso', callback=lambda: threads)
+    yield Gauge('process_start_time_seconds', 'Arranque del proceso (epoch)', callback=lambda: create_time)
+
+
+REGISTRY.add_collector(_process_metrics)
+
+
+def snapshot_metrics(snapshot: Optional[dict]) -> List[Metric]:
+    """Métricas del host a partir del último snapshot del colector (no vuelve a leer psutil)"""
+    if not snapshot:
+        return []
+    cpu = snapshot.get('cpu', {})
+    memory = snapshot.get('memory', {})
+    disk = snapshot.get('disk', {})
+    network = snapshot.get('network', {})
+    processes = snapshot.get('processes')
+
+    def gauge(name: str, documentation: str, value, labelnames: Sequence[str] = ()) -> Gauge:
+        return Gauge(name, documentation, labelnames, callback=lambda: value)
+
+    metrics = [
+        gauge('atlayos_host_cpu_percent', 'Uso total de CPU', cpu.get('percent')),
+        gauge('atlayos_host_cpu_core_percent', 'Uso de CPU por núcleo', {
+            (str(index),): value for index, value in enumerate(cpu.get('per_core', []))}, ('core',)),
+        gauge('atlayos_host_cpu_mode_percent', 'Reparto del tiempo de CPU por modo',
+              {(mode,): value for mode, value in cpu.get('times_percent', {}).items()}, ('mode',)),
+        gauge('atlayos_host_cpu_temperature_celsius', 'Temperatura de la CPU', cpu.get('temperature')),
+        gauge('atlayos_host_cpu_frequency_mhz', 'Frecuencia actual de la CPU', cpu.get('frequency')),
+        gauge('atlayos_host_load_average', 'Carga media del sistema', {
+            (period,): value for period, value in zip(('1m', '5m', '15m'), cpu.get('load_avg', []))}, ('period',)),
+        gauge('atlayos_host_memory_bytes', 'Memoria del sistema', {
+            (kind,): memory.get(kind) for kind in ('total', 'available', 'used', 'free')}, ('kind',)),
+        gauge('atlayos_host_memory_percent', 'Uso de memoria', memory.get('percent')),
+        gauge('atlayos_host_swap_bytes', 'Memoria de intercambio', {
+            (kind,): memory.get(f"swap_{kind}") for kind in ('total', 'used', 'free')}, ('kind',)),
+        gauge('atlayos_host_disk_bytes', 'Espacio del disco raíz', {
+            (kind,): disk.get(kind) for kind in ('total', 'used', 'free')}, ('kind',)),
+        gauge('atlayos_host_disk_percent', 'Uso del disco raíz', disk.get('percent')),
+        gauge('atlayos_host_disk_io_bytes_per_second', 'Tasa de E/S de disco', {
+            ('total', 'read'): disk.get('read_per_sec'), ('total', 'write'): disk.get('write_per_sec'),
+            **{(name, 'read'): rates.get('read_bytes_per_sec') for name, rates in disk.get('per_disk', {}).items()},
+            **{(name, 'write'): rates.get('write_bytes_per_sec') for name, rates in disk.get('per_disk', {}).items()}
+        }, ('device', 'direction')),
+        gauge('atlayos_host_network_bytes_per_second', 'Tasa de tráfico de red', {
+            ('total', 'sent'): network.get('sent_per_sec'), ('total', 'recv'): network.get('recv_per_sec'),
+            **{(nic, 'sent'): rates.get('bytes_sent_per_sec') for nic, rates in network.get('per_nic', {}).items()},
+            **{(nic, 'recv'): rates.get('bytes_recv_per_sec') for nic, rates in network.get('per_nic', {}).items()}
+        }, ('interface', 'direction')),
+        gauge('atlayos_host_boot_time_seconds', 'Arranque del sistema (epoch)', snapshot.get('boot_time'))
+    ]
+    if processes:
+        metrics.append(gauge('atlayos_host_processes', 'Procesos por estado', {
+            (status,): count for status, count in processes.get('status_counts', {}).items()}, ('status',)))
+    return metrics
@@ -0,0 +1,231 @@
+import mmap
+import os
+import struct
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger('MetricsStore')
+
+# Métricas que se guardan en el historial: nombre -> ruta dentro del snapshot
+DEFAULT_METRICS: Dict[str, Tuple[str, ...]] = {
+    'cpu.percent': ('cpu', 'percent'),
+    'cpu.temperature': ('cpu', 'temperature'),
+    'memory.percent': ('memory', 'percent'),
+    'memory.swap_percent': ('memory', 'swap_percent'),
+    'disk.percent': ('disk', 'percent'),
+    'disk.read_per_sec': ('disk', 'read_per_sec'),
+    'disk.write_per_sec': ('disk', 'write_per_sec'),
+    'network.sent_per_sec': ('network', 'sent_per_sec'),
+    'network.recv_per_sec': ('network', 'recv_per_sec'),
+    'processes.total': ('processes', 'total')
+}
+
+# Resolución (segundos por cubeta) -> retención en segundos
+DEFAULT_RETENTION: Dict[int, int] = {
+    1: 6 * 3600,
+    60: 7 * 24 * 3600,
+    3600: 365 * 24 * 3600
+}
+
+# Columnas mapeadas a la vez en una ColumnCache (cada una ocupa un descriptor de fichero)
+DEFAULT_OPEN_COLUMNS = 256
+
+# Registro de ancho fijo: inicio de la cubeta, nº de muestras, suma, mínimo, máximo
+RECORD = struct.Struct('<qqddd')
+
+
+class RingColumn:
+    """Columna circular de una métrica a una resolución, respaldada por un fichero mapeado en memoria
+
+    La posición de cada cubeta se calcula directamente a partir de su marca
+    de tiempo, así que escribir y leer un rango no requiere índices ni cargar
+    el fichero completo; los registros de vueltas anteriores se reconocen
+    porque su marca de tiempo no coincide.
+    """
+
+    def __init__(self, path: str, step: int, capacity: int):
+        self.path = path
+        self.step = step
+        self.capacity = capacity
+        size = capacity * RECORD.size
+        exists = os.path.exists(path)
+        with open(path, 'r+b' if exists else 'w+b') as f:
+            if os.fstat(f.fileno()).st_size != size:
+                # Fichero nuevo o con otra retención: se reinicia la columna
+                f.truncate(0)
+                f.truncate(size)
+            # mmap duplica el descriptor: el fichero se puede cerrar ya
+            self._map = mmap.mmap(f.fileno(), size)
+
+    def _offset(self, bucket: int) -> int:
+        return ((bucket // self.step) % self.capacity) * RECORD.size
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Acumula una muestra en la cubeta que le corresponde"""
+        bucket = int(timestamp) - int(timestamp) % self.step
+        offset = self._offset(bucket)
+        start, count, total, low, high = RECORD.unpack_from(self._map, offset)
+        if start != bucket or count == 0:
+            RECORD.pack_into(self._map, offset, bucket, 1, value, value, value)
+        else:
+            RECORD.pack_into(self._map, offset, bucket, count + 1, total + value,
+                             min(low, value), max(high, value))
+
+    def read(self, start: float, end: float) -> Iterable[Tuple[int, int, float, float, float]]:
+        """Recorre las cubetas válidas entre start y end (como mucho una vuelta completa)"""
+        first = int(start) - int(start) % self.step
+        last = int(end) - int(end) % self.step
+        first = max(first, last - (self.capacity - 1) * self.step)
+        for bucket in range(first, last + 1, self.step):
+            record = RECORD.unpack_from(self._map, self._offset(bucket))
+            if record[0] == bucket and record[1] > 0:
+                yield record
+
+    def flush(self) -> None:
+        self._map.flush()
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class ColumnCache:
+    """Columnas abiertas bajo demanda, con un máximo de ficheros mapeados a la vez
+
+    Varios MetricsStore pueden compartir una (todos los hosts de la flota):
+    al superar max_open se cierra la columna usada hace más tiempo y se
+    vuelve a mapear cuando se necesite. Las columnas solo se usan con el
+    lock tomado, así que nunca se cierran mientras se leen o escriben.
+    """
+
+    def __init__(self, max_open: int = DEFAULT_OPEN_COLUMNS):
+        self.max_open = max(1, max_open)
+        self.lock = threading.Lock()
+        self._open: 'OrderedDict[str, RingColumn]' = OrderedDict()
+
+    def get(self, path: str, step: int, capacity: int) -> RingColumn:
+        """Columna mapeada (abriéndola si hace falta); llamar con el lock tomado"""
+        column = self._open.get(path)
+        if column is not None:
+            self._open.move_to_end(path)
+            return column
+        column = RingColumn(path, step, capacity)
+        self._open[path] = column
+        while len(self._open) > self.max_open:
+            _, evicted = self._open.popitem(last=False)
+            evicted.close()
+        return column
+
+    def peek(self, path: str) -> Optional[RingColumn]:
+        """Columna si ya está abierta, sin abrirla; llamar con el lock tomado"""
+        return self._open.get(path)
+
+    def discard(self, path: str) -> None:
+        column = self._open.pop(path, None)
+        if column is not None:
+            column.close()
+
+
+class MetricsStore:
+    """Historial en disco de métricas con agregados automáticos (1s -> 1m -> 1h) y retención fija"""
+
+    def __init__(self, directory: str, retention: Optional[Dict[int, int]] = None,
+                 metrics: Optional[Dict[str, Tuple[str, ...]]] = None, columns: Optional[ColumnCache] = None):
+        self.directory = directory
+        self.retention = {int(step): int(seconds) for step, seconds in (retention or DEFAULT_RETENTION).items()}
+        self.metrics = metrics or DEFAULT_METRICS
+        # Sin caché compartida caben todas las columnas del store abiertas a la vez
+        self._columns = columns or ColumnCache(len(self.metrics) * len(self.retention))
+        self._lock = self._columns.lock
+        os.makedirs(directory, exist_ok=True)
+        # Ruta y capacidad de cada columna; se mapean en el primer uso
+        self._specs: Dict[str, Dict[int, Tuple[str, int]]] = {
+            name: {
+                step: (os.path.join(directory, f"{name}.{step}s.ring"), max(1, seconds // step))
+                for step, seconds in self.retention.items()
+            }
+            for name in self.metrics
+        }
+
+    def _column(self, name: str, step: int) -> RingColumn:
+        path, capacity = self._specs[name][step]
+        return self._columns.get(path, step, capacity)
+
+    @property
+    def steps(self) -> List[int]:
+        return sorted(self.retention)
+
+    def record(self, snapshot: dict, timestamp: Optional[float] = None) -> None:
+        """Añade los valores del snapshot a todas las resoluciones"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            for name, path in self.metrics.items():
+                value = snapshot
+                for key in path:
+                    value = value.get(key) if isinstance(value, dict) else None
+                if not isinstance(value, (int, float)):
+                    continue
+                for step in self._specs[name]:
+                    self._column(name, step).add(timestamp, float(value))
+
+    def query(self, metric: str, start: float, end: float,
+              step: Optional[int] = None) -> Dict[str, object]:
+        """Devuelve los puntos [ts, media, mínimo, máximo] de una métrica entre start y end
+
+        Se lee la resolución más gruesa que no supere el paso pedido (sin paso,
+        la más fina) y, si el paso es mayor, las cubetas se reagrupan al vuelo.
+        Si esa resolución ya no conserva el inicio del rango se pasa a la más
+        fina que sí lo cubre; si ninguna llega, 'clipped' indica que faltan
+        los puntos anteriores a 'from'.
+        """
+        if metric not in self._specs:
+            raise KeyError(metric)
+        age = time.time() - start
+        source_step = max([s for s in self.steps if s <= (step or self.steps[0])] or [self.steps[0]])
+        if self.retention[source_step] < age:
+            covering = [s for s in self.steps if s > source_step and self.retention[s] >= age]
+            source_step = covering[0] if covering else self.steps[-1]
+        step = max(step or source_step, source_step)
+        oldest = time.time() - self.retention[source_step]
+
+        points: List[List[float]] = []
+        current: Optional[List[float]] = None
+        with self._lock:
+            column = self._column(metric, source_step)
+            for bucket, count, total, low, high in column.read(start, end):
+                group = bucket - bucket % step
+                if current is None or current[0] != group:
+                    if current is not None:
+                        points.append(current)
+                    current = [group, count, total, low, high]
+                else:
+                    current[1] += count
+                    current[2] += total
+                    current[3] = min(current[3], low)
+                    current[4] = max(current[4], high)
+        if current is not None:
+            points.append(current)
+
+        return {
+            'metric': metric,
+            'step': step,
+            'from': max(start, oldest),
+            'clipped': start < oldest,
+            'points': [[group, round(total / count, 3), low, high] for group, count, total, low, high in points]
+        }
+
+    def flush(self) -> None:
+        with self._lock:
+            for columns in self._specs.values():
+                for path, _ in columns.values():
+                    column = self._columns.peek(path)
+                    if column is not None:
+                        column.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            for columns in self._specs.values():
+                for path, _ in columns.values():
+                    self._columns.discard(path)
@@ -0,0 +1,191 @@
+import itertools
+import logging
+import sys
+from typing import Any, Callable, Iterable, Iterator, Optional, Set, Tuple
+
+logger = logging.getLogger('Offload')
+
+# Llamadas bloqueantes simultáneas en hilos nativos (el pool de eventlet tiene 20 hilos por defecto)
+DEFAULT_CONCURRENCY = 4
+# Segundos que se espera una llamada antes de rendirse (el hilo nativo sigue hasta que termina)
+DEFAULT_TIMEOUT = 20.0
+# Elementos que se leen de un iterador en cada salto al hilo nativo
+DEFAULT_CHUNK = 64
+# Segundos entre entregas del progreso de run_with_progress()
+PROGRESS_INTERVAL = 0.5
+
+_UNSET = object()
+
+
+class OffloadTimeout(TimeoutError):
+    """La llamada no terminó a tiempo (o no hubo hueco libre en el pool)"""
+
+
+class OffloadBusy(RuntimeError):
+    """Ya hay una llamada en curso con la misma clave"""
+
+
+def native_module(module_name: str):
+    """Módulo sin parchear por eventlet (threading, queue...) para lo que se usa desde hilos nativos
+
+    Los locks y eventos verdes no se pueden esperar desde un hilo de tpool:
+    lo que se comparte con las llamadas de run() debe crearse con este módulo.
+    """
+    if 'eventlet' not in sys.modules:
+        return __import__(module_name)
+    from eventlet import patcher
+    return patcher.original(module_name)
+
+
+def _native_pool():
+    """eventlet.tpool si la app está parcheada por eventlet y se llama desde el hub; None si no hace falta"""
+    if 'eventlet' not in sys.modules:
+        # Sin eventlet cargado no hay parche posible (agente, benchmarks)
+        return None
+    from eventlet import patcher, tpool
+    if not patcher.is_monkey_patched('thread'):
+        return None
+    threading = patcher.original('threading')
+    # El hub corre en el hilo principal; en cualquier otro hilo nativo (tpool,
+    # trabajos de JobManager) bloquear no afecta a nadie y se llama directamente
+    return tpool if threading.current_thread() is threading.main_thread() else None
+
+
+class Offloader:
+    """Ejecuta llamadas bloqueantes (psutil, subprocess, escaneos de disco) fuera del hub de eventlet
+
+    Con eventlet cada llamada se ejecuta en un hilo nativo de eventlet.tpool y
+    el hilo verde que la pidió espera sin bloquear al resto de clientes. Un
+    semáforo limita cuántas hay a la vez y cada una tiene un tiempo máximo.
+    Una clave (key) evita lanzar otra vez la misma llamada mientras la
+    anterior sigue en curso, p. ej. tras un timeout. Sin eventlet (agente,
+    benchmarks) las llamadas se ejecutan directamente.
+    """
+
+    def __init__(self, max_concurrent: int = DEFAULT_CONCURRENCY, timeout: Optional[float] = DEFAULT_TIMEOUT):
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self._slots = None
+        self._busy: Set[str] = set()
+
+    def run(self, fn: Callable[..., Any], *args, timeout: Any = _UNSET, key: Optional[str] = None, **kwargs) -> Any:
+        pool = _native_pool()
+        if pool is None:
+            return fn(*args, **kwargs)
+
+        import eventlet
+        from eventlet.semaphore import Semaphore
+
+        timeout = self.timeout if timeout is _UNSET else timeout
+        if self._slots is None:
+            # Se crea aquí para que sea un semáforo verde aunque el Offloader se creara antes del parche
+            self._slots = Semaphore(self.max_concurrent)
+        if key is not None:
+            if key in self._busy:
+                raise OffloadBusy(f"{key} sigue en curso")
+            self._busy.add(key)
+        if not self._slots.acquire(timeout=timeout):
+            self._busy.discard(key)
+            raise OffloadTimeout(f"Sin hueco en el pool para {key or getattr(fn, '__name__', fn)}")
+
+        worker = eventlet.spawn(self._execute, pool, fn, args, kwargs, key)
+        try:
+            with eventlet.Timeout(timeout, OffloadTimeout(f"{key or getattr(fn, '__name__', fn)} superó {timeout} s")):
+                result, error = worker.wait()
+        except OffloadTimeout as e:
+            logger.warning(str(e))
+            raise
+        if error is not None:
+            raise error
+        return result
+
+    def _execute(self, pool, fn: Callable[..., Any], args: tuple, kwargs: dict,
+                 key: Optional[str]) -> Tuple[Any, Optional[Exception]]:
+        # La excepción se devuelve en vez de lanzarse: si no, el hub de eventlet imprime su traza
+        # aunque quien espera la vaya a tratar (p. ej. SizingCancelled al cancelar un trabajo)
+        try:
+            return pool.execute(fn, *args, **kwargs), None
+        except Exception as e:
+            return None, e
+        finally:
+            # El hueco y la clave se liberan cuando termina de verdad, no cuando se rinde quien esperaba
+            self._slots.release()
+            self._busy.discard(key)
+
+    def run_with_progress(self, fn: Callable[..., Any], progress: Optional[Callable[..., None]], *args,
+                          interval: float = PROGRESS_INTERVAL, timeout: Any = _UNSET,
+                          key: Optional[str] = None, **kwargs) -> Any:
+        """Como run(), para funciones que informan de su avance con un argumento progress
+
+        fn recibe un progress propio que solo guarda el último valor (se llama
+        desde el hilo nativo); el hilo verde que espera lo entrega al progress
+        original cada interval segundos y al terminar, así puede emitir por
+        Socket.IO sin inundar a los clientes.
+        """
+        if progress is None or _native_pool() is None:
+            return self.run(fn, *args, progress=progress, timeout=timeout, key=key, **kwargs)
+
+        import eventlet
+
+        latest = [None]
+
+        def record(*values) -> None:
+            latest[0] = values
+
+        worker = eventlet.spawn(self.run, fn, *args, progress=record, timeout=timeout, key=key, **kwargs)
+        delivered = None
+        while True:
+            timer = eventlet.Timeout(interval)
+            try:
+                result = worker.wait()
+                break
+            except eventlet.Timeout as e:
+                if e is not timer:
+                    raise
+            finally:
+                timer.cancel()
+            if latest[0] is not delivered:
+                delivered = latest[0]
+                progress(*delivered)
+        if latest[0] is not None and latest[0] is not delivered:
+            progress(*latest[0])
+        return result
+
+    def iterate(self, iterable: Iterable[Any], chunk: int = DEFAULT_CHUNK, timeout: Any = _UNSET) -> Iterator[Any]:
+        """Recorre un iterador bloqueante leyendo chunk elementos por cada salto al hilo nativo
+
+        Si el recorrido se abandona (timeout, error o break) el generador se
+        cierra también en un hilo nativo y después de la lectura que pudiera
+        seguir en curso, para que libere sus procesos y ficheros.
+        """
+        iterator = iter(iterable)
+        # Lecturas y cierre nunca a la vez: un generador en ejecución no se puede cerrar
+        turn = native_module('threading').Lock()
+        exhausted = False
+
+        def read() -> list:
+            with turn:
+                return list(itertools.islice(iterator, chunk))
+
+        def close() -> None:
+            try:
+                with turn:
+                    iterator.close()
+            except Exception as e:
+                logger.warning(f"Error al cerrar el iterador: {e}")
+
+        try:
+            while True:
+                items = self.run(read, timeout=timeout)
+                if not items:
+                    exhausted = True
+                    return
+                yield from items
+        finally:
+            if not exhausted and hasattr(iterator, 'close'):
+                if _native_pool() is None:
+                    close()
+                else:
+                    import eventlet
+                    # Sin esperar: este bloque puede ejecutarse al recoger el generador
+                    eventlet.spawn(self.run, close, timeout=None)
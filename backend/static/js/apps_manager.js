@@ -4,7 +4,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Botón actualizar
     document.getElementById('refresh-apps').addEventListener('click', function() {
-        cargarApps();
+        cargarApps(true);
     });
 
     // Agregar filtro de búsqueda
@@ -22,16 +22,42 @@ document.addEventListener('DOMContentLoaded', function() {
 });
 
 // Función para cargar apps desde el backend
-function cargarApps() {
-    fetch('/apps')
-        .then(response => response.json())
-        .then(data => {
-            if (data.success) {
-                window.allApps = data.apps; // Guardar apps para filtrar
-                renderApps(data.apps);
-            } else {
-                showError(data.message);
-            }
+function cargarApps(forceRefresh = false) {
+    if (forceRefresh) {
+        // Forzar un re-escaneo en segundo plano y mostrar el inventario actual mientras tanto
+        fetch('/apps?refresh=1').catch(() => {});
+    }
+    streamApps();
+}
+
+// Lee el inventario en NDJSON y va pintando las filas a medida que llegan
+function streamApps() {
+    const apps = [];
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let lastRender = 0;
+
+    fetch('/apps/stream')
+        .then(response => {
+            const reader = response.body.getReader();
+            const pump = () => reader.read().then(({ done, value }) => {
+                buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+                const lines = buffer.split('\n');
+                buffer = done ? '' : lines.pop();
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    const app = JSON.parse(line);
+                    if (app.error) throw new Error(app.error);
+                    apps.push(app);
+                }
+                window.allApps = apps; // Guardar apps para filtrar
+                if (done || apps.length - lastRender >= 200) {
+                    lastRender = apps.length;
+                    renderApps(apps);
+                }
+                if (!done) return pump();
+            });
+            return pump();
         })
         .catch(error => showError(error));
 }
@@ -58,12 +84,78 @@ function renderApps(apps) {
     `).join('');
 }
 
+// Los trabajos en segundo plano informan por Socket.IO, cada uno en su propia sala
+const socket = io();
+const jobWatchers = {};
+
+socket.on('job_update', function(data) {
+    const watcher = jobWatchers[data.id];
+    if (watcher) watcher(data);
+});
+
+// Tras reconectar el servidor ya no recuerda las salas: se vuelven a seguir los trabajos
+socket.io.on('reconnect', function() {
+    Object.keys(jobWatchers).forEach(jobId => socket.emit('follow_job', { id: jobId }));
+});
+
+// Sigue un trabajo: onLines(líneas, reemplazar) recibe su salida y la promesa se resuelve con el estado final
+function waitForJob(jobId, onLines = null) {
+    return new Promise((resolve, reject) => {
+        let lineCount = 0;
+        jobWatchers[jobId] = function(data) {
+            if (data.status === 'unknown') {
+                delete jobWatchers[jobId];
+                return reject(new Error('Trabajo desconocido'));
+            }
+            if (data.output) {
+                // Estado completo (al empezar a seguirlo o al reconectar)
+                if (onLines) onLines(data.output, true);
+                lineCount = data.line_count;
+            } else if (data.lines) {
+                // Las líneas que ya llegaron con el estado completo se descartan
+                const fresh = data.lines.slice(Math.max(0, lineCount - data.first_line));
+                if (fresh.length && onLines) onLines(fresh, false);
+                lineCount = Math.max(lineCount, data.first_line + data.lines.length);
+            }
+            if (['done', 'failed', 'cancelled'].includes(data.status)) {
+                delete jobWatchers[jobId];
+                resolve(data);
+            }
+        };
+        socket.emit('follow_job', { id: jobId });
+    });
+}
+
+// Panel con la salida del trabajo en curso (p. ej. la de apt-get durante una desinstalación)
+function showJobOutput(title) {
+    document.getElementById('job-output-title').textContent = title;
+    document.getElementById('job-output-lines').textContent = '';
+    document.getElementById('job-output').style.display = 'block';
+}
+
+function appendJobOutput(lines, replace) {
+    const pre = document.getElementById('job-output-lines');
+    const text = lines.join('\n');
+    if (replace) {
+        pre.textContent = text;
+    } else if (text) {
+        pre.textContent += (pre.textContent ? '\n' : '') + text;
+    }
+    pre.scrollTop = pre.scrollHeight;
+}
+
+function jobMessage(job) {
+    if (job.status === 'cancelled') return 'Operación cancelada';
+    return (job.result && job.result.message) || job.status;
+}
+
 // Function to clear cache
 window.clearCache = function(appName) {
     if (confirm(`¿Seguro que quieres borrar la caché de ${appName}?`)) {
         fetch(`/api/clean_cache/${encodeURIComponent(appName)}`, { method: 'POST' })
             .then(res => res.json())
-            .then(data => alert(data.message))
+            .then(data => data.job_id ? waitForJob(data.job_id).then(jobMessage) : data.message)
+            .then(message => alert(message))
             .catch(() => alert('Error al borrar caché'));
     }
 };
@@ -97,7 +189,8 @@ function closeModal() {
 // Confirmar desinstalación
 document.getElementById('confirm-uninstall').onclick = function() {
     if (appToUninstall) {
-        fetch(`/uninstall_app/${encodeURIComponent(appToUninstall)}`, {
+        const appName = appToUninstall;
+        fetch(`/uninstall_app/${encodeURIComponent(appName)}`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -106,8 +199,13 @@ document.getElementById('confirm-uninstall').onclick = function() {
         })
         .then(response => response.json())
         .then(data => {
-            alert(data.message);
-            cargarApps(); // Recargar la lista sin recargar la página
+            if (!data.job_id) return Promise.reject(new Error(data.message));
+            showJobOutput(`Desinstalando ${appName}`);
+            return waitForJob(data.job_id, appendJobOutput);
+        })
+        .then(job => {
+            alert(jobMessage(job));
+            cargarApps(true); // Recargar la lista sin recargar la página
         })
         .catch(() => alert('Error al desinstalar la aplicación.'));
     }
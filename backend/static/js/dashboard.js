@@ -1,13 +1,31 @@
 // Conectar al servidor WebSocket
 const socket = io();
 
+// Grupos de métricas que muestra el panel; el servidor solo envía los suscritos
+const DASHBOARD_GROUPS = ['cpu', 'memory', 'disk', 'net', 'processes', 'host', 'alerts'];
+// Grupos que se dejan de recibir mientras la pestaña está oculta
+const BACKGROUND_GROUPS = ['processes'];
+
+// Opcional (?binary=1): los grupos numéricos llegan como tramas binarias en lugar de parches JSON
+const USE_BINARY_FRAMES = new URLSearchParams(window.location.search).get('binary') === '1';
+
+// Estado local reconstruido a partir del snapshot de cada grupo y sus parches
+let systemState = {};
+let groupSeq = {};
+// Esquemas de las tramas binarias por id
+let frameSchemas = {};
+
 // Iniciar monitoreo al cargar la página
 document.addEventListener('DOMContentLoaded', function() {
-    // Solicitar inicio de monitoreo
+    // Solicitar inicio de monitoreo y suscribirse a los grupos del panel
     socket.emit('start_monitoring');
+    socket.emit('subscribe', { groups: DASHBOARD_GROUPS, binary: USE_BINARY_FRAMES });
     
     // Configurar gráficos
     initCharts();
+
+    // Rellenar los gráficos con el historial guardado en el servidor
+    loadChartHistory();
     
     // Configurar manejadores de eventos
     setupEventHandlers();
@@ -44,7 +62,7 @@ function initCharts() {
             labels: Array(10).fill(''),
             datasets: [
                 {
-                    label: 'Datos Enviados (MB)',
+                    label: 'Subida (KB/s)',
                     data: Array(10).fill(0),
                     borderColor: '#4776E6',
                     backgroundColor: 'rgba(71, 118, 230, 0.1)',
@@ -53,7 +71,7 @@ function initCharts() {
                     fill: true
                 },
                 {
-                    label: 'Datos Recibidos (MB)',
+                    label: 'Bajada (KB/s)',
                     data: Array(10).fill(0),
                     borderColor: '#8E54E9',
                     backgroundColor: 'rgba(142, 84, 233, 0.1)',
@@ -67,6 +85,32 @@ function initCharts() {
     });
 }
 
+function loadChartHistory() {
+    const now = Math.floor(Date.now() / 1000);
+    const points = window.cpuChart.data.datasets[0].data.length;
+    const query = metric => fetch(`/api/history?metric=${metric}&from=${now - points * 60}&to=${now}&step=60`)
+        .then(response => response.json())
+        .then(result => (result.points || []).map(point => point[1]));
+
+    Promise.all([
+        query('cpu.percent'),
+        query('network.sent_per_sec'),
+        query('network.recv_per_sec')
+    ]).then(([cpu, sent, recv]) => {
+        fillDataset(window.cpuChart.data.datasets[0], cpu);
+        fillDataset(window.networkChart.data.datasets[0], sent.map(v => v / 1024));
+        fillDataset(window.networkChart.data.datasets[1], recv.map(v => v / 1024));
+        window.cpuChart.update();
+        window.networkChart.update();
+    }).catch(error => console.error('Error cargando el historial:', error));
+}
+
+function fillDataset(dataset, values) {
+    const size = dataset.data.length;
+    const recent = values.slice(-size).map(v => parseFloat(v.toFixed(2)));
+    dataset.data = Array(size - recent.length).fill(0).concat(recent);
+}
+
 function getChartOptions() {
     return {
         responsive: true,
@@ -92,11 +136,16 @@ function getChartOptions() {
 
 function setupEventHandlers() {
     // Escuchar actualizaciones del sistema
-    socket.on('system_update', function(data) {
-        updateSystemInfo(data);
-        updateCharts(data);
-        updateProcessTables(data.processes);
-           updateSystemHardwareInfo(data); // Nueva función añadida
+    socket.on('group_snapshot', handleGroupSnapshot);
+    socket.on('group_patch', handleGroupPatch);
+    socket.on('frame_schema', handleFrameSchema);
+    socket.on('group_frame', handleGroupFrame);
+
+    // Tras reconectar el servidor ya no conoce las suscripciones
+    socket.io.on('reconnect', function() {
+        groupSeq = {};
+        frameSchemas = {};
+        socket.emit('subscribe', { groups: visibleGroups(), binary: USE_BINARY_FRAMES });
     });
     
     // Escuchar nuevas alertas
@@ -105,6 +154,111 @@ function setupEventHandlers() {
     });
 }
 
+function visibleGroups() {
+    return document.hidden ? DASHBOARD_GROUPS.filter(g => !BACKGROUND_GROUPS.includes(g)) : DASHBOARD_GROUPS;
+}
+
+// Con la pestaña oculta no se piden los procesos: el servidor deja de enumerarlos si nadie más los ve
+document.addEventListener('visibilitychange', function() {
+    if (document.hidden) {
+        BACKGROUND_GROUPS.forEach(group => delete groupSeq[group]);
+        socket.emit('unsubscribe', { groups: BACKGROUND_GROUPS });
+    } else {
+        socket.emit('subscribe', { groups: BACKGROUND_GROUPS });
+    }
+});
+
+function handleGroupSnapshot(snapshot) {
+    groupSeq[snapshot.group] = snapshot.seq;
+    if (snapshot.data) {
+        Object.assign(systemState, snapshot.data);
+        renderIfReady();
+    }
+}
+
+function handleGroupPatch(patch) {
+    const lastSeq = groupSeq[patch.group];
+    if (lastSeq === undefined || patch.seq <= lastSeq) {
+        return; // Parche antiguo o aún sin snapshot inicial del grupo
+    }
+    if (patch.seq !== lastSeq + 1) {
+        // Se perdió algún parche: pedir el snapshot completo del grupo
+        delete groupSeq[patch.group];
+        socket.emit('request_resync', { group: patch.group });
+        return;
+    }
+    patch.set.forEach(([path, value]) => setPath(systemState, path, value));
+    patch.unset.forEach(path => unsetPath(systemState, path));
+    groupSeq[patch.group] = patch.seq;
+    renderIfReady();
+}
+
+// Prepara para cada ruta del esquema si sus contenedores son arrays (índice numérico) u objetos
+function handleFrameSchema(schema) {
+    schema.containers = schema.paths.map(path => path.slice(1).map(key => typeof key === 'number'));
+    frameSchemas[schema.schema_id] = schema;
+}
+
+function handleGroupFrame(data) {
+    const buffer = data instanceof ArrayBuffer ? data : data.buffer.slice(data.byteOffset, data.byteOffset + data.byteLength);
+    const view = new DataView(buffer);
+    const schema = frameSchemas[view.getUint32(0, true)];
+    if (!schema) {
+        // Trama con un esquema que aún no conocemos
+        socket.emit('request_resync');
+        return;
+    }
+    const decoded = {};
+    schema.paths.forEach((path, i) => {
+        const value = view.getFloat64(8 + i * 8, true);
+        let node = decoded;
+        for (let j = 0; j < path.length - 1; j++) {
+            if (node[path[j]] === undefined) {
+                node[path[j]] = schema.containers[i][j] ? [] : {};
+            }
+            node = node[path[j]];
+        }
+        node[path[path.length - 1]] = Number.isNaN(value) ? null : value;
+    });
+    groupSeq[schema.group] = view.getUint32(4, true);
+    Object.assign(systemState, decoded);
+    renderIfReady();
+}
+
+function renderIfReady() {
+    // Se pinta cuando han llegado todas las secciones que usan las tarjetas
+    if (['cpu', 'memory', 'disk', 'network', 'processes'].every(key => systemState[key])) {
+        renderSystemData(systemState);
+    }
+}
+
+function setPath(target, path, value) {
+    let node = target;
+    for (let i = 0; i < path.length - 1; i++) {
+        if (typeof node[path[i]] !== 'object' || node[path[i]] === null) {
+            node[path[i]] = {};
+        }
+        node = node[path[i]];
+    }
+    node[path[path.length - 1]] = value;
+}
+
+function unsetPath(target, path) {
+    let node = target;
+    for (let i = 0; i < path.length - 1; i++) {
+        node = node[path[i]];
+        if (node === undefined) return;
+    }
+    delete node[path[path.length - 1]];
+}
+
+function renderSystemData(data) {
+    updateSystemInfo(data);
+    updateCharts(data);
+    updateProcessTables(data.processes);
+    updateSystemHardwareInfo(data);
+}
+
 function updateSystemInfo(data) {
     // Actualizar información de CPU
     document.getElementById('cpu-percent').textContent = `${data.cpu.percent}%`;
@@ -113,6 +267,12 @@ function updateSystemInfo(data) {
     document.getElementById('cpu-temp').textContent = data.cpu.temperature.toFixed(1);
     document.getElementById('cpu-percent-text').textContent = `${data.cpu.percent}%`;
     document.getElementById('cpu-progress').style.width = `${data.cpu.percent}%`;
+
+    // Desglose de CPU calculado en el servidor a partir del mismo muestreo
+    const cpuTimes = data.cpu.times_percent || {};
+    document.getElementById('cpu-iowait').textContent = (cpuTimes.iowait || 0).toFixed(1);
+    document.getElementById('cpu-steal').textContent = (cpuTimes.steal || 0).toFixed(1);
+    document.getElementById('cpu-per-core').textContent = (data.cpu.per_core || []).map(p => `${p.toFixed(0)}%`).join(' ') || '-';
     
     // Actualizar estado CPU
     updateStatusIndicator('cpu-status', data.cpu.percent, 80, 90);
@@ -138,6 +298,12 @@ function updateSystemInfo(data) {
     document.getElementById('disk-percent-text').textContent = `${data.disk.percent}%`;
     document.getElementById('disk-progress').style.width = `${data.disk.percent}%`;
     updateStatusIndicator('disk-status', data.disk.percent, 85, 95);
+    document.getElementById('disk-read-rate').textContent = ((data.disk.read_per_sec || 0) / (1024 ** 2)).toFixed(2);
+    document.getElementById('disk-write-rate').textContent = ((data.disk.write_per_sec || 0) / (1024 ** 2)).toFixed(2);
+    document.getElementById('disk-devices').textContent = Object.entries(data.disk.per_disk || {})
+        .filter(([, r]) => r.read_iops || r.write_iops)
+        .map(([disk, r]) => `${disk}: ${(r.read_iops + r.write_iops).toFixed(0)} IOPS`)
+        .join(' | ');
     
     // Actualizar información de Red
     const sentMB = (data.network.bytes_sent / (1024 ** 2)).toFixed(2);
@@ -147,6 +313,13 @@ function updateSystemInfo(data) {
     document.getElementById('bytes-sent').textContent = sentMB;
     document.getElementById('bytes-recv').textContent = recvMB;
     document.getElementById('network-total').textContent = `${totalMB} MB`;
+
+    // Tasas calculadas en el servidor (no dependen de muestras previas del cliente)
+    document.getElementById('net-sent-rate').textContent = ((data.network.sent_per_sec || 0) / 1024).toFixed(2);
+    document.getElementById('net-recv-rate').textContent = ((data.network.recv_per_sec || 0) / 1024).toFixed(2);
+    document.getElementById('net-devices').textContent = Object.entries(data.network.per_nic || {})
+        .map(([nic, r]) => `${nic}: ↑${(r.bytes_sent_per_sec / 1024).toFixed(1)} ↓${(r.bytes_recv_per_sec / 1024).toFixed(1)} KB/s`)
+        .join(' | ');
     
     // Actualizar timestamp
     document.getElementById('timestamp').textContent = `Actualizado: ${data.timestamp}`;
@@ -164,13 +337,13 @@ function updateCharts(data) {
     window.cpuChart.update();
     
     // Actualizar gráfico de Red
-    const sentMB = (data.network.bytes_sent / (1024 ** 2)).toFixed(2);
-    const recvMB = (data.network.bytes_recv / (1024 ** 2)).toFixed(2);
+    const sentKB = ((data.network.sent_per_sec || 0) / 1024).toFixed(2);
+    const recvKB = ((data.network.recv_per_sec || 0) / 1024).toFixed(2);
     
     window.networkChart.data.datasets[0].data.shift();
     window.networkChart.data.datasets[1].data.shift();
-    window.networkChart.data.datasets[0].data.push(parseFloat(sentMB));
-    window.networkChart.data.datasets[1].data.push(parseFloat(recvMB));
+    window.networkChart.data.datasets[0].data.push(parseFloat(sentKB));
+    window.networkChart.data.datasets[1].data.push(parseFloat(recvKB));
     window.networkChart.update();
 }
 
@@ -179,6 +352,11 @@ function updateProcessTables(processData) {
     updateProcessTable('mem-processes', processData.top_mem);
 }
 
+// Los campos que el sistema no deja leer (procesos de otros usuarios) llegan como null
+function formatPercent(value) {
+    return value === null || value === undefined ? 'N/A' : `${value.toFixed(1)}%`;
+}
+
 function updateProcessTable(tableId, processes) {
     const tableBody = document.getElementById(tableId);
     tableBody.innerHTML = '';
@@ -189,8 +367,8 @@ function updateProcessTable(tableId, processes) {
         row.innerHTML = `
             <td>${proc.pid}</td>
             <td>${proc.name}</td>
-            <td>${proc.cpu.toFixed(1)}%</td>
-            <td>${proc.memory.toFixed(1)}%</td>
+            <td>${formatPercent(proc.cpu)}</td>
+            <td>${formatPercent(proc.memory)}</td>
             <td><button class="kill-btn" onclick="killProcess(${proc.pid})"><i class="fas fa-skull"></i> Terminar</button></td>
         `;
         
@@ -242,6 +420,11 @@ window.killProcess = function(pid) {
     socket.emit('kill_process', { pid: pid });
 };
 
+// Termina un proceso junto con todos sus descendientes
+window.killProcessTree = function(pid) {
+    socket.emit('kill_process', { tree: pid });
+};
+
 // Escuchar respuesta de terminación de proceso
 socket.on('process_killed', function(data) {
     if (data.success) {
@@ -275,11 +458,16 @@ function updateSystemHardwareInfo(data) {
 // Modifica setupEventHandlers para asegurar que se llame a updateSystemHardwareInfo
 function setupEventHandlers() {
     // Escuchar actualizaciones del sistema
-    socket.on('system_update', function(data) {
-        updateSystemInfo(data);
-        updateCharts(data);
-        updateProcessTables(data.processes);
-        updateSystemHardwareInfo(data);  // Asegúrate que esta línea esté presente
+    socket.on('group_snapshot', handleGroupSnapshot);
+    socket.on('group_patch', handleGroupPatch);
+    socket.on('frame_schema', handleFrameSchema);
+    socket.on('group_frame', handleGroupFrame);
+
+    // Tras reconectar el servidor ya no conoce las suscripciones
+    socket.io.on('reconnect', function() {
+        groupSeq = {};
+        frameSchemas = {};
+        socket.emit('subscribe', { groups: visibleGroups(), binary: USE_BINARY_FRAMES });
     });
     
     // Escuchar nuevas alertas
@@ -0,0 +1,58 @@
+// Intervalo de refresco de la tabla de la flota
+const FLEET_REFRESH_MS = 5000;
+
+let fleetHosts = [];
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.getElementById('search-hosts').addEventListener('input', renderFleet);
+    cargarFlota();
+    setInterval(cargarFlota, FLEET_REFRESH_MS);
+});
+
+function cargarFlota() {
+    fetch('/api/fleet')
+        .then(res => res.json())
+        .then(data => {
+            fleetHosts = data.hosts || [];
+            renderFleet();
+        })
+        .catch(error => console.error('Error obteniendo la flota:', error));
+}
+
+function formatPercent(value) {
+    return typeof value === 'number' ? `${value.toFixed(1)}%` : '-';
+}
+
+function formatRate(value) {
+    return typeof value === 'number' ? (value / 1024).toFixed(1) : '-';
+}
+
+function formatAge(timestamp) {
+    if (!timestamp) return '-';
+    const seconds = Math.max(0, Math.round(Date.now() / 1000 - timestamp));
+    return seconds < 60 ? `hace ${seconds} s` : `hace ${Math.round(seconds / 60)} min`;
+}
+
+function renderFleet() {
+    const filter = document.getElementById('search-hosts').value.toLowerCase();
+    const hosts = fleetHosts.filter(host => host.hostname.toLowerCase().includes(filter));
+    const online = fleetHosts.filter(host => host.online).length;
+    document.getElementById('fleet-summary').textContent = `${online} de ${fleetHosts.length} equipos conectados`;
+
+    const tbody = document.getElementById('fleet-list');
+    tbody.innerHTML = '';
+    hosts.forEach(host => {
+        const row = document.createElement('tr');
+        row.innerHTML = `
+            <td><span class="status-indicator ${host.online ? 'status-good' : 'status-danger'}"></span></td>
+            <td>${host.hostname}</td>
+            <td>${host.os || '-'}</td>
+            <td>${formatPercent(host.cpu)}</td>
+            <td>${formatPercent(host.memory)}</td>
+            <td>${formatPercent(host.disk)}</td>
+            <td>${formatRate(host.network_sent_per_sec)} / ${formatRate(host.network_recv_per_sec)}</td>
+            <td>${formatAge(host.last_seen)}${host.dropped ? ` (${host.dropped} descartados)` : ''}</td>
+        `;
+        tbody.appendChild(row);
+    });
+}
@@ -0,0 +1,65 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+# Una ruta es la lista de claves desde la raíz del snapshot, p. ej. ['cpu', 'percent']
+Path = List[str]
+
+
+def diff_snapshot(old: Dict[str, Any], new: Dict[str, Any],
+                  prefix: Optional[Path] = None) -> Tuple[List[list], List[Path]]:
+    """Compara dos snapshots y devuelve (cambios, claves eliminadas)
+
+    Los diccionarios se comparan recursivamente; cualquier otro valor
+    (incluidas las listas) se sustituye completo cuando cambia.
+    """
+    prefix = prefix or []
+    changes: List[list] = []
+    removed: List[Path] = []
+
+    for key, value in new.items():
+        path = prefix + [key]
+        if key not in old:
+            changes.append([path, value])
+            continue
+        previous = old[key]
+        if isinstance(value, dict) and isinstance(previous, dict):
+            nested_changes, nested_removed = diff_snapshot(previous, value, path)
+            changes.extend(nested_changes)
+            removed.extend(nested_removed)
+        elif value != previous:
+            changes.append([path, value])
+
+    for key in old:
+        if key not in new:
+            removed.append(prefix + [key])
+
+    return changes, removed
+
+
+class DeltaStream:
+    """Genera parches numerados entre snapshots consecutivos
+
+    El cliente recibe un snapshot completo al conectarse y después solo los
+    parches; si detecta un salto en la secuencia pide una resincronización.
+    """
+
+    def __init__(self):
+        self._state: Tuple[int, Optional[Dict[str, Any]]] = (0, None)
+
+    @property
+    def seq(self) -> int:
+        return self._state[0]
+
+    def update(self, snapshot: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Registra un snapshot nuevo y devuelve el parche respecto al anterior (o None si no cambió nada)"""
+        seq, previous = self._state
+        changes, removed = diff_snapshot(previous or {}, snapshot)
+        if previous is not None and not changes and not removed:
+            return None
+        seq += 1
+        self._state = (seq, snapshot)
+        return {'seq': seq, 'set': changes, 'unset': removed}
+
+    def full(self) -> Dict[str, Any]:
+        """Snapshot completo con su número de secuencia, para clientes nuevos o desincronizados"""
+        seq, snapshot = self._state
+        return {'seq': seq, 'data': snapshot}
@@ -0,0 +1,96 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from binary_frames import BINARY_GROUPS
+
+# Grupos a los que puede suscribirse un cliente -> claves del snapshot que incluye cada uno
+GROUP_KEYS: Dict[str, Tuple[str, ...]] = {
+    'cpu': ('cpu',),
+    'memory': ('memory',),
+    'disk': ('disk',),
+    'net': ('network',),
+    'processes': ('processes',),
+    'host': ('hostname', 'timestamp', 'detected_os', 'boot_time', 'system_model', 'os_info', 'thresholds'),
+    'alerts': ()
+}
+
+# Recolectores caros que solo se ejecutan mientras alguien está suscrito a su grupo
+ON_DEMAND_COLLECTORS: Dict[str, Tuple[str, ...]] = {
+    'processes': ('processes',)
+}
+
+
+def room_name(group: str, binary: bool = False) -> str:
+    """Sala de Socket.IO del grupo; los clientes binarios tienen su propia sala"""
+    return f"{group}#bin" if binary else group
+
+
+def slice_snapshot(snapshot: dict, group: str) -> dict:
+    """Parte del snapshot que corresponde a un grupo"""
+    return {key: snapshot[key] for key in GROUP_KEYS.get(group, ()) if key in snapshot}
+
+
+class SubscriptionRegistry:
+    """Grupos a los que está suscrito cada cliente (sid de Socket.IO)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_sid: Dict[str, Set[str]] = {}
+        self._binary: Set[str] = set()
+
+    def set_binary(self, sid: str, enabled: bool) -> None:
+        with self._lock:
+            if enabled:
+                self._binary.add(sid)
+            else:
+                self._binary.discard(sid)
+
+    def uses_binary(self, sid: str, group: str) -> bool:
+        """True si el cliente recibe el grupo como tramas binarias"""
+        return sid in self._binary and group in BINARY_GROUPS
+
+    def subscribe(self, sid: str, groups: Iterable[str]) -> List[str]:
+        """Añade los grupos válidos y devuelve los que el cliente no tenía"""
+        with self._lock:
+            current = self._by_sid.setdefault(sid, set())
+            added = [group for group in groups if group in GROUP_KEYS and group not in current]
+            current.update(added)
+            return added
+
+    def unsubscribe(self, sid: str, groups: Iterable[str]) -> List[str]:
+        with self._lock:
+            current = self._by_sid.get(sid, set())
+            removed = [group for group in groups if group in current]
+            current.difference_update(removed)
+            return removed
+
+    def drop(self, sid: str) -> List[str]:
+        """Olvida un cliente desconectado y devuelve los grupos que tenía"""
+        with self._lock:
+            self._binary.discard(sid)
+            return sorted(self._by_sid.pop(sid, set()))
+
+    def groups_of(self, sid: str) -> List[str]:
+        with self._lock:
+            return sorted(self._by_sid.get(sid, set()))
+
+    def count(self, group: str, binary: Optional[bool] = None) -> int:
+        """Suscriptores del grupo; binary filtra por la codificación con la que lo reciben"""
+        with self._lock:
+            return sum(1 for sid, groups in self._by_sid.items() if group in groups and (
+                binary is None or binary == (sid in self._binary and group in BINARY_GROUPS)))
+
+    def active_groups(self) -> Set[str]:
+        """Grupos con al menos un suscriptor"""
+        with self._lock:
+            return set().union(*self._by_sid.values()) if self._by_sid else set()
+
+    def paused_collectors(self, required: Iterable[str] = ()) -> Set[str]:
+        """Recolectores bajo demanda cuyos grupos no tienen ningún suscriptor
+
+        required son grupos que necesita el propio servidor (p. ej. las reglas
+        de alerta por proceso) y no se pausan aunque nadie esté suscrito.
+        """
+        active = self.active_groups() | set(required)
+        return {name for group, names in ON_DEMAND_COLLECTORS.items()
+                if group not in active for name in names}
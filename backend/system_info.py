@@ -4,26 +4,22 @@ import platform
 import subprocess
 import os
 import logging
-from functools import lru_cache
-import contextlib
+import fnmatch
+import re
+import heapq
 import json
-from typing import Dict, List, Tuple, Union, Optional
-
-# Configuración avanzada de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('system_monitor.log'),
-        logging.StreamHandler()
-    ]
-)
+from array import array
+from typing import Callable, Dict, Iterator, List, Set, Tuple, Union, Optional
+from offload import native_module
+
+# La salida del logging la configura quien usa el módulo (app.py: log_pipeline)
 logger = logging.getLogger('SystemInfo')
 
 # Constantes
 TIMEOUT_COMMANDS = 3
 CACHE_TTL = 300
 DEFAULT_TEMP = 0.0
+DEFAULT_TOP_N = 10
 DEFAULT_THRESHOLDS = {
     'cpu': 90,
     'memory': 90,
@@ -35,6 +31,238 @@ class SystemInfoError(Exception):
     """Excepción personalizada para errores del sistema"""
     pass
 
+class CpuSampler:
+    """Calcula el uso de CPU a partir de deltas de cpu_times entre lecturas, sin bloquear"""
+
+    def __init__(self):
+        # Los recolectores se ejecutan en hilos nativos (Offloader): sus locks no pueden ser verdes
+        self._lock = native_module('threading').Lock()
+        self._previous: Optional[list] = None
+
+    @staticmethod
+    def _total_time(times) -> float:
+        total = sum(times)
+        # En Linux guest y guest_nice ya están contabilizados en user y nice
+        total -= getattr(times, 'guest', 0.0)
+        total -= getattr(times, 'guest_nice', 0.0)
+        return total
+
+    @classmethod
+    def _busy_time(cls, times) -> float:
+        return cls._total_time(times) - times.idle - getattr(times, 'iowait', 0.0)
+
+    @classmethod
+    def _percent(cls, before, after) -> float:
+        if before is None:
+            total_delta = cls._total_time(after)
+            busy_delta = cls._busy_time(after)
+        else:
+            total_delta = cls._total_time(after) - cls._total_time(before)
+            busy_delta = cls._busy_time(after) - cls._busy_time(before)
+        if total_delta <= 0:
+            return 0.0
+        return round(min(100.0, max(0.0, busy_delta / total_delta * 100)), 1)
+
+    @classmethod
+    def _times_percent(cls, before, after) -> Dict[str, float]:
+        fields = after._fields
+        if before is None:
+            deltas = {field: getattr(after, field) for field in fields}
+        else:
+            deltas = {field: max(0.0, getattr(after, field) - getattr(before, field)) for field in fields}
+        total_delta = sum(deltas.values()) - deltas.get('guest', 0.0) - deltas.get('guest_nice', 0.0)
+        if total_delta <= 0:
+            return {field: 0.0 for field in fields}
+        return {field: round(value / total_delta * 100, 1) for field, value in deltas.items()}
+
+    def sample(self) -> Dict[str, Union[float, list, dict]]:
+        """Devuelve el uso global, por núcleo y el desglose por tipo desde la lectura anterior"""
+        current = psutil.cpu_times(percpu=True)
+        with self._lock:
+            previous, self._previous = self._previous, current
+
+        # Sin lectura previa (o si cambió el número de núcleos) se usa el acumulado desde el arranque
+        if previous is None or len(previous) != len(current):
+            previous = [None] * len(current)
+
+        per_core = [self._percent(before, after) for before, after in zip(previous, current)]
+
+        fields = current[0]._fields
+        total_after = type(current[0])(*(sum(getattr(t, f) for t in current) for f in fields))
+        if previous[0] is None:
+            total_before = None
+        else:
+            total_before = type(current[0])(*(sum(getattr(t, f) for t in previous) for f in fields))
+
+        return {
+            'percent': self._percent(total_before, total_after),
+            'per_core': per_core,
+            'times_percent': self._times_percent(total_before, total_after)
+        }
+
+_cpu_sampler = CpuSampler()
+
+def _read_attr(method: Callable[[], object], default: object = None) -> object:
+    """Valor de un atributo de psutil.Process o default si no hay permisos (o es un zombi)"""
+    try:
+        return method()
+    except (psutil.AccessDenied, psutil.ZombieProcess):
+        return default
+
+class ProcessRegistry:
+    """Registro persistente de procesos indexado por (pid, create_time)
+
+    Reutiliza los objetos psutil.Process entre lecturas para que cpu_percent
+    se calcule como delta real desde el tick anterior, añade solo los procesos
+    nuevos y descarta los que han terminado o cuyo PID fue reutilizado.
+    """
+
+    def __init__(self):
+        self._lock = native_module('threading').Lock()
+        self._entries: Dict[Tuple[int, float], dict] = {}
+        self._keys_by_pid: Dict[int, Tuple[int, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, pid: int) -> None:
+        key = self._keys_by_pid.pop(pid, None)
+        if key is not None:
+            self._entries.pop(key, None)
+
+    def _register(self, pid: int) -> Optional[dict]:
+        proc = psutil.Process(pid)
+        with proc.oneshot():
+            # Un campo sin permisos no impide registrar (y contar) el proceso
+            create_time = _read_attr(proc.create_time, 0.0)
+            try:
+                username = proc.username()
+            except (psutil.AccessDenied, psutil.ZombieProcess, KeyError):
+                username = 'N/A'
+            entry = {'proc': proc, 'name': _read_attr(proc.name, 'N/A'), 'user': username}
+            # Primera lectura: fija la referencia para el delta del siguiente tick
+            _read_attr(lambda: proc.cpu_percent(interval=None))
+        key = (pid, create_time)
+        self._entries[key] = entry
+        self._keys_by_pid[pid] = key
+        return entry
+
+    @staticmethod
+    def _read(entry: dict, now: float) -> Tuple[int, Optional[float], Optional[float], str, float, Optional[int], dict]:
+        proc = entry['proc']
+        with proc.oneshot():
+            cpu = _read_attr(lambda: proc.cpu_percent(interval=None))
+            memory = _read_attr(proc.memory_percent)
+            status = _read_attr(proc.status, 'unknown')
+            threads = _read_attr(proc.num_threads)
+            io_rate = 0.0
+            if entry.get('io_supported', True):
+                try:
+                    io = proc.io_counters()
+                    io_total = io.read_bytes + io.write_bytes
+                    previous = entry.get('io_prev')
+                    if previous is not None and now > previous[1]:
+                        io_rate = max(0.0, (io_total - previous[0]) / (now - previous[1]))
+                    entry['io_prev'] = (io_total, now)
+                except (psutil.AccessDenied, psutil.ZombieProcess, AttributeError, NotImplementedError):
+                    entry['io_supported'] = False
+        return proc.pid, cpu, memory, status, io_rate, threads, entry
+
+    def iter_samples(self) -> Iterator[Tuple[int, float, float, str, float, int, dict]]:
+        """Sincroniza el registro con los PIDs actuales y produce una muestra por proceso
+
+        Cada muestra es una tupla (pid, cpu, memory, status, io_rate, threads, entry)
+        para no crear un diccionario por proceso en cada tick. Los campos que
+        no se pueden leer (AccessDenied, zombis) valen None, como hacía
+        process_iter con ad_value, y el proceso se cuenta igualmente.
+        """
+        with self._lock:
+            current_pids = set(psutil.pids())
+
+            for pid in [pid for pid in self._keys_by_pid if pid not in current_pids]:
+                self._evict(pid)
+
+            now = time.monotonic()
+            for pid in current_pids:
+                key = self._keys_by_pid.get(pid)
+                try:
+                    if key is None:
+                        entry = self._register(pid)
+                    else:
+                        entry = self._entries[key]
+                        if not entry['proc'].is_running():
+                            # El PID fue reutilizado por otro proceso
+                            self._evict(pid)
+                            entry = self._register(pid)
+                    sample = self._read(entry, now)
+                except psutil.NoSuchProcess as e:
+                    self._evict(pid)
+                    logger.debug("Error obteniendo info de proceso: %s", e)
+                    continue
+                yield sample
+
+_process_registry = ProcessRegistry()
+
+class CounterRates:
+    """Convierte contadores acumulados por dispositivo en tasas por segundo
+
+    Guarda la lectura anterior de cada dispositivo; los dispositivos nuevos
+    (conectados en caliente) empiezan en 0 y los que desaparecen se olvidan.
+    Un contador que retrocede se interpreta como desbordamiento de 32 bits o
+    como reinicio del dispositivo.
+    """
+
+    def __init__(self, fields: Dict[str, str]):
+        # Campo del contador de psutil -> nombre de la tasa publicada
+        self.fields = fields
+        self._lock = native_module('threading').Lock()
+        self._previous: Dict[str, Tuple[float, object]] = {}
+
+    @staticmethod
+    def _delta(before: int, after: int) -> int:
+        if after >= before:
+            return after - before
+        if before < 2 ** 32 and before - after > 2 ** 31:
+            return after + 2 ** 32 - before
+        # El contador se reinició (p. ej. el dispositivo se volvió a conectar)
+        return after
+
+    def update(self, counters: Dict[str, object], now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """Devuelve las tasas por dispositivo desde la lectura anterior"""
+        now = time.monotonic() if now is None else now
+        rates: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for device, values in counters.items():
+                previous = self._previous.get(device)
+                elapsed = now - previous[0] if previous else 0.0
+                rates[device] = {
+                    name: round(self._delta(getattr(previous[1], field), getattr(values, field)) / elapsed, 1)
+                    if elapsed > 0 else 0.0
+                    for field, name in self.fields.items()
+                }
+                self._previous[device] = (now, values)
+            for device in [device for device in self._previous if device not in counters]:
+                del self._previous[device]
+        return rates
+
+DISK_RATE_FIELDS = {
+    'read_bytes': 'read_bytes_per_sec',
+    'write_bytes': 'write_bytes_per_sec',
+    'read_count': 'read_iops',
+    'write_count': 'write_iops'
+}
+_disk_rates = CounterRates(DISK_RATE_FIELDS)
+_disk_total_rates = CounterRates(DISK_RATE_FIELDS)
+_net_rates = CounterRates({
+    'bytes_sent': 'bytes_sent_per_sec',
+    'bytes_recv': 'bytes_recv_per_sec',
+    'packets_sent': 'packets_sent_per_sec',
+    'packets_recv': 'packets_recv_per_sec'
+})
+
+def _sum_rates(per_device: Dict[str, Dict[str, float]], name: str) -> float:
+    return round(sum(rates[name] for rates in per_device.values()), 1)
+
 def _run_command(cmd: Union[str, List[str]], timeout: int = TIMEOUT_COMMANDS) -> Optional[str]:
     """Ejecuta un comando y devuelve su salida"""
     try:
@@ -47,12 +275,38 @@ def _run_command(cmd: Union[str, List[str]], timeout: int = TIMEOUT_COMMANDS) ->
         )
         return result.stdout.strip() if result.returncode == 0 else None
     except Exception as e:
-        logger.debug(f"Comando fallido {cmd}: {str(e)}")
+        logger.debug("Comando fallido %s: %s", cmd, e)
         return None
 
-@lru_cache(maxsize=1)
+# Modelo y sistema operativo no cambian hasta reiniciar: se detectan una vez o se reciben de host_facts
+_host_identity: Dict[str, object] = {}
+# Se toma desde hilos nativos (recolector 'host' y host_facts a la vez con la caché fría): no puede ser verde
+_host_identity_lock = native_module('threading').Lock()
+
+def _cached_identity(key: str, detect: Callable[[], object]):
+    value = _host_identity.get(key)
+    if value is None:
+        # Con el lock, dos hilos que llegan a la vez no lanzan dos veces dmidecode/lshw
+        with _host_identity_lock:
+            value = _host_identity.get(key)
+            if value is None:
+                value = _host_identity[key] = detect()
+    return value
+
+def remember_host_identity(model: str, os_info: Dict[str, str]) -> None:
+    """Siembra el modelo y el SO ya conocidos (p. ej. leídos de la caché en disco)"""
+    _host_identity['model'] = model
+    _host_identity['os_info'] = os_info
+
 def get_system_model() -> str:
     """Obtiene el modelo del sistema con caché"""
+    return _cached_identity('model', _detect_system_model)
+
+def get_os_info() -> Dict[str, str]:
+    """Obtiene información del sistema operativo"""
+    return _cached_identity('os_info', _detect_os_info)
+
+def _detect_system_model() -> str:
     try:
         system = platform.system()
         
@@ -94,9 +348,7 @@ def get_system_model() -> str:
         logger.error(f"Error en get_system_model: {str(e)}", exc_info=True)
         return "Desconocido"
 
-@lru_cache(maxsize=1)
-def get_os_info() -> Dict[str, str]:
-    """Obtiene información del sistema operativo"""
+def _detect_os_info() -> Dict[str, str]:
     try:
         system = platform.system()
         os_info = {
@@ -135,7 +387,7 @@ def get_os_info() -> Dict[str, str]:
                     if 'version_id' in os_release:
                         os_info['os_version'] = os_release['version_id']
                 except Exception as e:
-                    logger.debug(f"No se pudo leer /etc/os-release: {str(e)}")
+                    logger.debug("No se pudo leer /etc/os-release: %s", e)
             
             lsb_info = _run_command(['lsb_release', '-d'])
             if lsb_info:
@@ -161,130 +413,360 @@ def get_os_info() -> Dict[str, str]:
             'architecture': platform.machine()
         }
 
+# Segundos que se espera tras SIGTERM antes de escalar a SIGKILL
+KILL_TIMEOUT = 3.0
+# Procesos que se terminan de una vez sin que quien llama lo confirme expresamente
+MAX_KILL_TARGETS = 20
+# Caracteres literales (sin comodines) que debe tener un patrón para no coincidir con casi todo
+MIN_PATTERN_LITERALS = 2
+
+KILL_MESSAGES = {
+    'terminated': "Proceso {pid} terminado correctamente.",
+    'killed': "Proceso {pid} forzado a terminar.",
+    'not_found': "El proceso {pid} no existe.",
+    'access_denied': "No tienes permisos para terminar el proceso {pid}.",
+    'protected': "El proceso {pid} no se puede terminar desde el monitor.",
+    'alive': "El proceso {pid} sigue en ejecución.",
+    'signalled': "Señal de terminación enviada al proceso {pid}.",
+}
+
+def _check_pattern(pattern: str) -> str:
+    """Rechaza patrones que coinciden con todos (o casi todos) los procesos, como '*' o '?*'"""
+    literals = re.sub(r'\[[^\]]*\]|[*?]', '', pattern).strip()
+    if len(literals) < MIN_PATTERN_LITERALS:
+        raise ValueError(f"El patrón '{pattern}' es demasiado genérico: "
+                         f"indica al menos {MIN_PATTERN_LITERALS} caracteres del nombre")
+    return pattern.lower()
+
+def _protected_pids() -> Set[int]:
+    """El propio monitor con sus ancestros e hijos, init y el proceso inactivo del sistema"""
+    protected = {0, 1, os.getpid(), os.getppid()}
+    try:
+        own = psutil.Process()
+        protected.update(parent.pid for parent in own.parents())
+        protected.update(child.pid for child in own.children(recursive=True))
+    except psutil.Error:
+        pass
+    return protected
+
+def _resolve_targets(pids: List[int], patterns: List[str], tree_root: Optional[int],
+                     results: Dict[int, dict]) -> Dict[int, psutil.Process]:
+    """Procesos a terminar a partir de PIDs, patrones de nombre y raíz de árbol"""
+    targets: Dict[int, psutil.Process] = {}
+    roots = list(pids) + ([tree_root] if tree_root is not None else [])
+    for pid in roots:
+        try:
+            proc = psutil.Process(pid)
+            targets[pid] = proc
+            if pid == tree_root:
+                for child in proc.children(recursive=True):
+                    targets[child.pid] = child
+        except psutil.NoSuchProcess:
+            results[pid] = {'pid': pid, 'name': None, 'status': 'not_found'}
+        except psutil.AccessDenied:
+            results[pid] = {'pid': pid, 'name': None, 'status': 'access_denied'}
+
+    if patterns:
+        lowered = [_check_pattern(pattern) for pattern in patterns]
+        for proc in psutil.process_iter(['name']):
+            name = (proc.info['name'] or '').lower()
+            if any(fnmatch.fnmatch(name, pattern) for pattern in lowered):
+                targets.setdefault(proc.pid, proc)
+
+    for pid in _protected_pids():
+        if pid in targets:
+            del targets[pid]
+            results[pid] = {'pid': pid, 'name': None, 'status': 'protected'}
+    return targets
+
+def _wait_gone(procs: List[psutil.Process], timeout: float) -> Tuple[List[psutil.Process], List[psutil.Process]]:
+    """Como psutil.wait_procs, pero sondeando
+
+    wait_procs usa select.poll, que no existe en el select parcheado por
+    eventlet. Un zombi cuenta como terminado: ya no se ejecuta.
+    """
+    sleep = native_module('time').sleep
+    deadline = time.monotonic() + timeout
+    gone: List[psutil.Process] = []
+    alive = list(procs)
+    while True:
+        still: List[psutil.Process] = []
+        for proc in alive:
+            try:
+                running = proc.is_running() and proc.status() != psutil.STATUS_ZOMBIE
+            except psutil.NoSuchProcess:
+                running = False
+            except psutil.AccessDenied:
+                running = True
+            (still if running else gone).append(proc)
+        alive = still
+        if not alive or time.monotonic() >= deadline:
+            return gone, alive
+        sleep(0.05)
+
+def kill_processes(pids: Optional[List[int]] = None, patterns: Optional[List[str]] = None,
+                   tree_root: Optional[int] = None, timeout: float = KILL_TIMEOUT,
+                   force: bool = False, confirm: bool = False) -> dict:
+    """Termina varios procesos a la vez con SIGTERM en bloque
+
+    Con force se espera hasta timeout y a los que sigan vivos se les envía
+    SIGKILL (puede bloquear hasta 2 * timeout: con eventlet se llama a través
+    del Offloader). Sin force solo se envía la señal. Los procesos se eligen
+    por PID, por patrón fnmatch del nombre o como árbol completo a partir de
+    tree_root. Si son más de MAX_KILL_TARGETS hace falta confirm. Devuelve
+    el resultado de cada PID.
+    """
+    results: Dict[int, dict] = {}
+    targets = _resolve_targets(pids or [], patterns or [], tree_root, results)
+    if len(targets) > MAX_KILL_TARGETS and not confirm:
+        raise ValueError(f"La petición afecta a {len(targets)} procesos (máximo {MAX_KILL_TARGETS}); "
+                         f"repítela con 'confirm' para terminarlos")
+
+    signalled: List[psutil.Process] = []
+    names: Dict[int, Optional[str]] = {}
+    for pid, proc in targets.items():
+        try:
+            names[pid] = proc.name()
+        except psutil.Error:
+            # Sin nombre (zombi, sin permisos...) se intenta terminar igualmente
+            names[pid] = None
+        try:
+            proc.terminate()
+            signalled.append(proc)
+        except psutil.NoSuchProcess:
+            results[pid] = {'pid': pid, 'name': names.get(pid), 'status': 'not_found'}
+        except psutil.AccessDenied:
+            results[pid] = {'pid': pid, 'name': names.get(pid), 'status': 'access_denied'}
+
+    if not force:
+        for proc in signalled:
+            results[proc.pid] = {'pid': proc.pid, 'name': names.get(proc.pid), 'status': 'signalled'}
+        signalled = []
+    gone, alive = _wait_gone(signalled, timeout)
+    for proc in gone:
+        results[proc.pid] = {'pid': proc.pid, 'name': names.get(proc.pid), 'status': 'terminated'}
+
+    if alive and force:
+        for proc in alive:
+            try:
+                proc.kill()
+            except psutil.NoSuchProcess:
+                pass
+            except psutil.AccessDenied:
+                results[proc.pid] = {'pid': proc.pid, 'name': names.get(proc.pid), 'status': 'access_denied'}
+        pending = [proc for proc in alive if proc.pid not in results]
+        killed, alive = _wait_gone(pending, timeout)
+        for proc in killed:
+            results[proc.pid] = {'pid': proc.pid, 'name': names.get(proc.pid), 'status': 'killed'}
+    for proc in alive:
+        # Un zombi ya no se ejecuta; solo espera a que su padre lo recoja
+        try:
+            status = 'killed' if proc.status() == psutil.STATUS_ZOMBIE else 'alive'
+        except psutil.NoSuchProcess:
+            status = 'killed'
+        except psutil.AccessDenied:
+            status = 'alive'
+        results.setdefault(proc.pid, {'pid': proc.pid, 'name': names.get(proc.pid), 'status': status})
+
+    for result in results.values():
+        result['message'] = KILL_MESSAGES[result['status']].format(pid=result['pid'])
+    stopped = sum(1 for result in results.values() if result['status'] in ('terminated', 'killed', 'signalled'))
+    if not results:
+        message = "No se encontró ningún proceso."
+    elif len(results) == 1:
+        message = next(iter(results.values()))['message']
+    else:
+        message = f"{stopped} de {len(results)} procesos terminados."
+    return {
+        'success': bool(results) and stopped == len(results),
+        'message': message,
+        'results': sorted(results.values(), key=lambda result: result['pid'])
+    }
+
 def kill_process(pid: int) -> Tuple[bool, str]:
     """Intenta terminar un proceso por su PID"""
     try:
-        process = psutil.Process(pid)
-        process.terminate()
-        return True, f"Proceso {pid} terminado correctamente."
-    except psutil.NoSuchProcess:
-        return False, f"El proceso {pid} no existe."
-    except psutil.AccessDenied:
-        return False, f"No tienes permisos para terminar el proceso {pid}."
+        result = kill_processes([pid])
+        return result['success'], result['message']
     except Exception as e:
-        logger.error(f"Error al terminar proceso {pid}: {str(e)}", exc_info=True)
+        logger.error("Error al terminar proceso %s: %s", pid, e, exc_info=True)
         return False, f"Error al terminar el proceso {pid}: {str(e)}"
 
-def get_system_info() -> Dict[str, Union[dict, list, float, int, str]]:
+def _collect_cpu() -> Dict[str, dict]:
+    """Uso, topología y frecuencia de la CPU (sin temperatura)"""
+    cpu_sample = _cpu_sampler.sample()
+    freq = psutil.cpu_freq() if hasattr(psutil, 'cpu_freq') else None
+    return {'cpu': {
+        'percent': cpu_sample['percent'],
+        'per_core': cpu_sample['per_core'],
+        'times_percent': cpu_sample['times_percent'],
+        'count': psutil.cpu_count(logical=True),
+        'cores': psutil.cpu_count(logical=False),
+        'frequency': freq.current if freq else 0,
+        'load_avg': os.getloadavg() if hasattr(os, 'getloadavg') else [0.0, 0.0, 0.0]
+    }}
+
+def _collect_temperature() -> Dict[str, dict]:
+    return {'cpu': {'temperature': _get_cpu_temperature()}}
+
+def _collect_memory() -> Dict[str, dict]:
+    mem = psutil.virtual_memory()
+    swap = psutil.swap_memory()
+    return {'memory': {
+        'total': mem.total,
+        'available': mem.available,
+        'used': mem.used,
+        'free': mem.free,
+        'percent': mem.percent,
+        'swap_total': swap.total,
+        'swap_used': swap.used,
+        'swap_free': swap.free,
+        'swap_percent': swap.percent
+    }}
+
+def _collect_disk_usage() -> Dict[str, dict]:
+    disk = psutil.disk_usage('/')
+    return {'disk': {
+        'total': disk.total,
+        'used': disk.used,
+        'free': disk.free,
+        'percent': disk.percent
+    }}
+
+def _collect_disk_io() -> Dict[str, dict]:
+    # Los totales se piden aparte: sumar perdisk contaría dos veces las particiones
+    disk_io = psutil.disk_io_counters()
+    per_disk = _disk_rates.update(psutil.disk_io_counters(perdisk=True) or {})
+    totals = _disk_total_rates.update({'total': disk_io} if disk_io else {}).get('total', {})
+    return {'disk': {
+        'read_bytes': disk_io.read_bytes if disk_io else 0,
+        'write_bytes': disk_io.write_bytes if disk_io else 0,
+        'read_per_sec': totals.get('read_bytes_per_sec', 0.0),
+        'write_per_sec': totals.get('write_bytes_per_sec', 0.0),
+        'per_disk': per_disk
+    }}
+
+def _collect_network() -> Dict[str, dict]:
+    per_nic_io = psutil.net_io_counters(pernic=True) or {}
+    per_nic = _net_rates.update(per_nic_io)
+    return {'network': {
+        'bytes_sent': sum(io.bytes_sent for io in per_nic_io.values()),
+        'bytes_recv': sum(io.bytes_recv for io in per_nic_io.values()),
+        'packets_sent': sum(io.packets_sent for io in per_nic_io.values()),
+        'packets_recv': sum(io.packets_recv for io in per_nic_io.values()),
+        'sent_per_sec': _sum_rates(per_nic, 'bytes_sent_per_sec'),
+        'recv_per_sec': _sum_rates(per_nic, 'bytes_recv_per_sec'),
+        'per_nic': per_nic
+    }}
+
+def _collect_process_count() -> Dict[str, dict]:
+    """Solo el número de procesos: barato, sigue activo aunque 'processes' esté en pausa"""
+    return {'processes': {'total': len(psutil.pids())}}
+
+def _collect_host() -> Dict[str, Union[dict, float, str]]:
+    """Datos estáticos del host: basta con obtenerlos una vez"""
+    return {
+        'boot_time': psutil.boot_time(),
+        'system_model': get_system_model(),
+        'os_info': get_os_info(),
+        'thresholds': DEFAULT_THRESHOLDS  # Incluir umbrales por defecto
+    }
+
+def get_collectors(top_n: int = DEFAULT_TOP_N) -> Dict[str, Callable[[], dict]]:
+    """Devuelve los recolectores por grupo; cada uno produce un fragmento del snapshot"""
+    return {
+        'cpu': _collect_cpu,
+        'memory': _collect_memory,
+        'network': _collect_network,
+        'disk_io': _collect_disk_io,
+        # Antes que 'processes': cuando ambos están activos prevalece el total del recolector completo
+        'process_count': _collect_process_count,
+        'processes': lambda: {'processes': _get_processes_info(top_n)},
+        'disk_usage': _collect_disk_usage,
+        'temperature': _collect_temperature,
+        'host': _collect_host
+    }
+
+def merge_snapshot(*parts: dict) -> Dict[str, Union[dict, list, float, int, str]]:
+    """Combina fragmentos del snapshot fusionando un nivel de los diccionarios anidados"""
+    merged: Dict[str, Union[dict, list, float, int, str]] = {}
+    for part in parts:
+        for key, value in part.items():
+            current = merged.get(key)
+            if isinstance(value, dict) and isinstance(current, dict):
+                merged[key] = {**current, **value}
+            else:
+                merged[key] = value
+    return merged
+
+def get_system_info(top_n: int = DEFAULT_TOP_N) -> Dict[str, Union[dict, list, float, int, str]]:
     """Obtiene información completa del sistema"""
     try:
-        # Información de CPU
-        cpu_info = {
-            'percent': psutil.cpu_percent(interval=1),
-            'count': psutil.cpu_count(logical=True),
-            'cores': psutil.cpu_count(logical=False),
-            'frequency': psutil.cpu_freq().current if hasattr(psutil, 'cpu_freq') and psutil.cpu_freq() else 0,
-            'temperature': _get_cpu_temperature(),
-            'load_avg': os.getloadavg() if hasattr(os, 'getloadavg') else [0.0, 0.0, 0.0]
-        }
-        
-        # Información de memoria
-        mem = psutil.virtual_memory()
-        swap = psutil.swap_memory()
-        memory_info = {
-            'total': mem.total,
-            'available': mem.available,
-            'used': mem.used,
-            'free': mem.free,
-            'percent': mem.percent,
-            'swap_total': swap.total,
-            'swap_used': swap.used,
-            'swap_free': swap.free,
-            'swap_percent': swap.percent
-        }
-        
-        # Información de disco
-        disk = psutil.disk_usage('/')
-        disk_io = psutil.disk_io_counters()
-        disk_info = {
-            'total': disk.total,
-            'used': disk.used,
-            'free': disk.free,
-            'percent': disk.percent,
-            'read_bytes': disk_io.read_bytes if disk_io else 0,
-            'write_bytes': disk_io.write_bytes if disk_io else 0
-        }
-        
-        # Información de red
-        net_io = psutil.net_io_counters()
-        network_info = {
-            'bytes_sent': net_io.bytes_sent if net_io else 0,
-            'bytes_recv': net_io.bytes_recv if net_io else 0,
-            'packets_sent': net_io.packets_sent if net_io else 0,
-            'packets_recv': net_io.packets_recv if net_io else 0
-        }
-        
-        # Procesos
-        processes_info = _get_processes_info()
-        
-        return {
-            'cpu': cpu_info,
-            'memory': memory_info,
-            'disk': disk_info,
-            'network': network_info,
-            'processes': processes_info,
-            'boot_time': psutil.boot_time(),
-            'timestamp': time.time(),
-            'system_model': get_system_model(),
-            'os_info': get_os_info(),
-            'thresholds': DEFAULT_THRESHOLDS  # Incluir umbrales por defecto
-        }
+        parts = [collect() for collect in get_collectors(top_n).values()]
+        snapshot = merge_snapshot(*parts)
+        snapshot['timestamp'] = time.time()
+        return snapshot
         
     except Exception as e:
         logger.error(f"Error crítico en get_system_info: {str(e)}", exc_info=True)
         # Retornar estructura mínima con valores por defecto
-        return {
-            'cpu': {
-                'percent': 0,
-                'count': 0,
-                'cores': 0,
-                'frequency': 0,
-                'temperature': DEFAULT_TEMP,
-                'load_avg': [0.0, 0.0, 0.0]
-            },
-            'memory': {
-                'total': 0,
-                'available': 0,
-                'used': 0,
-                'free': 0,
-                'percent': 0,
-                'swap_total': 0,
-                'swap_used': 0,
-                'swap_free': 0,
-                'swap_percent': 0
-            },
-            'disk': {
-                'total': 0,
-                'used': 0,
-                'free': 0,
-                'percent': 0,
-                'read_bytes': 0,
-                'write_bytes': 0
-            },
-            'network': {
-                'bytes_sent': 0,
-                'bytes_recv': 0,
-                'packets_sent': 0,
-                'packets_recv': 0
-            },
-            'processes': {
-                'total': 0,
-                'running': 0,
-                'top_cpu': [],
-                'top_mem': []
-            },
-            'thresholds': DEFAULT_THRESHOLDS
-        }
+        return empty_system_info()
+
+def empty_system_info() -> Dict[str, Union[dict, list, float, int, str]]:
+    """Estructura mínima del snapshot con valores por defecto"""
+    return {
+        'cpu': {
+            'percent': 0,
+            'per_core': [],
+            'times_percent': {},
+            'count': 0,
+            'cores': 0,
+            'frequency': 0,
+            'temperature': DEFAULT_TEMP,
+            'load_avg': [0.0, 0.0, 0.0]
+        },
+        'memory': {
+            'total': 0,
+            'available': 0,
+            'used': 0,
+            'free': 0,
+            'percent': 0,
+            'swap_total': 0,
+            'swap_used': 0,
+            'swap_free': 0,
+            'swap_percent': 0
+        },
+        'disk': {
+            'total': 0,
+            'used': 0,
+            'free': 0,
+            'percent': 0,
+            'read_bytes': 0,
+            'write_bytes': 0,
+            'read_per_sec': 0,
+            'write_per_sec': 0,
+            'per_disk': {}
+        },
+        'network': {
+            'bytes_sent': 0,
+            'bytes_recv': 0,
+            'packets_sent': 0,
+            'packets_recv': 0,
+            'sent_per_sec': 0,
+            'recv_per_sec': 0,
+            'per_nic': {}
+        },
+        'processes': {
+            'total': 0,
+            'running': 0,
+            'status_counts': {},
+            'top_cpu': [],
+            'top_mem': [],
+            'top_io': [],
+            'top_threads': []
+        },
+        'thresholds': DEFAULT_THRESHOLDS
+    }
 
 def _get_cpu_temperature() -> float:
     """Obtiene temperatura de la CPU con manejo robusto"""
@@ -304,35 +786,87 @@ def _get_cpu_temperature() -> float:
                 if sensor:
                     return sensor[0].current
     except Exception as e:
-        logger.debug(f"No se pudo obtener temperatura: {str(e)}")
+        logger.debug("No se pudo obtener temperatura: %s", e)
     return DEFAULT_TEMP
 
-def _get_processes_info() -> Dict[str, Union[int, list]]:
-    """Obtiene información de procesos con manejo de errores"""
-    processes = []
-    for proc in psutil.process_iter(['pid', 'name', 'username', 'cpu_percent', 'memory_percent', 'status']):
-        try:
-            proc_info = proc.info
-            processes.append({
-                'pid': proc_info['pid'],
-                'name': proc_info['name'],
-                'user': proc_info.get('username', 'N/A'),
-                'cpu': proc_info['cpu_percent'],
-                'memory': proc_info['memory_percent'],
-                'status': proc_info.get('status', 'unknown')
-            })
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
-            logger.debug(f"Error obteniendo info de proceso: {str(e)}")
-            continue
-    
+def _process_to_dict(sample: Tuple[int, float, float, str, float, int, dict]) -> Dict[str, Union[int, str, float]]:
+    pid, cpu, memory, status, io_rate, threads, entry = sample
+    return {
+        'pid': pid,
+        'name': entry['name'],
+        'user': entry['user'],
+        'cpu': cpu,
+        'memory': memory,
+        'status': status,
+        'io_rate': io_rate,
+        'threads': threads
+    }
+
+# Valor de la tabla de procesos para los campos que no se pudieron leer
+_NAN = float('nan')
+# Última tabla completa de procesos (por columnas) para las reglas de alerta por proceso
+_process_table: Dict[str, object] = {'pid': array('q'), 'name': [], 'cpu': array('d'),
+                                      'memory': array('d'), 'io_rate': array('d'), 'threads': array('d')}
+
+def process_table() -> Dict[str, object]:
+    """Columnas pid, name, cpu, memory, io_rate y threads de todos los procesos de la última lectura"""
+    return _process_table
+
+def _get_processes_info(top_n: int = DEFAULT_TOP_N) -> Dict[str, Union[int, list, dict]]:
+    """Obtiene información de procesos en una sola pasada con top-N acotados por montículos
+
+    De paso guarda todos los procesos en process_table() sin crear un
+    diccionario por proceso.
+    """
+    global _process_table
+    top_n = max(1, int(top_n))
+    table = {'pid': array('q'), 'name': [], 'cpu': array('d'),
+             'memory': array('d'), 'io_rate': array('d'), 'threads': array('d')}
+    add_pid, add_name = table['pid'].append, table['name'].append
+    add_cpu, add_memory = table['cpu'].append, table['memory'].append
+    add_io, add_threads = table['io_rate'].append, table['threads'].append
+    # Cada montículo guarda como mucho top_n tuplas (valor, pid, muestra); la raíz es la menor
+    heaps = {'cpu': [], 'memory': [], 'io_rate': [], 'threads': []}
+    positions = {'cpu': 1, 'memory': 2, 'io_rate': 4, 'threads': 5}
+    status_counts: Dict[str, int] = {}
+    total = 0
+
+    for sample in _process_registry.iter_samples():
+        total += 1
+        add_pid(sample[0])
+        add_name(sample[6]['name'])
+        add_cpu(_NAN if sample[1] is None else sample[1])
+        add_memory(_NAN if sample[2] is None else sample[2])
+        add_io(sample[4])
+        add_threads(_NAN if sample[5] is None else sample[5])
+        status = sample[3]
+        status_counts[status] = status_counts.get(status, 0) + 1
+        for metric, heap in heaps.items():
+            value = sample[positions[metric]]
+            # Sin permisos para leerlo, el proceso queda al final del ranking
+            item = (-1.0 if value is None else value, -sample[0], sample)
+            if len(heap) < top_n:
+                heapq.heappush(heap, item)
+            elif item[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, item)
+
+    def _survivors(metric: str) -> List[Dict[str, Union[int, str, float]]]:
+        ordered = sorted(heaps[metric], key=lambda item: item[:2], reverse=True)
+        return [_process_to_dict(item[2]) for item in ordered]
+
+    _process_table = table
     return {
-        'total': len(processes),
-        'running': len([p for p in processes if p.get('status') == 'running']),
-        'top_cpu': sorted(processes, key=lambda p: p['cpu'], reverse=True)[:10],
-        'top_mem': sorted(processes, key=lambda p: p['memory'], reverse=True)[:10]
+        'total': total,
+        'running': status_counts.get(psutil.STATUS_RUNNING, 0),
+        'status_counts': status_counts,
+        'top_cpu': _survivors('cpu'),
+        'top_mem': _survivors('memory'),
+        'top_io': _survivors('io_rate'),
+        'top_threads': _survivors('threads')
     }
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     # Prueba de funcionamiento
     print("=== Prueba de system_info.py ===")
     print(f"Modelo del sistema: {get_system_model()}")
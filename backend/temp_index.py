@@ -0,0 +1,142 @@
+import os
+import stat
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from offload import native_module
+
+# Antigüedad máxima del índice antes de un re-escaneo incremental
+DEFAULT_MAX_AGE = 30.0
+DELETE_WORKERS = 8
+
+
+class TempFileIndex:
+    """Índice de nombres de fichero de los directorios temporales
+
+    Se construye una vez y después se mantiene con re-escaneos incrementales:
+    solo se vuelven a listar los directorios cuyo mtime cambió. Por cada
+    directorio se guardan los nombres y una cadena con todos ellos en
+    minúsculas, de modo que la búsqueda por subcadena descarta directorios
+    enteros con una sola comparación.
+    """
+
+    def __init__(self, roots: List[str], max_age: float = DEFAULT_MAX_AGE):
+        self.roots = [root for root in roots if root]
+        self.max_age = max_age
+        # refresh() y search_many() se ejecutan en hilos nativos (Offloader)
+        self._lock = native_module('threading').Lock()
+        # directorio -> (mtime, nombres de ficheros, nombres en minúsculas unidos por '\n', subdirectorios)
+        self._dirs: Dict[str, Tuple[int, List[str], str, List[str]]] = {}
+        self._refreshed_at = 0.0
+
+    def refresh(self) -> None:
+        """Re-escanea solo los directorios que cambiaron desde la última vez"""
+        with self._lock:
+            seen = set()
+            pending = list(self.roots)
+            while pending:
+                path = pending.pop()
+                if path in seen:
+                    continue
+                seen.add(path)
+                try:
+                    mtime = os.stat(path, follow_symlinks=False).st_mtime_ns
+                except OSError:
+                    continue
+                cached = self._dirs.get(path)
+                if cached is None or cached[0] != mtime:
+                    cached = self._scan(path, mtime)
+                    self._dirs[path] = cached
+                pending.extend(cached[3])
+
+            for path in [path for path in self._dirs if path not in seen]:
+                del self._dirs[path]
+            self._refreshed_at = time.monotonic()
+
+    @staticmethod
+    def _scan(path: str, mtime: int) -> Tuple[int, List[str], str, List[str]]:
+        names: List[str] = []
+        subdirs: List[str] = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            names.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return mtime, names, "\n".join(names).lower(), subdirs
+
+    def _ensure_fresh(self) -> None:
+        if time.monotonic() - self._refreshed_at > self.max_age:
+            self.refresh()
+
+    def search_many(self, needles: Iterable[str]) -> Dict[str, List[str]]:
+        """Rutas cuyo nombre contiene cada subcadena (sin distinguir mayúsculas), en una sola pasada"""
+        self._ensure_fresh()
+        wanted = {needle: needle.lower() for needle in needles if needle}
+        matches: Dict[str, List[str]] = {needle: [] for needle in wanted}
+        with self._lock:
+            for path, (_, names, blob, _) in self._dirs.items():
+                hits = [needle for needle, lowered in wanted.items() if lowered in blob]
+                if not hits:
+                    continue
+                for name in names:
+                    lowered_name = name.lower()
+                    for needle in hits:
+                        if wanted[needle] in lowered_name:
+                            matches[needle].append(os.path.join(path, name))
+        return matches
+
+    def search(self, needle: str) -> List[str]:
+        return self.search_many([needle]).get(needle, [])
+
+
+def delete_files(paths: List[str], workers: int = DELETE_WORKERS) -> Tuple[int, int]:
+    """Borra ficheros en paralelo y devuelve (ficheros borrados, bytes liberados)
+
+    Usa hilos del sistema aunque eventlet haya parcheado threading: con hilos
+    verdes lstat y remove se ejecutarían uno tras otro. Bloquea: con eventlet
+    se llama a través del Offloader.
+    """
+    def _delete(path: str) -> Optional[int]:
+        try:
+            file_stat = os.lstat(path)
+            if not stat.S_ISREG(file_stat.st_mode):
+                return None
+            os.remove(path)
+            return file_stat.st_size
+        except OSError:
+            return None
+
+    native_threading = native_module('threading')
+    native_queue = native_module('queue')
+    tasks = native_queue.SimpleQueue()
+    results = native_queue.SimpleQueue()
+
+    def work() -> None:
+        while True:
+            path = tasks.get()
+            if path is None:
+                return
+            results.put(_delete(path))
+
+    for path in paths:
+        tasks.put(path)
+    threads = [native_threading.Thread(target=work, name='temp-delete', daemon=True)
+               for _ in range(min(workers, len(paths)))]
+    for thread in threads:
+        tasks.put(None)
+        thread.start()
+
+    deleted = 0
+    freed = 0
+    for _ in paths:
+        size = results.get()
+        if size is not None:
+            deleted += 1
+            freed += size
+    return deleted, freed